@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Signal parser benchmark and golden-corpus check.
+
+Runs every message of bench_signal_corpus.json (English/Russian signals, emoji sides,
+"#SYM SHORT", "Плечо 10-20x", multi-TP and plain chatter) through
+TradingBot.parse_trading_signal and:
+
+  * compares the parsed fields with the golden "expected" output (exit code 1 on mismatch)
+  * reports messages/sec, p50/p99 per-message latency and tracemalloc allocations
+
+The goldens pin the parser's current behaviour (including its quirks), so a speedup can be
+checked for not changing which trades fire. After an intentional parser change, refresh
+them with --update-golden and review the JSON diff.
+
+Usage:
+    python bench_signal_parser.py                  # golden check + benchmark
+    python bench_signal_parser.py --rounds 50      # longer benchmark
+    python bench_signal_parser.py --check-only     # golden check only (fast, for CI)
+    python bench_signal_parser.py --update-golden  # rewrite expected outputs
+    python bench_signal_parser.py --output bench_output.txt
+"""
+
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CORPUS = os.path.join(HERE, 'bench_signal_corpus.json')
+GOLDEN_FIELDS = ('symbol', 'trade_type', 'entry_price', 'take_profit', 'stop_loss', 'leverage')
+
+
+def load_bot_module():
+    """Import bot.py without touching the real database or log file"""
+    workdir = tempfile.mkdtemp(prefix='bench_')
+    os.environ['ENHANCED_DB_PATH'] = os.path.join(workdir, 'bench.db')
+    sys.path.insert(0, HERE)
+    # bot.py opens trading_bot.log relative to the working directory at import time
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        import bot
+    finally:
+        os.chdir(cwd)
+    logging.disable(logging.CRITICAL)
+    return bot
+
+
+def signal_fields(signal):
+    if signal is None:
+        return None
+    return {field: getattr(signal, field) for field in GOLDEN_FIELDS}
+
+
+def check_golden(trading_bot, corpus):
+    mismatches = []
+    for item in corpus:
+        actual = signal_fields(trading_bot.parse_trading_signal(item['text'], 'bench'))
+        if actual != item['expected']:
+            mismatches.append((item, actual))
+    return mismatches
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+def run_benchmark(parse, texts, rounds):
+    # Warm-up pass so lazy initialisation does not skew the first round
+    for text in texts:
+        parse(text)
+
+    latencies_us = []
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            t0 = time.perf_counter()
+            parse(text)
+            latencies_us.append((time.perf_counter() - t0) * 1_000_000)
+    total = time.perf_counter() - started
+    latencies_us.sort()
+
+    tracemalloc.start()
+    snapshot_before = tracemalloc.take_snapshot()
+    for text in texts:
+        parse(text)
+    snapshot_after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = snapshot_after.compare_to(snapshot_before, 'filename')
+    allocated_blocks = sum(max(0, s.count_diff) for s in stats)
+    allocated_bytes = sum(max(0, s.size_diff) for s in stats)
+
+    return {
+        'messages': len(latencies_us),
+        'msgs_per_sec': len(latencies_us) / total if total else 0.0,
+        'p50_us': percentile(latencies_us, 50),
+        'p99_us': percentile(latencies_us, 99),
+        'mean_us': statistics.fmean(latencies_us) if latencies_us else 0.0,
+        'peak_kib': peak / 1024.0,
+        'retained_blocks': allocated_blocks,
+        'retained_bytes_per_msg': allocated_bytes / max(1, len(texts)),
+    }
+
+
+def format_result(name, result):
+    return (f"{name:<34} {result['msgs_per_sec']:>10.0f} msg/s   "
+            f"p50 {result['p50_us']:>7.1f} us   p99 {result['p99_us']:>7.1f} us   "
+            f"peak {result['peak_kib']:>7.1f} KiB   retained {result['retained_bytes_per_msg']:>6.0f} B/msg")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help='golden corpus JSON file')
+    parser.add_argument('--rounds', type=int, default=20, help='benchmark passes over the corpus')
+    parser.add_argument('--check-only', action='store_true', help='only run the golden comparison')
+    parser.add_argument('--update-golden', action='store_true', help='rewrite expected outputs from the current parser')
+    parser.add_argument('--output', help='also write the report to this file')
+    args = parser.parse_args(argv)
+
+    with open(args.corpus, encoding='utf-8') as f:
+        corpus = json.load(f)
+
+    bot = load_bot_module()
+    trading_bot = bot.trading_bot
+
+    if args.update_golden:
+        for item in corpus:
+            item['expected'] = signal_fields(trading_bot.parse_trading_signal(item['text'], 'bench'))
+        with open(args.corpus, 'w', encoding='utf-8') as f:
+            f.write('[\n' + ',\n'.join(json.dumps(item, ensure_ascii=False) for item in corpus) + '\n]\n')
+        print(f"✅ Golden outputs rewritten for {len(corpus)} messages in {args.corpus}")
+        return 0
+
+    lines = []
+    signals = sum(1 for item in corpus if item['expected'])
+    lines.append(f"📚 Corpus: {len(corpus)} messages ({signals} signals, {len(corpus) - signals} non-signals)")
+
+    mismatches = check_golden(trading_bot, corpus)
+    if mismatches:
+        lines.append(f"❌ Golden check FAILED: {len(mismatches)} mismatch(es)")
+        for item, actual in mismatches[:20]:
+            lines.append(f"  {item['id']} ({item['lang']}): {item['text'][:60]!r}")
+            lines.append(f"    expected: {item['expected']}")
+            lines.append(f"    actual:   {actual}")
+    else:
+        lines.append("✅ Golden check passed")
+
+    if not args.check_only:
+        texts = [item['text'] for item in corpus]
+        benchmarks = [
+            ('parse_trading_signal', lambda t: trading_bot.parse_trading_signal(t, 'bench')),
+            ('EnhancedSignalParser.parse_signal', lambda t: bot.EnhancedSignalParser.parse_signal(t, 'bench')),
+            ('SignalDetector.parse_signals', bot.SignalDetector.parse_signals),
+        ]
+        lines.append(f"⏱️ Benchmark: {args.rounds} rounds")
+        for name, parse in benchmarks:
+            lines.append(format_result(name, run_benchmark(parse, texts, args.rounds)))
+
+    report = '\n'.join(lines)
+    print(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(report + '\n')
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
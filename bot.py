@@ -16,9 +16,16 @@ import json
 import logging
 import sqlite3
 import uuid
-from typing import Dict, List, Optional, Tuple, Any, Union
-from dataclasses import dataclass
-from datetime import datetime
+import hashlib
+import copy
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from collections import deque
+from typing import Dict, List, Optional, Tuple, Any, Union, Set, FrozenSet
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
 from decimal import Decimal, ROUND_DOWN, ROUND_HALF_UP
 import os
 import sys
@@ -51,9 +58,16 @@ from telegram.ext import (
 )
 
 import ccxt
+import ccxt.async_support as ccxt_async
+try:
+    import ccxt.pro as ccxt_pro
+except ImportError:  # ccxt without the websocket API: prices fall back to REST polling
+    ccxt_pro = None
+import aiohttp
+from aiohttp import web
 
 # Import Telethon
-from telethon import TelegramClient, events
+from telethon import TelegramClient, events, utils as telethon_utils
 from telethon.tl.types import Channel, PeerChannel
 from telethon.errors import ApiIdInvalidError, SessionPasswordNeededError
 
@@ -91,6 +105,110 @@ DEFAULT_BINANCE_API_SECRET = os.getenv('BINGX_API_SECRET', '')
 # Your NEW Make.com Webhook URL
 DEFAULT_WEBHOOK_URL = "https://hook.eu2.make.com/pnfx5xy1q8caxq4qc2yhmnrkmio1ixqj"
 
+# Exchange gateway tuning: hard per-call timeout (seconds) and max in-flight requests per account
+EXCHANGE_CALL_TIMEOUT = float(os.getenv('EXCHANGE_CALL_TIMEOUT', '30'))
+EXCHANGE_MAX_CONCURRENCY = int(os.getenv('EXCHANGE_MAX_CONCURRENCY', '4'))
+
+# Exchange client pool: ping idle clients to keep their HTTPS connections open (0 disables), and
+# close clients of an account's previous trading type after this long unused
+EXCHANGE_KEEPALIVE_SECONDS = float(os.getenv('EXCHANGE_KEEPALIVE_SECONDS', '60'))
+EXCHANGE_IDLE_CLOSE_SECONDS = float(os.getenv('EXCHANGE_IDLE_CLOSE_SECONDS', '3600'))
+# A replaced client (e.g. after an API key change) is closed once it has had no call in flight
+# for this long, so a trade still placing its entry or SL/TP orders on it is not cut off
+EXCHANGE_EVICT_GRACE_SECONDS = float(os.getenv('EXCHANGE_EVICT_GRACE_SECONDS', '10'))
+
+# SQLite tuning: page cache size (KiB), lock wait (ms) and prepared-statement cache per connection
+DB_CACHE_SIZE_KB = int(os.getenv('DB_CACHE_SIZE_KB', '8192'))
+DB_BUSY_TIMEOUT_MS = int(os.getenv('DB_BUSY_TIMEOUT_MS', '5000'))
+DB_STATEMENT_CACHE = int(os.getenv('DB_STATEMENT_CACHE', '128'))
+
+# Protective orders after an entry fill: 'concurrent' (one request per order, in parallel) or
+# 'batch' (a single BingX batch order request, falling back to concurrent on error)
+PROTECTIVE_ORDER_MODE = os.getenv('PROTECTIVE_ORDER_MODE', 'concurrent').strip().lower()
+
+# Signal fan-out: max accounts placing entry orders for the same signal at once
+FANOUT_MAX_CONCURRENCY = int(os.getenv('FANOUT_MAX_CONCURRENCY', '8'))
+
+# Signal pipeline (ingest -> parse -> route -> per-account execute -> notify): workers per stage
+# (execute workers run per account; one keeps an account's trades in signal order, more only run
+# different symbols side by side), bound of each stage queue, and the age after which a queued
+# signal is dropped instead of traded (0 keeps every signal)
+PIPELINE_PARSE_WORKERS = int(os.getenv('PIPELINE_PARSE_WORKERS', '1'))
+PIPELINE_ROUTE_WORKERS = int(os.getenv('PIPELINE_ROUTE_WORKERS', '1'))
+PIPELINE_EXECUTE_WORKERS = int(os.getenv('PIPELINE_EXECUTE_WORKERS', '1'))
+PIPELINE_NOTIFY_WORKERS = int(os.getenv('PIPELINE_NOTIFY_WORKERS', '4'))
+PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', '256'))
+PIPELINE_SIGNAL_MAX_AGE_SECONDS = float(os.getenv('PIPELINE_SIGNAL_MAX_AGE_SECONDS', '60'))
+
+# Telethon ingestion: 'events' (push via NewMessage + catch_up, polling as fallback) or 'polling' (legacy 5s loop)
+TELETHON_INGESTION_MODE = os.getenv('TELETHON_INGESTION_MODE', 'events').strip().lower()
+TELETHON_FALLBACK_POLL_SECONDS = float(os.getenv('TELETHON_FALLBACK_POLL_SECONDS', '60'))
+
+# Startup orchestration ("Start All" / auto-start): accounts brought up at once, minimum gap between
+# Telethon connects (spreads logins and entity lookups to avoid FloodWait) and per-account deadline
+# from taking a slot until its channels are listening
+STARTUP_CONCURRENCY = int(os.getenv('STARTUP_CONCURRENCY', '6'))
+STARTUP_STAGGER_SECONDS = float(os.getenv('STARTUP_STAGGER_SECONDS', '0.5'))
+STARTUP_ACCOUNT_TIMEOUT_SECONDS = float(os.getenv('STARTUP_ACCOUNT_TIMEOUT_SECONDS', '30'))
+
+# Restart catch-up from persisted channel cursors: max messages fetched per channel (0 = skip the
+# missed range like a fresh start) and the age beyond which a missed message is not traded
+CHANNEL_CATCHUP_LIMIT = int(os.getenv('CHANNEL_CATCHUP_LIMIT', '50'))
+CHANNEL_CATCHUP_MAX_AGE_SECONDS = float(os.getenv('CHANNEL_CATCHUP_MAX_AGE_SECONDS', '300'))
+
+# Market metadata: snapshot file (default: next to the database), refresh TTL and the
+# minimum gap between refreshes triggered by an unknown symbol
+MARKET_SNAPSHOT_PATH = os.getenv('MARKET_SNAPSHOT_PATH', '')
+MARKET_METADATA_TTL_SECONDS = float(os.getenv('MARKET_METADATA_TTL_SECONDS', '3600'))
+MARKET_MISS_REFRESH_SECONDS = float(os.getenv('MARKET_MISS_REFRESH_SECONDS', '300'))
+
+# Price service: max age of a cached price on the trade path, how long a symbol stays watched
+# after its last use, REST refresh interval for symbols without a live stream, and streaming on/off
+PRICE_MAX_AGE_SECONDS = float(os.getenv('PRICE_MAX_AGE_SECONDS', '2'))
+PRICE_WATCH_IDLE_SECONDS = float(os.getenv('PRICE_WATCH_IDLE_SECONDS', '900'))
+PRICE_POLL_SECONDS = float(os.getenv('PRICE_POLL_SECONDS', '5'))
+PRICE_STREAMING = os.getenv('PRICE_STREAMING', '1').strip().lower() not in ('0', 'false', 'no', 'off')
+
+# Used when a symbol is not listed (or metadata is unavailable) so the trade can still proceed
+DEFAULT_SYMBOL_PRECISION = {
+    'step_size': 1.0,
+    'min_qty': 1.0,
+    'tick_size': 0.00001,
+    'min_price': 0.00001,
+    'max_price': 1000000.0,
+    'qty_precision': 0,
+    'price_precision': 5
+}
+
+# Make.com webhook delivery: queue bound, payloads per POST (>1 only if the scenario accepts
+# JSON arrays), retry policy, per-request timeout and spool file (default: next to the database)
+WEBHOOK_QUEUE_SIZE = int(os.getenv('WEBHOOK_QUEUE_SIZE', '1000'))
+WEBHOOK_BATCH_SIZE = int(os.getenv('WEBHOOK_BATCH_SIZE', '1'))
+WEBHOOK_MAX_RETRIES = int(os.getenv('WEBHOOK_MAX_RETRIES', '5'))
+WEBHOOK_RETRY_BASE_SECONDS = float(os.getenv('WEBHOOK_RETRY_BASE_SECONDS', '2'))
+WEBHOOK_TIMEOUT = float(os.getenv('WEBHOOK_TIMEOUT', '15'))
+WEBHOOK_SPOOL_PATH = os.getenv('WEBHOOK_SPOOL_PATH', '')
+WEBHOOK_SPOOL_REPLAY_SECONDS = float(os.getenv('WEBHOOK_SPOOL_REPLAY_SECONDS', '300'))
+
+# Cooldown index: how far back trade entries are kept in memory (longest cooldown honoured)
+COOLDOWN_RETENTION_HOURS = float(os.getenv('COOLDOWN_RETENTION_HOURS', '720'))
+
+# Signal dedup: window in which the same signal fingerprint is executed once per account,
+# in-memory LRU size, and how long processed (channel, message id) pairs are remembered
+SIGNAL_DEDUP_WINDOW_SECONDS = float(os.getenv('SIGNAL_DEDUP_WINDOW_SECONDS', '900'))
+SIGNAL_DEDUP_CACHE_SIZE = int(os.getenv('SIGNAL_DEDUP_CACHE_SIZE', '4096'))
+SIGNAL_DEDUP_MESSAGE_RETENTION_HOURS = float(os.getenv('SIGNAL_DEDUP_MESSAGE_RETENTION_HOURS', '72'))
+
+# Pipeline metrics: Prometheus text endpoint (0 disables the listener; histograms are still kept)
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+
+# account_stats row holding an account's totals across all channels
+STATS_ALL_CHANNELS = '*'
+
+# Open-position book persistence: 'sqlite' (survives restarts) or 'memory'
+POSITION_STORE = os.getenv('POSITION_STORE', 'sqlite').strip().lower()
+
 # Logging setup
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -160,7 +278,7 @@ class BotConfig:
                 TakeProfitLevel(5.0, 100.0)
             ]
 
-@dataclass
+@dataclass(slots=True)
 class ActivePosition:
     """Track active positions with their SL/TP orders"""
     symbol: str
@@ -175,6 +293,10 @@ class ActivePosition:
     filled_take_profit_order_ids: List[int] = None
     trailing_order_id: Optional[int] = None
     timestamp: datetime = None
+    # Account whose exchange gateway owns the position (used to batch reconciliation per account)
+    account_id: Optional[str] = None
+    # Gateway of that account; runtime only, re-attached after a restart
+    exchange: Optional[Any] = field(default=None, repr=False, compare=False)
 
     def __post_init__(self):
         if self.take_profit_order_ids is None:
@@ -332,53 +454,65 @@ class ParsedSignal:
             self.timestamp = datetime.now().isoformat()
 
 class MakeWebhookLogger:
-    def __init__(self, webhook_url: str):
+    HEADERS = {
+        'Content-Type': 'application/json',
+        'User-Agent': 'TradingBot/3.1',
+        'X-Bot-Version': '3.1'
+    }
+
+    def __init__(self, webhook_url: str, delivery: Optional['WebhookDeliveryQueue'] = None):
         self.webhook_url = webhook_url
+        self.delivery = delivery
 
-    def send_trade_data(self, trade_data: Dict[str, Any]) -> bool:
-        """Send trade data to Make.com webhook"""
-        try:
-            # Create comprehensive payload
-            payload = {
-                "text": f"Trade executed: {trade_data.get('symbol', '')} {trade_data.get('trade_type', '')} at {trade_data.get('entry_price', '')}",
-                "timestamp": trade_data.get('timestamp', datetime.now().strftime('%Y-%m-%d %H:%M:%S')),
-                "symbol": str(trade_data.get('symbol', '')),
-                "trade_type": str(trade_data.get('trade_type', '')),
-                "entry_price": str(trade_data.get('entry_price', '')),
-                "quantity": str(trade_data.get('quantity', '')),
-                "leverage": str(trade_data.get('leverage', '')),
-                "order_id": str(trade_data.get('order_id', '')),
-                "stop_loss": str(trade_data.get('stop_loss', '')),
-                "take_profit": str(trade_data.get('take_profit', '')),
-                "status": str(trade_data.get('status', '')),
-                "balance_used": str(trade_data.get('balance_used', '')),
-                "channel_id": str(trade_data.get('channel_id', '')),
-                "pnl": str(trade_data.get('pnl', '')),
-                "notes": str(trade_data.get('notes', '')),
-                "order_value": str(trade_data.get('order_value', '')),
-                "sl_order_id": str(trade_data.get('sl_order_id', '')),
-                "tp_order_ids": str(trade_data.get('tp_order_ids', '')),
-                "user_id": str(trade_data.get('user_id', '')),
-                "webhook_version": "3.1",
-                "bot_source": "Telegram Trading Bot",
-                "time": datetime.now().strftime('%H:%M:%S'),
-                "date": datetime.now().strftime('%Y-%m-%d')
-            }
+    @staticmethod
+    def build_trade_payload(trade_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Make.com payload for a trade (empty values removed)"""
+        payload = {
+            "text": f"Trade executed: {trade_data.get('symbol', '')} {trade_data.get('trade_type', '')} at {trade_data.get('entry_price', '')}",
+            "timestamp": trade_data.get('timestamp', datetime.now().strftime('%Y-%m-%d %H:%M:%S')),
+            "symbol": str(trade_data.get('symbol', '')),
+            "trade_type": str(trade_data.get('trade_type', '')),
+            "entry_price": str(trade_data.get('entry_price', '')),
+            "quantity": str(trade_data.get('quantity', '')),
+            "leverage": str(trade_data.get('leverage', '')),
+            "order_id": str(trade_data.get('order_id', '')),
+            "stop_loss": str(trade_data.get('stop_loss', '')),
+            "take_profit": str(trade_data.get('take_profit', '')),
+            "status": str(trade_data.get('status', '')),
+            "balance_used": str(trade_data.get('balance_used', '')),
+            "channel_id": str(trade_data.get('channel_id', '')),
+            "pnl": str(trade_data.get('pnl', '')),
+            "notes": str(trade_data.get('notes', '')),
+            "order_value": str(trade_data.get('order_value', '')),
+            "sl_order_id": str(trade_data.get('sl_order_id', '')),
+            "tp_order_ids": str(trade_data.get('tp_order_ids', '')),
+            "user_id": str(trade_data.get('user_id', '')),
+            "webhook_version": "3.1",
+            "bot_source": "Telegram Trading Bot",
+            "time": datetime.now().strftime('%H:%M:%S'),
+            "date": datetime.now().strftime('%Y-%m-%d')
+        }
 
-            # Remove empty values
-            clean_payload = {k: v for k, v in payload.items() if v and str(v).strip()}
+        # Remove empty values
+        return {k: v for k, v in payload.items() if v and str(v).strip()}
 
-            headers = {
-                'Content-Type': 'application/json',
-                'User-Agent': 'TradingBot/3.1',
-                'X-Bot-Version': '3.1'
-            }
+    def send_trade_data(self, trade_data: Dict[str, Any]) -> bool:
+        """Send trade data to Make.com webhook.
+
+        With a delivery queue attached (and a running event loop) this only enqueues, so the
+        trade path never waits on Make.com; otherwise it falls back to a blocking POST.
+        """
+        try:
+            clean_payload = self.build_trade_payload(trade_data)
+            if self.delivery is not None and self.delivery.enqueue(self.webhook_url, clean_payload):
+                logger.info(f"📤 Trade data queued for Make.com: {trade_data.get('symbol')} {trade_data.get('trade_type')}")
+                return True
 
             response = requests.post(
                 self.webhook_url,
                 json=clean_payload,
-                headers=headers,
-                timeout=15
+                headers=self.HEADERS,
+                timeout=WEBHOOK_TIMEOUT
             )
 
             if response.status_code == 200:
@@ -485,6 +619,369 @@ class MakeWebhookLogger:
                 'test_data': test_data if 'test_data' in locals() else {}
             }
 
+# ================== WEBHOOK DELIVERY QUEUE ==================
+
+class WebhookDeliveryQueue:
+    """Background Make.com delivery so webhook latency never reaches the trade path.
+
+    Payloads go into a bounded asyncio queue drained by one worker over a pooled keep-alive
+    aiohttp session (optionally several payloads per POST as a JSON array). Failed posts are
+    retried with exponential backoff; payloads that exhaust their retries, overflow the queue
+    or are still pending at shutdown are appended to a JSONL spool file, which is replayed on
+    startup and every WEBHOOK_SPOOL_REPLAY_SECONDS.
+    """
+
+    def __init__(self, spool_path: str, max_size: int = WEBHOOK_QUEUE_SIZE, batch_size: int = WEBHOOK_BATCH_SIZE,
+                 max_retries: int = WEBHOOK_MAX_RETRIES, retry_base: float = WEBHOOK_RETRY_BASE_SECONDS,
+                 timeout: float = WEBHOOK_TIMEOUT, replay_interval: float = WEBHOOK_SPOOL_REPLAY_SECONDS):
+        self.spool_path = spool_path
+        self.max_size = max(1, max_size)
+        self.batch_size = max(1, batch_size)
+        self.max_retries = max(0, max_retries)
+        self.retry_base = retry_base
+        self.timeout = timeout
+        self.replay_interval = replay_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._replayer: Optional[asyncio.Task] = None
+        self._retry_tasks: set = set()
+        self._spool_lock = threading.Lock()
+        self.delivered = 0
+        self.retried = 0
+        self.spooled = 0
+
+    def start(self):
+        """Start the worker and spool replayer (raises RuntimeError outside a running loop)"""
+        loop = asyncio.get_running_loop()
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_size)
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._run())
+        if self._replayer is None or self._replayer.done():
+            self._replayer = loop.create_task(self._replay_loop())
+
+    def enqueue(self, url: str, payload: Any, attempts: int = 0) -> bool:
+        """Hand a payload to the worker; False only when no event loop is running (caller posts inline)"""
+        try:
+            self.start()
+        except RuntimeError:
+            return False
+        try:
+            self._queue.put_nowait((url, payload, attempts))
+        except asyncio.QueueFull:
+            logger.warning("⚠️ Webhook queue full, spooling payload to disk")
+            self._spool([(url, payload)])
+        return True
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(limit=8, keepalive_timeout=60)
+            )
+        return self._session
+
+    async def _post(self, url: str, body: Any) -> Tuple[bool, str]:
+        try:
+            session = await self._get_session()
+            async with session.post(url, json=body, headers=MakeWebhookLogger.HEADERS) as response:
+                if 200 <= response.status < 300:
+                    return True, ""
+                text = await response.text()
+                return False, f"status {response.status}: {text[:200]}"
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            return False, f"timeout after {self.timeout:g}s"
+        except Exception as e:
+            return False, str(e) or type(e).__name__
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            by_url: Dict[str, List[Tuple[str, Any, int]]] = {}
+            for job in batch:
+                by_url.setdefault(job[0], []).append(job)
+            try:
+                for url, jobs in by_url.items():
+                    await self._deliver(url, jobs)
+            except asyncio.CancelledError:
+                # Shutting down mid-post: keep the payloads (at-least-once delivery)
+                self._spool([(url, payload) for url, payload, _ in batch])
+                raise
+            except Exception as e:
+                logger.error(f"❌ Webhook worker error: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _deliver(self, url: str, jobs: List[Tuple[str, Any, int]]):
+        body = jobs[0][1] if len(jobs) == 1 else [payload for _, payload, _ in jobs]
+        ok, detail = await self._post(url, body)
+        if ok:
+            self.delivered += len(jobs)
+            logger.info(f"✅ Trade data sent to Make.com ({len(jobs)} payload{'s' if len(jobs) > 1 else ''})")
+            return
+        for _, payload, attempts in jobs:
+            if attempts >= self.max_retries:
+                logger.error(f"❌ Make.com webhook failed after {attempts + 1} attempts ({detail}), spooling to disk")
+                self._spool([(url, payload)])
+                continue
+            delay = min(self.retry_base * (2 ** attempts), 300.0)
+            logger.warning(f"⚠️ Make.com webhook error ({detail}), retry {attempts + 1}/{self.max_retries} in {delay:g}s")
+            self.retried += 1
+            task = asyncio.get_running_loop().create_task(self._retry_later(url, payload, attempts + 1, delay))
+            self._retry_tasks.add(task)
+            task.add_done_callback(self._retry_tasks.discard)
+
+    async def _retry_later(self, url: str, payload: Any, attempts: int, delay: float):
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self._spool([(url, payload)])
+            raise
+        self.enqueue(url, payload, attempts)
+
+    def _spool(self, items: List[Tuple[str, Any]]):
+        """Append payloads to the spool file (JSON lines)"""
+        if not items:
+            return
+        try:
+            with self._spool_lock, open(self.spool_path, 'a', encoding='utf-8') as f:
+                for url, payload in items:
+                    f.write(json.dumps({'url': url, 'payload': payload, 'spooled_at': datetime.now().isoformat()}) + '\n')
+            self.spooled += len(items)
+        except Exception as e:
+            logger.error(f"❌ Failed to spool {len(items)} webhook payload(s): {e}")
+
+    def _take_spool(self) -> List[Tuple[str, Any]]:
+        """Claim the spool file's contents (a leftover .replay file from a crash is consumed first)"""
+        replay_path = f"{self.spool_path}.replay"
+        with self._spool_lock:
+            if os.path.exists(self.spool_path) and not os.path.exists(replay_path):
+                os.replace(self.spool_path, replay_path)
+        if not os.path.exists(replay_path):
+            return []
+        items = []
+        with open(replay_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                    items.append((entry['url'], entry['payload']))
+                except Exception as e:
+                    logger.warning(f"⚠️ Skipping unreadable spooled webhook entry: {e}")
+        os.remove(replay_path)
+        return items
+
+    async def _replay_loop(self):
+        while True:
+            try:
+                items = await asyncio.to_thread(self._take_spool)
+                if items:
+                    logger.info(f"📤 Replaying {len(items)} spooled webhook payload(s)")
+                for url, payload in items:
+                    self.enqueue(url, payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Webhook spool replay error: {e}")
+            await asyncio.sleep(self.replay_interval)
+
+    async def close(self, drain_timeout: float = 5.0):
+        """Give queued payloads a moment to go out, then spool the rest and close the session"""
+        if self._queue is not None and self._worker is not None and not self._worker.done():
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=drain_timeout)
+            except asyncio.TimeoutError:
+                pass
+        tasks = [t for t in (self._replayer, self._worker, *self._retry_tasks) if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._worker = self._replayer = None
+        pending = []
+        while self._queue is not None and not self._queue.empty():
+            url, payload, _ = self._queue.get_nowait()
+            pending.append((url, payload))
+        self._spool(pending)
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+# ================== DATABASE CONNECTION MANAGER ==================
+
+class DatabaseConnectionManager:
+    """Persistent SQLite connections shared by the whole EnhancedDatabase.
+
+    The database runs in WAL mode so readers never wait on the writer. All writes go
+    through one long-lived connection guarded by a lock (a single serialized writer),
+    while each thread gets its own long-lived read connection. Both keep a prepared
+    statement cache, so hot queries are parsed once instead of on every call.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._write_lock = threading.RLock()
+        self._local = threading.local()
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._writer = self._connect()
+        try:
+            mode = self._writer.execute('PRAGMA journal_mode=WAL').fetchone()
+            logger.info(f"🗄️ SQLite journal mode: {mode[0] if mode else 'unknown'}")
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Could not enable WAL mode: {e}")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=DB_BUSY_TIMEOUT_MS / 1000.0,
+            check_same_thread=False,
+            cached_statements=DB_STATEMENT_CACHE
+        )
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA cache_size=-{max(0, DB_CACHE_SIZE_KB)}')
+        conn.execute(f'PRAGMA busy_timeout={max(0, DB_BUSY_TIMEOUT_MS)}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        return conn
+
+    @contextmanager
+    def write(self):
+        """Serialized write transaction: commits on success, rolls back on any error"""
+        with self._write_lock:
+            cursor = self._writer.cursor()
+            try:
+                yield cursor
+                self._writer.commit()
+            except Exception:
+                self._writer.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    @contextmanager
+    def read(self):
+        """Cursor on this thread's read connection (sees the latest committed data)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        cursor = conn.cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+
+    def close(self):
+        """Checkpoint and close every connection (call on shutdown)"""
+        with self._readers_lock:
+            for conn in self._readers:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._readers.clear()
+        self._local = threading.local()
+        with self._write_lock:
+            try:
+                self._writer.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+                self._writer.close()
+            except sqlite3.Error as e:
+                logger.debug(f"Database close error: {e}")
+
+# ================== COOLDOWN INDEX ==================
+
+class CooldownIndex:
+    """Last entry time per (account, symbol) and per (account, symbol, channel).
+
+    Hydrated once from trade_history and written through by save_trade_history, so a
+    cooldown check is a dict lookup instead of a query plus timestamp parsing.
+    Entries older than the retention window are pruned at most once an hour on record().
+    """
+
+    def __init__(self, retention_hours: float = COOLDOWN_RETENTION_HOURS):
+        self.retention_seconds = max(0.0, float(retention_hours)) * 3600
+        self._by_symbol: Dict[Tuple[str, str], float] = {}
+        self._by_channel: Dict[Tuple[str, str, str], float] = {}
+        self._lock = threading.Lock()
+        self._next_prune = time.time() + 3600
+
+    @staticmethod
+    def _timestamp(entry_time: Any) -> Optional[float]:
+        if isinstance(entry_time, (int, float)):
+            return float(entry_time)
+        if isinstance(entry_time, datetime):
+            return entry_time.timestamp()
+        try:
+            return datetime.fromisoformat(str(entry_time)).timestamp()
+        except (TypeError, ValueError):
+            return None
+
+    def hydrate(self, rows) -> int:
+        """Load (account_id, symbol, channel_id, entry_time) rows; returns entries kept"""
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            self._by_symbol.clear()
+            self._by_channel.clear()
+        for account_id, symbol, channel_id, entry_time in rows:
+            ts = self._timestamp(entry_time)
+            if ts is not None and ts >= cutoff:
+                self.record(account_id, symbol, ts, channel_id)
+        return len(self._by_symbol)
+
+    def record(self, account_id: str, symbol: str, entry_time: Any = None, channel_id: Optional[str] = None):
+        """Note an entry at entry_time (default: now); older times never move the index back"""
+        ts = time.time() if entry_time is None else self._timestamp(entry_time)
+        if ts is None or not account_id or not symbol:
+            return
+        with self._lock:
+            key = (account_id, symbol)
+            if ts > self._by_symbol.get(key, 0.0):
+                self._by_symbol[key] = ts
+            if channel_id:
+                channel_key = (account_id, symbol, str(channel_id))
+                if ts > self._by_channel.get(channel_key, 0.0):
+                    self._by_channel[channel_key] = ts
+        if time.time() >= self._next_prune:
+            self.prune()
+
+    def last_entry(self, account_id: str, symbol: str, channel_id: Optional[str] = None) -> Optional[float]:
+        if channel_id:
+            return self._by_channel.get((account_id, symbol, str(channel_id)))
+        return self._by_symbol.get((account_id, symbol))
+
+    def remaining(self, account_id: str, symbol: str, cooldown_hours: float,
+                  channel_id: Optional[str] = None, now: Optional[float] = None) -> float:
+        """Seconds left in the cooldown (0.0 when the symbol can be traded)"""
+        last = self.last_entry(account_id, symbol, channel_id)
+        if last is None:
+            return 0.0
+        now = time.time() if now is None else now
+        return max(0.0, last + float(cooldown_hours) * 3600 - now)
+
+    def prune(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        cutoff = now - self.retention_seconds
+        with self._lock:
+            self._next_prune = now + 3600
+            stale = [k for k, ts in self._by_symbol.items() if ts < cutoff]
+            for k in stale:
+                del self._by_symbol[k]
+            for k in [k for k, ts in self._by_channel.items() if ts < cutoff]:
+                del self._by_channel[k]
+        return len(stale)
+
+    def __len__(self):
+        return len(self._by_symbol)
+
 # ================== ENHANCED DATABASE CLASS ==================
 
 class EnhancedDatabase:
@@ -538,311 +1035,572 @@ class EnhancedDatabase:
 
         self.db_path = db_path
         logger.info(f"🗄️ Using database at: {self.db_path}")
+        self.connections = DatabaseConnectionManager(self.db_path)
+        # In-memory account registry: loaded once, kept current by the account writers below
+        self._accounts: Dict[str, AccountConfig] = {}
+        self._accounts_by_user: Dict[int, List[str]] = {}
+        self._accounts_by_channel: Dict[int, Set[str]] = {}  # channel id -> subscribed account ids
+        self._account_channel_keys: Dict[str, FrozenSet[int]] = {}  # account id -> channel ids it is indexed under
+        self._accounts_lock = threading.RLock()
+        self._accounts_loaded = False
+        self.cooldowns = CooldownIndex()
         self.init_database()
+        self.load_cooldowns()
     
     def init_database(self):
         """Initialize database with enhanced schema"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Accounts table with enhanced fields
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS accounts (
-                    account_id TEXT PRIMARY KEY,
-                    account_name TEXT NOT NULL,
-                    bingx_api_key TEXT NOT NULL,
-                    bingx_secret_key TEXT NOT NULL,
-                    telegram_api_id TEXT NOT NULL,
-                    telegram_api_hash TEXT NOT NULL,
-                    phone TEXT NOT NULL,
-                    user_id INTEGER DEFAULT 0,
-                    is_active BOOLEAN DEFAULT TRUE,
-                    created_at TEXT NOT NULL,
-                    last_used TEXT NOT NULL,
-                    leverage INTEGER DEFAULT 10,
-                    risk_percentage REAL DEFAULT 2.0,
-                    default_symbol TEXT DEFAULT 'BTC-USDT',
-                    auto_trade_enabled BOOLEAN DEFAULT FALSE,
-                    use_percentage_balance BOOLEAN DEFAULT TRUE,
-                    balance_percentage REAL DEFAULT 2.0,
-                    fixed_usdt_amount REAL DEFAULT 100.0,
-                    take_profit_levels TEXT DEFAULT '[]',
-                    stop_loss_levels TEXT DEFAULT '[]',
-                    monitored_channels TEXT DEFAULT '[]',
-                    signal_channels TEXT DEFAULT '[]',
-                    use_signal_settings BOOLEAN DEFAULT FALSE,
-                    create_sl_tp BOOLEAN DEFAULT TRUE,
-                    make_webhook_enabled BOOLEAN DEFAULT FALSE,
-                    trailing_enabled BOOLEAN DEFAULT FALSE,
-                    trailing_activation_percent REAL DEFAULT 2.0,
-                    trailing_callback_percent REAL DEFAULT 0.5,
-                    cooldown_enabled BOOLEAN DEFAULT FALSE,
-                    cooldown_hours INTEGER DEFAULT 24,
-                    trading_type TEXT DEFAULT 'swap'
-                )
-            ''')
-            
-            # Add new columns if they don't exist (for existing databases)
-            try:
-                cursor.execute("ALTER TABLE accounts ADD COLUMN user_id INTEGER DEFAULT 0")
-            except:
-                pass
-            try:
-                cursor.execute("ALTER TABLE accounts ADD COLUMN use_signal_settings BOOLEAN DEFAULT FALSE")
-            except:
-                pass
-            try:
-                cursor.execute("ALTER TABLE accounts ADD COLUMN cooldown_enabled BOOLEAN DEFAULT FALSE")
-            except:
-                pass
-            try:
-                cursor.execute("ALTER TABLE accounts ADD COLUMN cooldown_hours INTEGER DEFAULT 24")
-            except:
-                pass
-            try:
-                cursor.execute("ALTER TABLE accounts ADD COLUMN create_sl_tp BOOLEAN DEFAULT TRUE")
-            except:
-                pass
-            try:
-                cursor.execute("ALTER TABLE accounts ADD COLUMN make_webhook_enabled BOOLEAN DEFAULT FALSE")
-            except:
-                pass
-            try:
-                cursor.execute("ALTER TABLE accounts ADD COLUMN trailing_enabled BOOLEAN DEFAULT FALSE")
-            except:
-                pass
-            try:
-                cursor.execute("ALTER TABLE accounts ADD COLUMN trailing_activation_percent REAL DEFAULT 2.0")
-            except:
-                pass
-            try:
-                cursor.execute("ALTER TABLE accounts ADD COLUMN trailing_callback_percent REAL DEFAULT 0.5")
-            except:
-                pass
-            try:
-                cursor.execute("ALTER TABLE accounts ADD COLUMN trading_type TEXT DEFAULT 'swap'")
-            except:
-                pass
+            with self.connections.write() as cursor:
+                # Accounts table with enhanced fields
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS accounts (
+                        account_id TEXT PRIMARY KEY,
+                        account_name TEXT NOT NULL,
+                        bingx_api_key TEXT NOT NULL,
+                        bingx_secret_key TEXT NOT NULL,
+                        telegram_api_id TEXT NOT NULL,
+                        telegram_api_hash TEXT NOT NULL,
+                        phone TEXT NOT NULL,
+                        user_id INTEGER DEFAULT 0,
+                        is_active BOOLEAN DEFAULT TRUE,
+                        created_at TEXT NOT NULL,
+                        last_used TEXT NOT NULL,
+                        leverage INTEGER DEFAULT 10,
+                        risk_percentage REAL DEFAULT 2.0,
+                        default_symbol TEXT DEFAULT 'BTC-USDT',
+                        auto_trade_enabled BOOLEAN DEFAULT FALSE,
+                        use_percentage_balance BOOLEAN DEFAULT TRUE,
+                        balance_percentage REAL DEFAULT 2.0,
+                        fixed_usdt_amount REAL DEFAULT 100.0,
+                        take_profit_levels TEXT DEFAULT '[]',
+                        stop_loss_levels TEXT DEFAULT '[]',
+                        monitored_channels TEXT DEFAULT '[]',
+                        signal_channels TEXT DEFAULT '[]',
+                        use_signal_settings BOOLEAN DEFAULT FALSE,
+                        create_sl_tp BOOLEAN DEFAULT TRUE,
+                        make_webhook_enabled BOOLEAN DEFAULT FALSE,
+                        trailing_enabled BOOLEAN DEFAULT FALSE,
+                        trailing_activation_percent REAL DEFAULT 2.0,
+                        trailing_callback_percent REAL DEFAULT 0.5,
+                        cooldown_enabled BOOLEAN DEFAULT FALSE,
+                        cooldown_hours INTEGER DEFAULT 24,
+                        trading_type TEXT DEFAULT 'swap'
+                    )
+                ''')
             
-            # Trade history table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS trade_history (
-                    trade_id TEXT PRIMARY KEY,
-                    account_id TEXT NOT NULL,
-                    symbol TEXT NOT NULL,
-                    side TEXT NOT NULL,
-                    entry_price REAL NOT NULL,
-                    quantity REAL NOT NULL,
-                    leverage INTEGER NOT NULL,
-                    status TEXT NOT NULL,
-                    pnl REAL DEFAULT 0.0,
-                    entry_time TEXT NOT NULL,
-                    exit_time TEXT,
-                    stop_loss_price REAL,
-                    take_profit_prices TEXT DEFAULT '[]',
-                    channel_id TEXT DEFAULT '',
-                    FOREIGN KEY (account_id) REFERENCES accounts (account_id)
-                )
-            ''')
+                # Trade history table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS trade_history (
+                        trade_id TEXT PRIMARY KEY,
+                        account_id TEXT NOT NULL,
+                        symbol TEXT NOT NULL,
+                        side TEXT NOT NULL,
+                        entry_price REAL NOT NULL,
+                        quantity REAL NOT NULL,
+                        leverage INTEGER NOT NULL,
+                        status TEXT NOT NULL,
+                        pnl REAL DEFAULT 0.0,
+                        entry_time TEXT NOT NULL,
+                        exit_time TEXT,
+                        stop_loss_price REAL,
+                        take_profit_prices TEXT DEFAULT '[]',
+                        channel_id TEXT DEFAULT '',
+                        FOREIGN KEY (account_id) REFERENCES accounts (account_id)
+                    )
+                ''')
             
-            # Channels table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS channels (
-                    channel_id INTEGER PRIMARY KEY,
-                    channel_name TEXT NOT NULL,
-                    channel_username TEXT DEFAULT '',
-                    is_active BOOLEAN DEFAULT TRUE,
-                    account_ids TEXT DEFAULT '[]',
-                    signal_filters TEXT DEFAULT '{}'
-                )
-            ''')
+                # Channels table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS channels (
+                        channel_id INTEGER PRIMARY KEY,
+                        channel_name TEXT NOT NULL,
+                        channel_username TEXT DEFAULT '',
+                        is_active BOOLEAN DEFAULT TRUE,
+                        account_ids TEXT DEFAULT '[]',
+                        signal_filters TEXT DEFAULT '{}'
+                    )
+                ''')
             
-            # Parsed signals table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS parsed_signals (
-                    signal_id TEXT PRIMARY KEY,
-                    channel_id INTEGER NOT NULL,
-                    account_id TEXT NOT NULL,
-                    raw_text TEXT NOT NULL,
-                    symbol TEXT NOT NULL,
-                    side TEXT NOT NULL,
-                    entry_price REAL,
-                    stop_loss REAL,
-                    take_profit TEXT DEFAULT '[]',
-                    leverage INTEGER,
-                    risk_percentage REAL,
-                    timestamp TEXT NOT NULL,
-                    processed BOOLEAN DEFAULT FALSE,
-                    trade_executed BOOLEAN DEFAULT FALSE,
-                    trade_id TEXT,
-                    confidence REAL DEFAULT 0.0,
-                    FOREIGN KEY (account_id) REFERENCES accounts (account_id),
-                    FOREIGN KEY (channel_id) REFERENCES channels (channel_id)
-                )
-            ''')
+                # Parsed signals table
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS parsed_signals (
+                        signal_id TEXT PRIMARY KEY,
+                        channel_id INTEGER NOT NULL,
+                        account_id TEXT NOT NULL,
+                        raw_text TEXT NOT NULL,
+                        symbol TEXT NOT NULL,
+                        side TEXT NOT NULL,
+                        entry_price REAL,
+                        stop_loss REAL,
+                        take_profit TEXT DEFAULT '[]',
+                        leverage INTEGER,
+                        risk_percentage REAL,
+                        timestamp TEXT NOT NULL,
+                        processed BOOLEAN DEFAULT FALSE,
+                        trade_executed BOOLEAN DEFAULT FALSE,
+                        trade_id TEXT,
+                        confidence REAL DEFAULT 0.0,
+                        FOREIGN KEY (account_id) REFERENCES accounts (account_id),
+                        FOREIGN KEY (channel_id) REFERENCES channels (channel_id)
+                    )
+                ''')
             
-            # Application-wide settings table (for editable defaults)
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS app_settings (
-                    key TEXT PRIMARY KEY,
-                    value TEXT NOT NULL
-                )
-            ''')
+                # Application-wide settings table (for editable defaults)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS app_settings (
+                        key TEXT PRIMARY KEY,
+                        value TEXT NOT NULL
+                    )
+                ''')
 
-            # Account-channel relationships
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS account_channels (
-                    account_id TEXT,
-                    channel_id INTEGER,
-                    is_active BOOLEAN DEFAULT TRUE,
-                    created_at TEXT NOT NULL,
-                    PRIMARY KEY (account_id, channel_id),
-                    FOREIGN KEY (account_id) REFERENCES accounts (account_id),
-                    FOREIGN KEY (channel_id) REFERENCES channels (channel_id)
-                )
-            ''')
-            
-            conn.commit()
-            conn.close()
+                # Account-channel relationships
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS account_channels (
+                        account_id TEXT,
+                        channel_id INTEGER,
+                        is_active BOOLEAN DEFAULT TRUE,
+                        created_at TEXT NOT NULL,
+                        PRIMARY KEY (account_id, channel_id),
+                        FOREIGN KEY (account_id) REFERENCES accounts (account_id),
+                        FOREIGN KEY (channel_id) REFERENCES channels (channel_id)
+                    )
+                ''')
+
+                # Running PnL/win-rate aggregates per account and channel ('*' = all channels),
+                # maintained by the trade_history writers in the same transaction
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS account_stats (
+                        account_id TEXT NOT NULL,
+                        channel_id TEXT NOT NULL,
+                        closed_trades INTEGER DEFAULT 0,
+                        wins INTEGER DEFAULT 0,
+                        losses INTEGER DEFAULT 0,
+                        gross_profit REAL DEFAULT 0.0,
+                        gross_loss REAL DEFAULT 0.0,
+                        net_pnl REAL DEFAULT 0.0,
+                        peak_pnl REAL DEFAULT 0.0,
+                        max_drawdown REAL DEFAULT 0.0,
+                        updated_at TEXT,
+                        PRIMARY KEY (account_id, channel_id)
+                    )
+                ''')
+                cursor.execute('SELECT COUNT(*) FROM account_stats')
+                if cursor.fetchone()[0] == 0:
+                    self._rebuild_account_stats(cursor)
+
+                # Open positions tracked by the order monitor (PositionBook persistence)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS active_positions (
+                        account_id TEXT NOT NULL,
+                        symbol TEXT NOT NULL,
+                        user_id INTEGER,
+                        side TEXT,
+                        quantity REAL,
+                        entry_price REAL,
+                        trade_id TEXT,
+                        stop_loss_order_id TEXT,
+                        take_profit_order_ids TEXT,
+                        filled_take_profit_order_ids TEXT,
+                        trailing_order_id TEXT,
+                        timestamp TEXT,
+                        PRIMARY KEY (account_id, symbol)
+                    )
+                ''')
+
+                self._run_migrations(cursor)
             logger.info("✅ Enhanced database schema initialized")
+            slow_queries = self.verify_query_plans()
+            if slow_queries:
+                logger.warning(f"⚠️ Hot queries without an index: {', '.join(slow_queries)}")
             
         except Exception as e:
             logger.error(f"❌ Database initialization failed: {e}")
             raise
     
+    # Versioned schema changes, applied in order on top of the CREATE TABLE baseline above.
+    # PRAGMA user_version records the last one applied; never edit a shipped step, add a new one.
+    SCHEMA_MIGRATIONS = (
+        (1, '_migrate_account_columns'),
+        (2, '_migrate_hot_path_indexes'),
+        (3, '_migrate_signal_dedup_tables'),
+        (4, '_migrate_channel_cursors'),
+        (5, '_migrate_account_channels'),
+    )
+
+    # Queries on the trade and signal paths; verify_query_plans() checks none of them scans its table
+    HOT_QUERIES = (
+        ('get_trade_history', "SELECT * FROM trade_history WHERE account_id = ? ORDER BY entry_time DESC LIMIT ?", ('a', 50)),
+        ('get_trade_history(closed)', "SELECT * FROM trade_history WHERE account_id = ? AND status != 'OPEN' ORDER BY entry_time DESC LIMIT ?", ('a', 50)),
+        ('get_active_trades', "SELECT * FROM trade_history WHERE account_id = ? AND status = 'OPEN' ORDER BY entry_time DESC", ('a',)),
+        ('update_trade_status', "SELECT account_id, channel_id, status, pnl, exit_time FROM trade_history WHERE trade_id = ?", ('t',)),
+        ('get_account_channels', "SELECT channel_id FROM account_channels WHERE account_id = ? AND is_active = TRUE", ('a',)),
+        ('channel_accounts', "SELECT account_id FROM account_channels WHERE channel_id = ? AND is_active = TRUE", (1,)),
+        ('get_account_stats', "SELECT closed_trades FROM account_stats WHERE account_id = ? AND channel_id = ?", ('a', '*')),
+        ('claim_signal_fingerprint', "SELECT created_at FROM signal_fingerprints WHERE account_id = ? AND fingerprint = ?", ('a', 'f')),
+        ('get_channel_cursors', "SELECT channel_id, last_message_id FROM channel_cursors WHERE account_id = ?", ('a',)),
+    )
+
+    def _run_migrations(self, cursor):
+        """Apply pending SCHEMA_MIGRATIONS inside the caller's transaction"""
+        cursor.execute('PRAGMA user_version')
+        current = cursor.fetchone()[0]
+        for version, method_name in self.SCHEMA_MIGRATIONS:
+            if version <= current:
+                continue
+            getattr(self, method_name)(cursor)
+            cursor.execute(f'PRAGMA user_version = {int(version)}')
+            logger.info(f"🗄️ Applied schema migration {version}: {method_name.lstrip('_')}")
+
+    @staticmethod
+    def _add_column(cursor, table: str, column: str, definition: str):
+        cursor.execute(f'PRAGMA table_info({table})')
+        if column not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+    def _migrate_account_columns(self, cursor):
+        """Account columns added after the first release (databases created before them)"""
+        for column, definition in (
+            ('user_id', 'INTEGER DEFAULT 0'),
+            ('use_signal_settings', 'BOOLEAN DEFAULT FALSE'),
+            ('cooldown_enabled', 'BOOLEAN DEFAULT FALSE'),
+            ('cooldown_hours', 'INTEGER DEFAULT 24'),
+            ('create_sl_tp', 'BOOLEAN DEFAULT TRUE'),
+            ('make_webhook_enabled', 'BOOLEAN DEFAULT FALSE'),
+            ('trailing_enabled', 'BOOLEAN DEFAULT FALSE'),
+            ('trailing_activation_percent', 'REAL DEFAULT 2.0'),
+            ('trailing_callback_percent', 'REAL DEFAULT 0.5'),
+            ('trading_type', "TEXT DEFAULT 'swap'"),
+        ):
+            self._add_column(cursor, 'accounts', column, definition)
+
+    def _migrate_hot_path_indexes(self, cursor):
+        """Indexes for trade history lookups by account (+status/+symbol) ordered by entry time"""
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_trade_history_account_time ON trade_history (account_id, entry_time)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_trade_history_account_status_time ON trade_history (account_id, status, entry_time)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_trade_history_account_symbol_time ON trade_history (account_id, symbol, entry_time)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_account_channels_channel ON account_channels (channel_id, account_id)')
+        cursor.execute('ANALYZE')
+
+    def _migrate_signal_dedup_tables(self, cursor):
+        """Processed message ids and per-account signal fingerprints (SignalDeduplicator persistence)"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS processed_messages (
+                channel_id TEXT NOT NULL,
+                message_id INTEGER NOT NULL,
+                seen_at REAL NOT NULL,
+                PRIMARY KEY (channel_id, message_id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS signal_fingerprints (
+                account_id TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                channel_id TEXT,
+                message_id INTEGER,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (account_id, fingerprint)
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_processed_messages_seen ON processed_messages (seen_at)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_signal_fingerprints_created ON signal_fingerprints (created_at)')
+
+    def _migrate_channel_cursors(self, cursor):
+        """Last ingested message id per account and channel, for catch-up after a restart"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS channel_cursors (
+                account_id TEXT NOT NULL,
+                channel_id TEXT NOT NULL,
+                last_message_id INTEGER NOT NULL,
+                updated_at TEXT,
+                PRIMARY KEY (account_id, channel_id)
+            )
+        ''')
+
+    def _migrate_account_channels(self, cursor):
+        """Backfill account_channels from the monitored_channels JSON of every account"""
+        cursor.execute('SELECT account_id, monitored_channels FROM accounts')
+        for account_id, payload in cursor.fetchall():
+            try:
+                channels = json.loads(payload) if payload else []
+            except (TypeError, ValueError):
+                continue
+            self._sync_account_channels(cursor, account_id, channels)
+
+    @staticmethod
+    def channel_key(channel_id: Union[str, int, None]) -> Optional[int]:
+        """Integer channel id used by account_channels and the channel index (None if not numeric)"""
+        try:
+            return int(str(channel_id))
+        except (TypeError, ValueError):
+            return None
+
+    def _sync_account_channels(self, cursor, account_id: str, channels: List[Union[str, int]]):
+        """Replace an account's account_channels rows with the given channel list"""
+        keys = {k for k in (self.channel_key(c) for c in channels or []) if k is not None}
+        cursor.execute('DELETE FROM account_channels WHERE account_id = ?', (account_id,))
+        now = datetime.now().isoformat()
+        cursor.executemany('''
+            INSERT INTO account_channels (account_id, channel_id, is_active, created_at) VALUES (?, ?, TRUE, ?)
+        ''', [(account_id, key, now) for key in sorted(keys)])
+
+    def verify_query_plans(self) -> List[str]:
+        """Names of HOT_QUERIES whose EXPLAIN QUERY PLAN contains a full table scan"""
+        offenders = []
+        try:
+            with self.connections.read() as cursor:
+                for name, sql, params in self.HOT_QUERIES:
+                    cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+                    details = [str(row[-1]) for row in cursor.fetchall()]
+                    if any(detail.startswith('SCAN ') for detail in details):
+                        offenders.append(name)
+                        logger.debug(f"Query plan for {name}: {details}")
+        except Exception as e:
+            logger.error(f"❌ Failed to verify query plans: {e}")
+        return offenders
+
+    def load_cooldowns(self) -> int:
+        """Hydrate the cooldown index with the latest entry per account/symbol/channel"""
+        try:
+            cutoff = datetime.fromtimestamp(time.time() - self.cooldowns.retention_seconds).isoformat()
+            with self.connections.read() as cursor:
+                cursor.execute('''
+                    SELECT account_id, symbol, channel_id, MAX(entry_time) FROM trade_history
+                    WHERE entry_time >= ?
+                    GROUP BY account_id, symbol, channel_id
+                ''', (cutoff,))
+                rows = cursor.fetchall()
+            count = self.cooldowns.hydrate(rows)
+            logger.info(f"⏳ Cooldown index loaded: {count} account/symbol entries")
+            return count
+        except Exception as e:
+            logger.error(f"❌ Failed to load cooldown index: {e}")
+            return 0
+
     def create_account(self, account: AccountConfig) -> bool:
         """Create a new trading account"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
-            # Ensure timestamps are set
-            if not account.created_at:
-                account.created_at = datetime.now().isoformat()
-            if not account.last_used:
-                account.last_used = datetime.now().isoformat()
+            with self.connections.write() as cursor:
+                # Ensure timestamps are set
+                if not account.created_at:
+                    account.created_at = datetime.now().isoformat()
+                if not account.last_used:
+                    account.last_used = datetime.now().isoformat()
 
-            cursor.execute('''
-                INSERT OR REPLACE INTO accounts (
-                    account_id, account_name, bingx_api_key, bingx_secret_key,
-                    telegram_api_id, telegram_api_hash, phone, user_id, is_active,
-                    created_at, last_used, leverage, risk_percentage,
-                    default_symbol, auto_trade_enabled, use_percentage_balance,
-                    balance_percentage, fixed_usdt_amount,
-                    take_profit_levels, stop_loss_levels,
-                    monitored_channels, signal_channels,
-                    use_signal_settings, create_sl_tp, make_webhook_enabled,
-                    trailing_enabled, trailing_activation_percent, trailing_callback_percent,
-                    cooldown_enabled, cooldown_hours, trading_type
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                account.account_id, account.account_name, account.bingx_api_key,
-                account.bingx_secret_key, account.telegram_api_id, account.telegram_api_hash,
-                account.phone, account.user_id, account.is_active, account.created_at, account.last_used,
-                account.leverage, account.risk_percentage, account.default_symbol,
-                account.auto_trade_enabled, account.use_percentage_balance,
-                account.balance_percentage, account.fixed_usdt_amount,
-                json.dumps([{'percentage': tp.percentage, 'close_percentage': tp.close_percentage} 
-                           for tp in account.take_profit_levels]),
-                json.dumps([{'percentage': sl.percentage, 'close_percentage': sl.close_percentage} 
-                           for sl in account.stop_loss_levels]),
-                json.dumps(account.monitored_channels),
-                json.dumps(account.signal_channels),
-                account.use_signal_settings, account.create_sl_tp, account.make_webhook_enabled,
-                account.trailing_enabled, account.trailing_activation_percent, account.trailing_callback_percent,
-                account.cooldown_enabled, account.cooldown_hours, account.trading_type
-            ))
-
-            conn.commit()
-            conn.close()
+                cursor.execute('''
+                    INSERT OR REPLACE INTO accounts (
+                        account_id, account_name, bingx_api_key, bingx_secret_key,
+                        telegram_api_id, telegram_api_hash, phone, user_id, is_active,
+                        created_at, last_used, leverage, risk_percentage,
+                        default_symbol, auto_trade_enabled, use_percentage_balance,
+                        balance_percentage, fixed_usdt_amount,
+                        take_profit_levels, stop_loss_levels,
+                        monitored_channels, signal_channels,
+                        use_signal_settings, create_sl_tp, make_webhook_enabled,
+                        trailing_enabled, trailing_activation_percent, trailing_callback_percent,
+                        cooldown_enabled, cooldown_hours, trading_type
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    account.account_id, account.account_name, account.bingx_api_key,
+                    account.bingx_secret_key, account.telegram_api_id, account.telegram_api_hash,
+                    account.phone, account.user_id, account.is_active, account.created_at, account.last_used,
+                    account.leverage, account.risk_percentage, account.default_symbol,
+                    account.auto_trade_enabled, account.use_percentage_balance,
+                    account.balance_percentage, account.fixed_usdt_amount,
+                    json.dumps([{'percentage': tp.percentage, 'close_percentage': tp.close_percentage} 
+                               for tp in account.take_profit_levels]),
+                    json.dumps([{'percentage': sl.percentage, 'close_percentage': sl.close_percentage} 
+                               for sl in account.stop_loss_levels]),
+                    json.dumps(account.monitored_channels),
+                    json.dumps(account.signal_channels),
+                    account.use_signal_settings, account.create_sl_tp, account.make_webhook_enabled,
+                    account.trailing_enabled, account.trailing_activation_percent, account.trailing_callback_percent,
+                    account.cooldown_enabled, account.cooldown_hours, account.trading_type
+                ))
+                self._sync_account_channels(cursor, account.account_id, account.monitored_channels)
+            self._refresh_account(account.account_id)
             logger.info(f"✅ Account {account.account_name} created successfully in database")
             return True
         except Exception as e:
             logger.error(f"❌ Failed to create account: {e}")
             return False
 
+    @staticmethod
+    def _row_to_account(row) -> AccountConfig:
+        """Build an AccountConfig from a raw accounts row"""
+        # Parse TP levels
+        tp_levels = []
+        if row[18]:  # take_profit_levels column (shifted by 1)
+            tp_data = json.loads(row[18])
+            tp_levels = [TakeProfitLevel(tp['percentage'], tp['close_percentage']) 
+                        for tp in tp_data]
+
+        # Parse SL levels
+        sl_levels = []
+        if row[19]:  # stop_loss_levels column (shifted by 1)
+            sl_data = json.loads(row[19])
+            sl_levels = [StopLossLevel(sl['percentage'], sl['close_percentage']) 
+                        for sl in sl_data]
+
+        return AccountConfig(
+            account_id=row[0],
+            account_name=row[1],
+            bingx_api_key=row[2],
+            bingx_secret_key=row[3],
+            telegram_api_id=row[4],
+            telegram_api_hash=row[5],
+            phone=row[6],
+            user_id=int(row[7]) if len(row) > 7 and row[7] else 0,
+            is_active=bool(row[8]),
+            created_at=row[9],
+            last_used=row[10],
+            leverage=row[11],
+            risk_percentage=row[12],
+            default_symbol=row[13],
+            auto_trade_enabled=bool(row[14]),
+            use_percentage_balance=bool(row[15]),
+            balance_percentage=row[16],
+            fixed_usdt_amount=row[17],
+            take_profit_levels=tp_levels,
+            stop_loss_levels=sl_levels,
+            monitored_channels=json.loads(row[20]) if row[20] else [],
+            signal_channels=json.loads(row[21]) if row[21] else [],
+            use_signal_settings=bool(row[22]) if len(row) > 22 else False,
+            create_sl_tp=bool(row[23]) if len(row) > 23 else True,
+            make_webhook_enabled=bool(row[24]) if len(row) > 24 else False,
+            trailing_enabled=bool(row[25]) if len(row) > 25 else False,
+            trailing_activation_percent=float(row[26]) if len(row) > 26 else 2.0,
+            trailing_callback_percent=float(row[27]) if len(row) > 27 else 0.5,
+            cooldown_enabled=bool(row[28]) if len(row) > 28 else False,
+            cooldown_hours=int(row[29]) if len(row) > 29 and row[29] is not None else 24,
+            trading_type=str(row[30]) if len(row) > 30 and row[30] else 'swap'
+        )
 
-    def get_all_accounts(self) -> List[AccountConfig]:
-        """Get all active accounts"""
+    def _load_accounts(self) -> bool:
+        """Fill the in-memory account registry from the database (one full scan)"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM accounts WHERE is_active = TRUE')
-            rows = cursor.fetchall()
-            conn.close()
+            with self.connections.read() as cursor:
+                cursor.execute('SELECT * FROM accounts WHERE is_active = TRUE')
+                rows = cursor.fetchall()
+        except Exception as e:
+            logger.error(f"❌ Failed to get accounts: {e}")
+            return False
 
-            accounts = []
-            for row in rows:
-                try:
-                    # Parse TP levels
-                    tp_levels = []
-                    if row[18]:  # take_profit_levels column (shifted by 1)
-                        tp_data = json.loads(row[18])
-                        tp_levels = [TakeProfitLevel(tp['percentage'], tp['close_percentage']) 
-                                    for tp in tp_data]
-
-                    # Parse SL levels
-                    sl_levels = []
-                    if row[19]:  # stop_loss_levels column (shifted by 1)
-                        sl_data = json.loads(row[19])
-                        sl_levels = [StopLossLevel(sl['percentage'], sl['close_percentage']) 
-                                    for sl in sl_data]
-
-                    account = AccountConfig(
-                        account_id=row[0],
-                        account_name=row[1],
-                        bingx_api_key=row[2],
-                        bingx_secret_key=row[3],
-                        telegram_api_id=row[4],
-                        telegram_api_hash=row[5],
-                        phone=row[6],
-                        user_id=int(row[7]) if len(row) > 7 and row[7] else 0,
-                        is_active=bool(row[8]),
-                        created_at=row[9],
-                        last_used=row[10],
-                        leverage=row[11],
-                        risk_percentage=row[12],
-                        default_symbol=row[13],
-                        auto_trade_enabled=bool(row[14]),
-                        use_percentage_balance=bool(row[15]),
-                        balance_percentage=row[16],
-                        fixed_usdt_amount=row[17],
-                        take_profit_levels=tp_levels,
-                        stop_loss_levels=sl_levels,
-                        monitored_channels=json.loads(row[20]) if row[20] else [],
-                        signal_channels=json.loads(row[21]) if row[21] else [],
-                        use_signal_settings=bool(row[22]) if len(row) > 22 else False,
-                        create_sl_tp=bool(row[23]) if len(row) > 23 else True,
-                        make_webhook_enabled=bool(row[24]) if len(row) > 24 else False,
-                        trailing_enabled=bool(row[25]) if len(row) > 25 else False,
-                        trailing_activation_percent=float(row[26]) if len(row) > 26 else 2.0,
-                        trailing_callback_percent=float(row[27]) if len(row) > 27 else 0.5,
-                        cooldown_enabled=bool(row[28]) if len(row) > 28 else False,
-                        cooldown_hours=int(row[29]) if len(row) > 29 and row[29] is not None else 24,
-                        trading_type=str(row[30]) if len(row) > 30 and row[30] else 'swap'
-                    )
-                    accounts.append(account)
-                except Exception as e:
-                    logger.error(f"❌ Error parsing account row: {e}")
-                    continue
+        accounts: Dict[str, AccountConfig] = {}
+        for row in rows:
+            try:
+                account = self._row_to_account(row)
+                accounts[account.account_id] = account
+            except Exception as e:
+                logger.error(f"❌ Error parsing account row: {e}")
+                continue
 
-            logger.info(f"✅ Retrieved {len(accounts)} accounts from database")
-            return accounts
+        with self._accounts_lock:
+            self._accounts = accounts
+            self._accounts_by_user = {}
+            self._accounts_by_channel = {}
+            self._account_channel_keys = {}
+            for account in accounts.values():
+                self._index_account(account)
+            self._accounts_loaded = True
+        logger.info(f"✅ Retrieved {len(accounts)} accounts from database")
+        return True
+
+    def _index_account(self, account: AccountConfig):
+        """Add an account to the by-user and by-channel indexes"""
+        user_id = int(account.user_id or 0)
+        ids = self._accounts_by_user.setdefault(user_id, [])
+        if account.account_id not in ids:
+            ids.append(account.account_id)
+        keys = frozenset(k for k in (self.channel_key(c) for c in account.monitored_channels or []) if k is not None)
+        self._account_channel_keys[account.account_id] = keys
+        for key in keys:
+            self._accounts_by_channel.setdefault(key, set()).add(account.account_id)
+
+    def _unindex_account(self, account: AccountConfig):
+        user_id = int(account.user_id or 0)
+        ids = self._accounts_by_user.get(user_id)
+        if ids and account.account_id in ids:
+            ids.remove(account.account_id)
+            if not ids:
+                del self._accounts_by_user[user_id]
+        for key in self._account_channel_keys.pop(account.account_id, ()):
+            subscribers = self._accounts_by_channel.get(key)
+            if subscribers is not None:
+                subscribers.discard(account.account_id)
+                if not subscribers:
+                    del self._accounts_by_channel[key]
+
+    def _ensure_accounts_loaded(self):
+        if not self._accounts_loaded:
+            self._load_accounts()
+
+    def _refresh_account(self, account_id: str):
+        """Re-read one account row after a write and apply it to the registry in place.
+
+        Existing AccountConfig objects are updated rather than replaced, so any
+        coroutine holding a reference sees the new settings immediately.
+        """
+        if not self._accounts_loaded:
+            return
+        try:
+            with self.connections.read() as cursor:
+                cursor.execute('SELECT * FROM accounts WHERE account_id = ?', (account_id,))
+                row = cursor.fetchone()
+            fresh = self._row_to_account(row) if row and row[8] else None
         except Exception as e:
-            logger.error(f"❌ Failed to get accounts: {e}")
+            logger.warning(f"⚠️ Account registry refresh failed for {account_id}, reloading all: {e}")
+            self._load_accounts()
+            return
+
+        with self._accounts_lock:
+            existing = self._accounts.get(account_id)
+            if existing:
+                self._unindex_account(existing)
+            if fresh is None:
+                self._accounts.pop(account_id, None)
+                return
+            if existing:
+                existing.__dict__.update(fresh.__dict__)
+                fresh = existing
+            else:
+                self._accounts[account_id] = fresh
+            self._index_account(fresh)
+
+    def reload_accounts(self) -> List[AccountConfig]:
+        """Drop the registry and rebuild it from the database"""
+        self._load_accounts()
+        return self.get_all_accounts()
+
+    def get_all_accounts(self) -> List[AccountConfig]:
+        """Get all active accounts (served from the in-memory registry)"""
+        self._ensure_accounts_loaded()
+        with self._accounts_lock:
+            return list(self._accounts.values())
+
+    def get_account(self, account_id: str) -> Optional[AccountConfig]:
+        """O(1) lookup of an active account by id"""
+        if not account_id:
+            return None
+        self._ensure_accounts_loaded()
+        return self._accounts.get(account_id)
+
+    def get_channel_accounts(self, channel_id: Union[str, int]) -> List[AccountConfig]:
+        """Active accounts subscribed to a channel (one lookup in the channel index)"""
+        key = self.channel_key(channel_id)
+        if key is None:
             return []
+        self._ensure_accounts_loaded()
+        with self._accounts_lock:
+            ids = self._accounts_by_channel.get(key, ())
+            return [self._accounts[aid] for aid in ids if aid in self._accounts]
 
     # =============== Settings and Accounts Update Helpers ===============
 
     def set_app_setting(self, key: str, value: Any) -> bool:
         """Upsert a key/value setting in app_settings table."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('INSERT OR REPLACE INTO app_settings (key, value) VALUES (?, ?)', (key, json.dumps(value)))
-            conn.commit()
-            conn.close()
+            with self.connections.write() as cursor:
+                cursor.execute('INSERT OR REPLACE INTO app_settings (key, value) VALUES (?, ?)', (key, json.dumps(value)))
             return True
         except Exception as e:
             logger.error(f"❌ Failed to save app setting {key}: {e}")
@@ -850,11 +1608,9 @@ class EnhancedDatabase:
 
     def get_app_setting(self, key: str, default: Any = None) -> Any:
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('SELECT value FROM app_settings WHERE key = ?', (key,))
-            row = cursor.fetchone()
-            conn.close()
+            with self.connections.read() as cursor:
+                cursor.execute('SELECT value FROM app_settings WHERE key = ?', (key,))
+                row = cursor.fetchone()
             if row and row[0] is not None:
                 try:
                     return json.loads(row[0])
@@ -887,11 +1643,9 @@ class EnhancedDatabase:
 
     def update_account_name(self, account_id: str, new_name: str) -> bool:
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('UPDATE accounts SET account_name = ? WHERE account_id = ?', (new_name, account_id))
-            conn.commit()
-            conn.close()
+            with self.connections.write() as cursor:
+                cursor.execute('UPDATE accounts SET account_name = ? WHERE account_id = ?', (new_name, account_id))
+            self._refresh_account(account_id)
             return True
         except Exception as e:
             logger.error(f"❌ Failed to rename account {account_id}: {e}")
@@ -900,11 +1654,10 @@ class EnhancedDatabase:
     def soft_delete_account(self, account_id: str) -> bool:
         """Soft delete by setting is_active = FALSE."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('UPDATE accounts SET is_active = FALSE WHERE account_id = ?', (account_id,))
-            conn.commit()
-            conn.close()
+            with self.connections.write() as cursor:
+                cursor.execute('UPDATE accounts SET is_active = FALSE WHERE account_id = ?', (account_id,))
+                cursor.execute('UPDATE account_channels SET is_active = FALSE WHERE account_id = ?', (account_id,))
+            self._refresh_account(account_id)
             return True
         except Exception as e:
             logger.error(f"❌ Failed to delete account {account_id}: {e}")
@@ -931,13 +1684,11 @@ class EnhancedDatabase:
         if not set_clauses:
             return True
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            sql = f"UPDATE accounts SET {', '.join(set_clauses)} WHERE account_id = ?"
-            values.append(account_id)
-            cursor.execute(sql, tuple(values))
-            conn.commit()
-            conn.close()
+            with self.connections.write() as cursor:
+                sql = f"UPDATE accounts SET {', '.join(set_clauses)} WHERE account_id = ?"
+                values.append(account_id)
+                cursor.execute(sql, tuple(values))
+            self._refresh_account(account_id)
             return True
         except Exception as e:
             logger.error(f"❌ Failed to update account settings for {account_id}: {e}")
@@ -946,11 +1697,9 @@ class EnhancedDatabase:
     def update_account_take_profit_levels(self, account_id: str, tp_levels: List[TakeProfitLevel]) -> bool:
         try:
             payload = json.dumps([{'percentage': tp.percentage, 'close_percentage': tp.close_percentage} for tp in tp_levels])
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('UPDATE accounts SET take_profit_levels = ? WHERE account_id = ?', (payload, account_id))
-            conn.commit()
-            conn.close()
+            with self.connections.write() as cursor:
+                cursor.execute('UPDATE accounts SET take_profit_levels = ? WHERE account_id = ?', (payload, account_id))
+            self._refresh_account(account_id)
             return True
         except Exception as e:
             logger.error(f"❌ Failed to update TP levels for {account_id}: {e}")
@@ -959,11 +1708,9 @@ class EnhancedDatabase:
     def update_account_stop_loss_levels(self, account_id: str, sl_levels: List[StopLossLevel]) -> bool:
         try:
             payload = json.dumps([{'percentage': sl.percentage, 'close_percentage': sl.close_percentage} for sl in sl_levels])
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('UPDATE accounts SET stop_loss_levels = ? WHERE account_id = ?', (payload, account_id))
-            conn.commit()
-            conn.close()
+            with self.connections.write() as cursor:
+                cursor.execute('UPDATE accounts SET stop_loss_levels = ? WHERE account_id = ?', (payload, account_id))
+            self._refresh_account(account_id)
             return True
         except Exception as e:
             logger.error(f"❌ Failed to update SL levels for {account_id}: {e}")
@@ -971,12 +1718,12 @@ class EnhancedDatabase:
 
     def update_monitored_channels(self, account_id: str, channels: List[Union[str, int]]) -> bool:
         try:
-            payload = json.dumps([int(str(c)) for c in channels if str(c).lstrip('-').isdigit()])
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('UPDATE accounts SET monitored_channels = ? WHERE account_id = ?', (payload, account_id))
-            conn.commit()
-            conn.close()
+            channel_ids = [int(str(c)) for c in channels if str(c).lstrip('-').isdigit()]
+            with self.connections.write() as cursor:
+                cursor.execute('UPDATE accounts SET monitored_channels = ? WHERE account_id = ?',
+                               (json.dumps(channel_ids), account_id))
+                self._sync_account_channels(cursor, account_id, channel_ids)
+            self._refresh_account(account_id)
             return True
         except Exception as e:
             logger.error(f"❌ Failed to update monitored channels for {account_id}: {e}")
@@ -985,11 +1732,9 @@ class EnhancedDatabase:
     def update_account_user_id(self, account_id: str, user_id: int) -> bool:
         """Update the user_id for an account"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('UPDATE accounts SET user_id = ? WHERE account_id = ?', (user_id, account_id))
-            conn.commit()
-            conn.close()
+            with self.connections.write() as cursor:
+                cursor.execute('UPDATE accounts SET user_id = ? WHERE account_id = ?', (user_id, account_id))
+            self._refresh_account(account_id)
             logger.info(f"✅ Updated user_id={user_id} for account {account_id}")
             return True
         except Exception as e:
@@ -999,9 +1744,10 @@ class EnhancedDatabase:
     def get_user_accounts(self, user_id: int) -> List[AccountConfig]:
         """Get all accounts for a specific user"""
         try:
-            all_accounts = self.get_all_accounts()
-            user_accounts = [acc for acc in all_accounts if acc.user_id == user_id]
-            return user_accounts
+            self._ensure_accounts_loaded()
+            with self._accounts_lock:
+                ids = list(self._accounts_by_user.get(int(user_id or 0), []))
+                return [self._accounts[aid] for aid in ids if aid in self._accounts]
         except Exception as e:
             logger.error(f"❌ Failed to get user accounts for user {user_id}: {e}")
             return []
@@ -1010,22 +1756,17 @@ class EnhancedDatabase:
     def create_channel(self, channel: ChannelConfig) -> bool:
         """Create or update a channel configuration"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO channels (
-                    channel_id, channel_name, channel_username, is_active,
-                    account_ids, signal_filters
-                ) VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                channel.channel_id, channel.channel_name, channel.channel_username,
-                channel.is_active, json.dumps(channel.account_ids),
-                json.dumps(channel.signal_filters)
-            ))
-            
-            conn.commit()
-            conn.close()
+            with self.connections.write() as cursor:
+                cursor.execute('''
+                    INSERT OR REPLACE INTO channels (
+                        channel_id, channel_name, channel_username, is_active,
+                        account_ids, signal_filters
+                    ) VALUES (?, ?, ?, ?, ?, ?)
+                ''', (
+                    channel.channel_id, channel.channel_name, channel.channel_username,
+                    channel.is_active, json.dumps(channel.account_ids),
+                    json.dumps(channel.signal_filters)
+                ))
             logger.info(f"✅ Channel {channel.channel_name} created/updated successfully")
             return True
             
@@ -1034,39 +1775,29 @@ class EnhancedDatabase:
             return False
     
     def link_account_channel(self, account_id: str, channel_id: int) -> bool:
-        """Link an account to a channel"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO account_channels (
-                    account_id, channel_id, is_active, created_at
-                ) VALUES (?, ?, TRUE, ?)
-            ''', (account_id, channel_id, datetime.now().isoformat()))
-            
-            conn.commit()
-            conn.close()
-            logger.info(f"✅ Account {account_id} linked to channel {channel_id}")
+        """Link an account to a channel (adds it to the account's monitored channels)"""
+        account = self.get_account(account_id)
+        if not account:
+            logger.error(f"❌ Failed to link account to channel: account {account_id} not found")
+            return False
+        channels = list(account.monitored_channels or [])
+        if self.channel_key(channel_id) in {self.channel_key(c) for c in channels}:
             return True
-            
-        except Exception as e:
-            logger.error(f"❌ Failed to link account to channel: {e}")
+        if not self.update_monitored_channels(account_id, channels + [channel_id]):
             return False
+        logger.info(f"✅ Account {account_id} linked to channel {channel_id}")
+        return True
     
     def get_account_channels(self, account_id: str) -> List[int]:
         """Get all channels linked to an account"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT channel_id FROM account_channels 
-                WHERE account_id = ? AND is_active = TRUE
-            ''', (account_id,))
+            with self.connections.read() as cursor:
+                cursor.execute('''
+                    SELECT channel_id FROM account_channels 
+                    WHERE account_id = ? AND is_active = TRUE
+                ''', (account_id,))
             
-            rows = cursor.fetchall()
-            conn.close()
+                rows = cursor.fetchall()
             
             return [row[0] for row in rows]
             
@@ -1077,24 +1808,30 @@ class EnhancedDatabase:
     def save_trade_history(self, trade: TradeHistory) -> bool:
         """Save trade to history"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT OR REPLACE INTO trade_history (
-                    trade_id, account_id, symbol, side, entry_price, quantity,
-                    leverage, status, pnl, entry_time, exit_time, stop_loss_price,
-                    take_profit_prices, channel_id
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                trade.trade_id, trade.account_id, trade.symbol, trade.side,
-                trade.entry_price, trade.quantity, trade.leverage, trade.status,
-                trade.pnl, trade.entry_time, trade.exit_time, trade.stop_loss_price,
-                json.dumps(trade.take_profit_prices), trade.channel_id
-            ))
-            
-            conn.commit()
-            conn.close()
+            with self.connections.write() as cursor:
+                cursor.execute('SELECT account_id, channel_id, status, pnl, exit_time FROM trade_history WHERE trade_id = ?',
+                               (trade.trade_id,))
+                previous = cursor.fetchone()
+                cursor.execute('''
+                    INSERT OR REPLACE INTO trade_history (
+                        trade_id, account_id, symbol, side, entry_price, quantity,
+                        leverage, status, pnl, entry_time, exit_time, stop_loss_price,
+                        take_profit_prices, channel_id
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    trade.trade_id, trade.account_id, trade.symbol, trade.side,
+                    trade.entry_price, trade.quantity, trade.leverage, trade.status,
+                    trade.pnl, trade.entry_time, trade.exit_time, trade.stop_loss_price,
+                    json.dumps(trade.take_profit_prices), trade.channel_id
+                ))
+                if previous:
+                    # A replaced row first gives back its old contribution
+                    self._apply_trade_stats(cursor, previous[0], previous[1],
+                                            (self._is_counted_close(previous[2], previous[4]), float(previous[3] or 0)),
+                                            (False, 0.0))
+                self._apply_trade_stats(cursor, trade.account_id, trade.channel_id, (False, 0.0),
+                                        (self._is_counted_close(trade.status, trade.exit_time), float(trade.pnl or 0)))
+            self.cooldowns.record(trade.account_id, trade.symbol, trade.entry_time, trade.channel_id)
             return True
             
         except Exception as e:
@@ -1110,26 +1847,23 @@ class EnhancedDatabase:
             only_closed: If True, only return closed/inactive trades (not OPEN)
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            if only_closed:
-                cursor.execute('''
-                    SELECT * FROM trade_history 
-                    WHERE account_id = ? AND status != 'OPEN'
-                    ORDER BY entry_time DESC 
-                    LIMIT ?
-                ''', (account_id, limit))
-            else:
-                cursor.execute('''
-                    SELECT * FROM trade_history 
-                    WHERE account_id = ? 
-                    ORDER BY entry_time DESC 
-                    LIMIT ?
-                ''', (account_id, limit))
+            with self.connections.read() as cursor:
+                if only_closed:
+                    cursor.execute('''
+                        SELECT * FROM trade_history 
+                        WHERE account_id = ? AND status != 'OPEN'
+                        ORDER BY entry_time DESC 
+                        LIMIT ?
+                    ''', (account_id, limit))
+                else:
+                    cursor.execute('''
+                        SELECT * FROM trade_history 
+                        WHERE account_id = ? 
+                        ORDER BY entry_time DESC 
+                        LIMIT ?
+                    ''', (account_id, limit))
             
-            rows = cursor.fetchall()
-            conn.close()
+                rows = cursor.fetchall()
             
             trades = []
             for row in rows:
@@ -1159,17 +1893,14 @@ class EnhancedDatabase:
     def get_active_trades(self, account_id: str) -> List[TradeHistory]:
         """Get active trades for an account"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT * FROM trade_history 
-                WHERE account_id = ? AND status = 'OPEN'
-                ORDER BY entry_time DESC
-            ''', (account_id,))
+            with self.connections.read() as cursor:
+                cursor.execute('''
+                    SELECT * FROM trade_history 
+                    WHERE account_id = ? AND status = 'OPEN'
+                    ORDER BY entry_time DESC
+                ''', (account_id,))
             
-            rows = cursor.fetchall()
-            conn.close()
+                rows = cursor.fetchall()
             
             trades = []
             for row in rows:
@@ -1196,45 +1927,14 @@ class EnhancedDatabase:
             logger.error(f"❌ Failed to get active trades: {e}")
             return []
 
-    def can_trade_symbol(self, account_id: str, symbol: str, cooldown_hours: int = 24) -> bool:
-        """Check if a symbol can be traded (24-hour cooldown per symbol per account)"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Get the most recent trade for this symbol and account
-            cursor.execute('''
-                SELECT entry_time FROM trade_history 
-                WHERE account_id = ? AND symbol = ? 
-                ORDER BY entry_time DESC 
-                LIMIT 1
-            ''', (account_id, symbol))
-            
-            row = cursor.fetchone()
-            conn.close()
-            
-            if not row:
-                # No previous trade, can trade
-                return True
-            
-            # Parse the entry_time and check if cooldown has passed
-            from datetime import datetime, timedelta
-            last_trade_time = datetime.fromisoformat(row[0])
-            current_time = datetime.now()
-            time_diff = current_time - last_trade_time
-            
-            can_trade = time_diff >= timedelta(hours=cooldown_hours)
-            
-            if not can_trade:
-                remaining_hours = cooldown_hours - (time_diff.total_seconds() / 3600)
-                logger.info(f"⏳ Symbol {symbol} is in cooldown. {remaining_hours:.1f} hours remaining.")
-            
-            return can_trade
-            
-        except Exception as e:
-            logger.error(f"❌ Failed to check trade cooldown: {e}")
-            # On error, allow the trade to proceed
-            return True
+    def can_trade_symbol(self, account_id: str, symbol: str, cooldown_hours: int = 24,
+                         channel_id: Optional[str] = None) -> bool:
+        """Check if a symbol can be traded (cooldown per symbol per account, optionally per channel)"""
+        remaining = self.cooldowns.remaining(account_id, symbol, cooldown_hours, channel_id)
+        if remaining > 0:
+            logger.info(f"⏳ Symbol {symbol} is in cooldown. {remaining / 3600:.1f} hours remaining.")
+            return False
+        return True
     
     def update_trade_status(self, trade_id: str, status: Optional[str] = None,
                              pnl: Optional[float] = None, exit_time: Optional[str] = None) -> bool:
@@ -1257,22 +1957,341 @@ class EnhancedDatabase:
                 return True
             sql = f"UPDATE trade_history SET {', '.join(set_clauses)} WHERE trade_id = ?"
             values.append(trade_id)
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute(sql, tuple(values))
-            conn.commit()
-            conn.close()
+            with self.connections.write() as cursor:
+                cursor.execute('SELECT account_id, channel_id, status, pnl, exit_time FROM trade_history WHERE trade_id = ?',
+                               (trade_id,))
+                previous = cursor.fetchone()
+                cursor.execute(sql, tuple(values))
+                if previous:
+                    new_status = status if status is not None else previous[2]
+                    new_pnl = pnl if pnl is not None else previous[3]
+                    new_exit_time = exit_time if exit_time is not None else previous[4]
+                    self._apply_trade_stats(cursor, previous[0], previous[1],
+                                            (self._is_counted_close(previous[2], previous[4]), float(previous[3] or 0)),
+                                            (self._is_counted_close(new_status, new_exit_time), float(new_pnl or 0)))
             logger.info(f"📝 Trade {trade_id} updated: {', '.join(set_clauses)}")
             return True
         except Exception as e:
-            logger.error(f"❌ Failed to update trade {trade_id}: {e}")
+            logger.error(f"❌ Failed to update trade {trade_id}: {e}")
+            return False
+
+    @staticmethod
+    def _is_counted_close(status: Optional[str], exit_time: Optional[str]) -> bool:
+        """Closed trades with an exit time are the ones that count towards win rate"""
+        return status == "CLOSED" and exit_time is not None
+
+    def _apply_trade_stats(self, cursor, account_id: str, channel_id: Optional[str],
+                           before: Tuple[bool, float], after: Tuple[bool, float]):
+        """Move one trade's contribution in account_stats from `before` to `after` (counted, pnl).
+
+        Runs on the caller's write cursor so the aggregate commits or rolls back with the trade row.
+        Drawdown is tracked on the running net PnL and only ever grows; when an already counted
+        trade changes (PnL correction, reopened or replaced row) peak and drawdown are replayed
+        from the closed trades, since they depend on the order of every close after it.
+        """
+        if before == after or not account_id:
+            return
+        for stats_channel in {str(channel_id or ''), STATS_ALL_CHANNELS}:
+            cursor.execute('''
+                SELECT closed_trades, wins, losses, gross_profit, gross_loss, net_pnl, peak_pnl, max_drawdown
+                FROM account_stats WHERE account_id = ? AND channel_id = ?
+            ''', (account_id, stats_channel))
+            closed, wins, losses, gross_profit, gross_loss, net_pnl, peak_pnl, max_drawdown = \
+                cursor.fetchone() or (0, 0, 0, 0.0, 0.0, 0.0, 0.0, 0.0)
+            for sign, (counted, trade_pnl) in ((-1, before), (1, after)):
+                if not counted:
+                    continue
+                closed += sign
+                if trade_pnl > 0:
+                    wins += sign
+                    gross_profit += sign * trade_pnl
+                elif trade_pnl < 0:
+                    losses += sign
+                    gross_loss += sign * -trade_pnl
+                net_pnl += sign * trade_pnl
+            if before[0]:
+                # trade_history already holds the change, so the replay covers it
+                peak_pnl, max_drawdown = self._replay_drawdown(cursor, account_id, stats_channel)
+            else:
+                peak_pnl = max(peak_pnl, net_pnl)
+                max_drawdown = max(max_drawdown, peak_pnl - net_pnl)
+            cursor.execute('''
+                INSERT OR REPLACE INTO account_stats (
+                    account_id, channel_id, closed_trades, wins, losses, gross_profit, gross_loss,
+                    net_pnl, peak_pnl, max_drawdown, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (account_id, stats_channel, closed, wins, losses, gross_profit, gross_loss,
+                  net_pnl, peak_pnl, max_drawdown, datetime.now().isoformat()))
+
+    @staticmethod
+    def _replay_drawdown(cursor, account_id: str, stats_channel: str) -> Tuple[float, float]:
+        """Peak net PnL and max drawdown over the counted closes of one account_stats row, in exit order"""
+        query = "SELECT pnl FROM trade_history WHERE account_id = ? AND status = 'CLOSED' AND exit_time IS NOT NULL"
+        params: List[Any] = [account_id]
+        if stats_channel != STATS_ALL_CHANNELS:
+            query += " AND COALESCE(channel_id, '') = ?"
+            params.append(stats_channel)
+        cursor.execute(query + ' ORDER BY exit_time', tuple(params))
+        net_pnl = peak_pnl = max_drawdown = 0.0
+        for (trade_pnl,) in cursor.fetchall():
+            net_pnl += float(trade_pnl or 0)
+            peak_pnl = max(peak_pnl, net_pnl)
+            max_drawdown = max(max_drawdown, peak_pnl - net_pnl)
+        return peak_pnl, max_drawdown
+
+    def _rebuild_account_stats(self, cursor):
+        """Recompute account_stats from the full trade history (one-off backfill)"""
+        cursor.execute('DELETE FROM account_stats')
+        cursor.execute('''
+            SELECT account_id, channel_id, pnl FROM trade_history
+            WHERE status = 'CLOSED' AND exit_time IS NOT NULL
+            ORDER BY exit_time
+        ''')
+        rows = cursor.fetchall()
+        for account_id, channel_id, trade_pnl in rows:
+            self._apply_trade_stats(cursor, account_id, channel_id, (False, 0.0), (True, float(trade_pnl or 0)))
+        if rows:
+            logger.info(f"📊 Rebuilt account statistics from {len(rows)} closed trades")
+
+    def get_account_stats(self, account_id: str, channel_id: Optional[str] = None) -> Dict[str, Any]:
+        """Closed-trade aggregates for an account (or one of its channels); a single keyed read"""
+        stats = {
+            'closed_trades': 0, 'wins': 0, 'losses': 0, 'gross_profit': 0.0, 'gross_loss': 0.0,
+            'net_pnl': 0.0, 'max_drawdown': 0.0, 'win_rate': 0.0
+        }
+        try:
+            with self.connections.read() as cursor:
+                cursor.execute('''
+                    SELECT closed_trades, wins, losses, gross_profit, gross_loss, net_pnl, max_drawdown
+                    FROM account_stats WHERE account_id = ? AND channel_id = ?
+                ''', (account_id, STATS_ALL_CHANNELS if channel_id is None else str(channel_id)))
+                row = cursor.fetchone()
+            if row:
+                stats.update(zip(('closed_trades', 'wins', 'losses', 'gross_profit', 'gross_loss', 'net_pnl', 'max_drawdown'), row))
+                stats['win_rate'] = (stats['wins'] / stats['closed_trades'] * 100) if stats['closed_trades'] > 0 else 0.0
+        except Exception as e:
+            logger.error(f"❌ Failed to get account stats: {e}")
+        return stats
+
+    def get_accounts_overview(self) -> Dict[str, Dict[str, Any]]:
+        """Per-account dashboard figures for every account in one grouped query.
+
+        Trade counts and total PnL come from trade_history (all trades, no LIMIT); wins and
+        closed trades come from the maintained account_stats totals.
+        """
+        overview: Dict[str, Dict[str, Any]] = {}
+        try:
+            with self.connections.read() as cursor:
+                cursor.execute('''
+                    SELECT th.account_id,
+                           COUNT(*),
+                           SUM(CASE WHEN th.status = 'OPEN' THEN 1 ELSE 0 END),
+                           COALESCE(SUM(th.pnl), 0),
+                           COALESCE(s.closed_trades, 0),
+                           COALESCE(s.wins, 0)
+                    FROM trade_history th
+                    LEFT JOIN account_stats s ON s.account_id = th.account_id AND s.channel_id = ?
+                    GROUP BY th.account_id
+                ''', (STATS_ALL_CHANNELS,))
+                rows = cursor.fetchall()
+            for account_id, total, active, pnl, closed, wins in rows:
+                overview[account_id] = {
+                    'total_trades': int(total or 0),
+                    'active_trades': int(active or 0),
+                    'total_pnl': float(pnl or 0),
+                    'closed_trades': int(closed or 0),
+                    'wins': int(wins or 0),
+                    'win_rate': (wins / closed * 100) if closed else 0.0
+                }
+        except Exception as e:
+            logger.error(f"❌ Failed to get accounts overview: {e}")
+        return overview
+
+    def save_active_position(self, position: ActivePosition) -> bool:
+        """Insert or replace an open position (order ids are stored as JSON to keep their type)"""
+        try:
+            with self.connections.write() as cursor:
+                cursor.execute('''
+                    INSERT OR REPLACE INTO active_positions (
+                        account_id, symbol, user_id, side, quantity, entry_price, trade_id,
+                        stop_loss_order_id, take_profit_order_ids, filled_take_profit_order_ids,
+                        trailing_order_id, timestamp
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    position.account_id or "", position.symbol, position.user_id, position.side,
+                    position.quantity, position.entry_price, position.trade_id,
+                    json.dumps(position.stop_loss_order_id),
+                    json.dumps(position.take_profit_order_ids),
+                    json.dumps(position.filled_take_profit_order_ids),
+                    json.dumps(position.trailing_order_id),
+                    position.timestamp.isoformat() if position.timestamp else None
+                ))
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to save active position {position.symbol}: {e}")
+            return False
+
+    def delete_active_position(self, account_id: Optional[str], symbol: str) -> bool:
+        """Remove a closed position"""
+        try:
+            with self.connections.write() as cursor:
+                cursor.execute('DELETE FROM active_positions WHERE account_id = ? AND symbol = ?',
+                               (account_id or "", symbol))
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to delete active position {symbol}: {e}")
+            return False
+
+    def get_active_positions(self) -> List[ActivePosition]:
+        """Load every persisted open position"""
+        try:
+            with self.connections.read() as cursor:
+                cursor.execute('''
+                    SELECT account_id, symbol, user_id, side, quantity, entry_price, trade_id,
+                           stop_loss_order_id, take_profit_order_ids, filled_take_profit_order_ids,
+                           trailing_order_id, timestamp
+                    FROM active_positions
+                ''')
+                rows = cursor.fetchall()
+
+            positions = []
+            for row in rows:
+                positions.append(ActivePosition(
+                    symbol=row[1],
+                    user_id=int(row[2]) if row[2] else 0,
+                    side=row[3],
+                    quantity=float(row[4] or 0),
+                    entry_price=float(row[5] or 0),
+                    trade_id=row[6],
+                    stop_loss_order_id=json.loads(row[7]) if row[7] else None,
+                    take_profit_order_ids=json.loads(row[8]) if row[8] else [],
+                    filled_take_profit_order_ids=json.loads(row[9]) if row[9] else [],
+                    trailing_order_id=json.loads(row[10]) if row[10] else None,
+                    timestamp=datetime.fromisoformat(row[11]) if row[11] else None,
+                    account_id=row[0] or None
+                ))
+            return positions
+
+        except Exception as e:
+            logger.error(f"❌ Failed to load active positions: {e}")
+            return []
+
+    def claim_processed_message(self, channel_id: str, message_id: int, seen_at: float) -> bool:
+        """Record a message as processed; False if it already was"""
+        try:
+            with self.connections.write() as cursor:
+                cursor.execute('INSERT OR IGNORE INTO processed_messages (channel_id, message_id, seen_at) VALUES (?, ?, ?)',
+                               (str(channel_id), int(message_id), seen_at))
+                return cursor.rowcount > 0
+        except Exception as e:
+            logger.error(f"❌ Failed to record processed message: {e}")
+            return True
+
+    def claim_signal_fingerprint(self, account_id: str, fingerprint: str, channel_id: Optional[str],
+                                 message_id: Optional[int], now: float, window_seconds: float) -> bool:
+        """Record a signal for an account; False if the same fingerprint was claimed within the window"""
+        try:
+            with self.connections.write() as cursor:
+                cursor.execute('SELECT created_at FROM signal_fingerprints WHERE account_id = ? AND fingerprint = ?',
+                               (account_id, fingerprint))
+                row = cursor.fetchone()
+                if row and now - float(row[0]) < window_seconds:
+                    return False
+                cursor.execute('''
+                    INSERT OR REPLACE INTO signal_fingerprints (account_id, fingerprint, channel_id, message_id, created_at)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (account_id, fingerprint, str(channel_id) if channel_id else None, message_id, now))
+                return True
+        except Exception as e:
+            logger.error(f"❌ Failed to record signal fingerprint: {e}")
+            return True
+
+    def get_channel_cursors(self, account_id: str) -> Dict[str, int]:
+        """Persisted last message id per channel for an account"""
+        try:
+            with self.connections.read() as cursor:
+                cursor.execute('SELECT channel_id, last_message_id FROM channel_cursors WHERE account_id = ?', (account_id,))
+                return {row[0]: int(row[1]) for row in cursor.fetchall()}
+        except Exception as e:
+            logger.error(f"❌ Failed to load channel cursors: {e}")
+            return {}
+
+    def save_channel_cursor(self, account_id: str, channel_id: str, last_message_id: int) -> bool:
+        """Advance a channel cursor (never moves it backwards)"""
+        try:
+            with self.connections.write() as cursor:
+                cursor.execute('''
+                    INSERT INTO channel_cursors (account_id, channel_id, last_message_id, updated_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(account_id, channel_id) DO UPDATE SET
+                        last_message_id = MAX(last_message_id, excluded.last_message_id),
+                        updated_at = excluded.updated_at
+                ''', (account_id, str(channel_id), int(last_message_id), datetime.now().isoformat()))
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to save channel cursor: {e}")
+            return False
+
+    def delete_channel_cursors(self, account_id: str, channel_ids: List[str]) -> bool:
+        try:
+            with self.connections.write() as cursor:
+                cursor.executemany('DELETE FROM channel_cursors WHERE account_id = ? AND channel_id = ?',
+                                   [(account_id, str(channel_id)) for channel_id in channel_ids])
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to delete channel cursors: {e}")
             return False
 
+    def prune_signal_dedup(self, messages_before: float, fingerprints_before: float) -> int:
+        try:
+            with self.connections.write() as cursor:
+                cursor.execute('DELETE FROM processed_messages WHERE seen_at < ?', (messages_before,))
+                removed = cursor.rowcount
+                cursor.execute('DELETE FROM signal_fingerprints WHERE created_at < ?', (fingerprints_before,))
+                return removed + cursor.rowcount
+        except Exception as e:
+            logger.error(f"❌ Failed to prune signal dedup tables: {e}")
+            return 0
+
 class SignalDetector:
+    # Patterns are compiled once at import; parse_signals used to rebuild them per line
+    BLOCK_SPLIT = re.compile(r'(?m)^#')
+    SYMBOL_RE = re.compile(r'([A-Z0-9]{1,10})(?:/USDT|USDT)?', re.I)
+    LINE_LONG_RE = re.compile(r'\b(LONG|BUY|ЛОНГ|📈|🟢|⬆️|🚀)\b', re.I)
+    LINE_SHORT_RE = re.compile(r'\b(SHORT|SELL|ШОРТ|📉|🔴|⬇️|🔻)\b', re.I)
+    BLOCK_LONG_RE = re.compile(r'\b(LONG|ЛОНГ)\b', re.I)
+    BLOCK_SHORT_RE = re.compile(r'\b(SHORT|ШОРТ)\b', re.I)
+    ENTRY_RES = tuple(re.compile(p, re.I) for p in (
+        r'Entry[:\s]*([\d.,]+)',
+        r'Вход[:\s]*([\d.,]+)',
+        r'@\s*([\d.,]+)',
+        r'Price[:\s]*([\d.,]+)',
+        r'Цена[:\s]*([\d.,]+)'
+    ))
+    TP_RES = tuple(re.compile(p, re.I) for p in (
+        r'Target\s*\d*[:]?\s*([\d.,]+)',
+        r'TP\s*\d*[:]?\s*([\d.,]+)',
+        r'Тп[:\s]*([\d.,]*)([%+]*)',
+        r'Take\s*Profit[:\s]*([\d.,]+)',
+        r'Цель[:\s]*([\d.,]+)'
+    ))
+    SL_RES = tuple(re.compile(p, re.I) for p in (
+        r'Stop\s*Loss[:\s]*([\d.,]+)',
+        r'SL[:\s]*([\d.,]+)',
+        r'Сл[:\s]*([\d.,]+)',
+        r'Стоп[:\s]*([\d.,]+)'
+    ))
+    LEVERAGE_RES = tuple(re.compile(p, re.I) for p in (
+        r'Leverage[:\s]*([\d]+)',
+        r'Плечо[:\s]*([\d]+)[-xх]*([\d]*)',
+        r'([\d]+)\s*[xх]',
+        r'([\d]+)\s*X'
+    ))
+
     @staticmethod
     def parse_signals(text):
         """Enhanced signal parsing for Russian and various formats"""
-        blocks = re.split(r'(?m)^#', text)
+        blocks = SignalDetector.BLOCK_SPLIT.split(text)
         signals = []
 
         for block in blocks:
@@ -1284,7 +2303,7 @@ class SignalDetector:
             symbol_line = lines[0]
 
             # Extract symbol
-            sym_match = re.match(r'([A-Z0-9]{1,10})(?:/USDT|USDT)?', symbol_line, re.I)
+            sym_match = SignalDetector.SYMBOL_RE.match(symbol_line)
             if not sym_match:
                 continue
 
@@ -1300,17 +2319,17 @@ class SignalDetector:
             # Find trade side
             trade_side = None
             for l in lines[1:8]:
-                if re.search(r'\b(LONG|BUY|ЛОНГ|📈|🟢|⬆️|🚀)\b', l, re.I):
+                if SignalDetector.LINE_LONG_RE.search(l):
                     trade_side = 'LONG'
                     break
-                elif re.search(r'\b(SHORT|SELL|ШОРТ|📉|🔴|⬇️|🔻)\b', l, re.I):
+                elif SignalDetector.LINE_SHORT_RE.search(l):
                     trade_side = 'SHORT'
                     break
 
             if not trade_side:
-                if re.search(r'\b(LONG|ЛОНГ)\b', block, re.I):
+                if SignalDetector.BLOCK_LONG_RE.search(block):
                     trade_side = 'LONG'
-                elif re.search(r'\b(SHORT|ШОРТ)\b', block, re.I):
+                elif SignalDetector.BLOCK_SHORT_RE.search(block):
                     trade_side = 'SHORT'
 
             if not trade_side:
@@ -1319,15 +2338,8 @@ class SignalDetector:
             # Entry price
             entry = None
             for l in lines:
-                patterns = [
-                    r'Entry[:\s]*([\d.,]+)',
-                    r'Вход[:\s]*([\d.,]+)',
-                    r'@\s*([\d.,]+)',
-                    r'Price[:\s]*([\d.,]+)',
-                    r'Цена[:\s]*([\d.,]+)'
-                ]
-                for pattern in patterns:
-                    m = re.search(pattern, l, re.I)
+                for pattern in SignalDetector.ENTRY_RES:
+                    m = pattern.search(l)
                     if m:
                         try:
                             entry = float(m.group(1).replace(',',''))
@@ -1340,15 +2352,8 @@ class SignalDetector:
             # Take profits
             tps = []
             for l in lines:
-                patterns = [
-                    r'Target\s*\d*[:]?\s*([\d.,]+)',
-                    r'TP\s*\d*[:]?\s*([\d.,]+)',
-                    r'Тп[:\s]*([\d.,]*)([%+]*)',
-                    r'Take\s*Profit[:\s]*([\d.,]+)',
-                    r'Цель[:\s]*([\d.,]+)'
-                ]
-                for pattern in patterns:
-                    matches = re.findall(pattern, l, re.I)
+                for pattern in SignalDetector.TP_RES:
+                    matches = pattern.findall(l)
                     for match in matches:
                         if isinstance(match, tuple):
                             match = match[0]
@@ -1365,14 +2370,8 @@ class SignalDetector:
             # Stop loss
             sl = None
             for l in lines:
-                patterns = [
-                    r'Stop\s*Loss[:\s]*([\d.,]+)',
-                    r'SL[:\s]*([\d.,]+)',
-                    r'Сл[:\s]*([\d.,]+)',
-                    r'Стоп[:\s]*([\d.,]+)'
-                ]
-                for pattern in patterns:
-                    m = re.search(pattern, l, re.I)
+                for pattern in SignalDetector.SL_RES:
+                    m = pattern.search(l)
                     if m:
                         try:
                             sl = float(m.group(1).replace(',',''))
@@ -1385,14 +2384,8 @@ class SignalDetector:
             # Leverage
             lev = None
             for l in lines:
-                patterns = [
-                    r'Leverage[:\s]*([\d]+)',
-                    r'Плечо[:\s]*([\d]+)[-xх]*([\d]*)',
-                    r'([\d]+)\s*[xх]',
-                    r'([\d]+)\s*X'
-                ]
-                for pattern in patterns:
-                    m = re.search(pattern, l, re.I)
+                for pattern in SignalDetector.LEVERAGE_RES:
+                    m = pattern.search(l)
                     if m:
                         try:
                             lev = int(m.group(1))
@@ -1518,6 +2511,22 @@ class EnhancedSignalParser:
         r'([\d.,]+)%\s*от депо',
     ]
     
+    # Gate keywords: for each pattern above, lowercase literals of which at least one must be
+    # present (case-insensitively) for the pattern to be able to match; None = always run.
+    # One keyword scan per message decides which patterns are worth running at all.
+    SYMBOL_GATES = [('#',), ('#',), ('long', 'short'), None, ('—',), ('long',), ('short',),
+                    ('long', 'short'), ('#',), None]
+    LONG_GATES = [('long', 'лонг'), ('buy', 'покупка'), ('📈',), ('🟢',), ('⬆️',), ('🚀',), ('🟢',),
+                  ('long',), ('long',), ('long',)]
+    SHORT_GATES = [('short', 'шорт'), ('sell', 'продажа'), ('📉',), ('🔴',), ('⬇️',), ('🔻',),
+                   ('short',), ('short',), ('short',), ('шорт',)]
+    ENTRY_GATES = [('entry',), ('вход',), ('@',), ('price',), ('цена',), ('вход',), ('вход',), ('вход',),
+                   ('открытие',)]
+    TP_GATES = [('target',), ('tp',), ('тп',), ('take',), ('цель',), ('тейк',), ('тейк',), ('цели',), ('стоп',)]
+    SL_GATES = [('stop',), ('sl',), ('сл',), ('стоп',), ('стоп',), ('stop',)]
+    LEVERAGE_GATES = [('leverage',), ('плечо',), ('x', 'х'), ('x',), ('плечи',), ('плечо',)]
+    RISK_GATES = [('рм',), ('риск',), ('риск',), ('risk',), ('от депо',), ('от депо',)]
+    
     @staticmethod
     def parse_signal(text: str, channel_id: str = "") -> Optional[ParsedSignal]:
         """Parse a trading signal from text"""
@@ -1529,32 +2538,35 @@ class EnhancedSignalParser:
             if not text:
                 return None
             
+            # Single keyword scan: every extractor below only runs patterns whose gate is present
+            present = EnhancedSignalParser._scan_keywords(text)
+            
             # Extract symbol
-            symbol = EnhancedSignalParser._extract_symbol(text)
+            symbol = EnhancedSignalParser._extract_symbol(text, present)
             if not symbol:
                 logger.info("❌ No symbol found")
                 return None
             
             # Extract side (LONG/SHORT)
-            side = EnhancedSignalParser._extract_side(text)
+            side = EnhancedSignalParser._extract_side(text, present)
             if not side:
                 logger.info("❌ No trade side found")
                 return None
             
             # Extract entry price
-            entry_price = EnhancedSignalParser._extract_entry_price(text)
+            entry_price = EnhancedSignalParser._extract_entry_price(text, present)
             
             # Extract take profits
-            take_profits = EnhancedSignalParser._extract_take_profits(text)
+            take_profits = EnhancedSignalParser._extract_take_profits(text, present)
             
             # Extract stop loss
-            stop_loss = EnhancedSignalParser._extract_stop_loss(text)
+            stop_loss = EnhancedSignalParser._extract_stop_loss(text, present)
             
             # Extract leverage
-            leverage = EnhancedSignalParser._extract_leverage(text)
+            leverage = EnhancedSignalParser._extract_leverage(text, present)
             
             # Extract risk percentage
-            risk_percentage = EnhancedSignalParser._extract_risk_percentage(text)
+            risk_percentage = EnhancedSignalParser._extract_risk_percentage(text, present)
             
             # Calculate confidence score
             confidence = EnhancedSignalParser._calculate_confidence(
@@ -1585,18 +2597,39 @@ class EnhancedSignalParser:
             return None
     
     @staticmethod
-    def _extract_symbol(text: str) -> Optional[str]:
+    def _scan_keywords(text: str) -> frozenset:
+        """Return the gate keywords present in text (case-insensitive, same semantics as re.IGNORECASE)"""
+        keywords = EnhancedSignalParser._KEYWORDS
+        if EnhancedSignalParser._CASEFOLD_UNSAFE.search(text):
+            # Rare: dotted/dotless I match 'i' under re.IGNORECASE but casefold differently
+            return frozenset(keywords[m.lastindex - 1] for m in EnhancedSignalParser._KEYWORD_SCAN.finditer(text))
+        folded = text.casefold()
+        return frozenset(k for k in keywords if k in folded)
+
+    @staticmethod
+    def _active(rules, present: Optional[frozenset]):
+        """Yield compiled patterns whose gate keywords are present, in declaration order"""
+        if present is None:
+            for pattern, _ in rules:
+                yield pattern
+            return
+        for pattern, gate in rules:
+            if gate is None or not present.isdisjoint(gate):
+                yield pattern
+
+    @staticmethod
+    def _extract_symbol(text: str, present: Optional[frozenset] = None) -> Optional[str]:
         """Extract trading symbol from text"""
-        for pattern in EnhancedSignalParser.SYMBOL_PATTERNS:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in EnhancedSignalParser._active(EnhancedSignalParser._SYMBOL_RULES, present):
+            match = pattern.search(text)
             if match:
                 # Handle different pattern formats
                 if len(match.groups()) >= 2:
                     # Check if first group is LONG/SHORT
-                    if re.match(r"LONG|SHORT", match.group(1), re.IGNORECASE):
+                    if EnhancedSignalParser._SIDE_WORD.match(match.group(1)):
                         symbol = match.group(2).upper()
                     # Check if second group is LONG/SHORT (for #SYMBOL SHORT format)
-                    elif re.match(r"LONG|SHORT", match.group(2), re.IGNORECASE):
+                    elif EnhancedSignalParser._SIDE_WORD.match(match.group(2)):
                         symbol = match.group(1).upper()
                     else:
                         symbol = match.group(1).upper()
@@ -1624,44 +2657,32 @@ class EnhancedSignalParser:
         return None
     
     @staticmethod
-    def _extract_side(text: str) -> Optional[str]:
+    def _extract_side(text: str, present: Optional[frozenset] = None) -> Optional[str]:
         """Extract trade side (LONG/SHORT) from text"""
-        # First, check for explicit SHORT/LONG words anywhere in text (highest priority)
-        if re.search(r'\bSHORT\b', text, re.IGNORECASE):
-            return 'SHORT'
-        if re.search(r'\bLONG\b', text, re.IGNORECASE):
-            return 'LONG'
-        
-        # Check for Russian equivalents
-        if re.search(r'\bШОРТ\b', text, re.IGNORECASE):
-            return 'SHORT'
-        if re.search(r'\bЛОНГ\b', text, re.IGNORECASE):
-            return 'LONG'
-        
-        # Check for BUY/SELL
-        if re.search(r'\bSELL\b', text, re.IGNORECASE):
-            return 'SHORT'
-        if re.search(r'\bBUY\b', text, re.IGNORECASE):
-            return 'LONG'
+        # First, check for explicit SHORT/LONG words anywhere in text (highest priority),
+        # then Russian equivalents, then BUY/SELL
+        for pattern in EnhancedSignalParser._active(EnhancedSignalParser._EXPLICIT_SIDE_RULES, present):
+            if pattern.search(text):
+                return EnhancedSignalParser._EXPLICIT_SIDES[pattern]
         
         # Only check emojis if no explicit words found
         # Check for SHORT patterns (emojis and other indicators)
-        for pattern in EnhancedSignalParser.SHORT_PATTERNS:
-            if re.search(pattern, text, re.IGNORECASE):
+        for pattern in EnhancedSignalParser._active(EnhancedSignalParser._SHORT_RULES, present):
+            if pattern.search(text):
                 return 'SHORT'
         
         # Check for LONG patterns (emojis and other indicators)
-        for pattern in EnhancedSignalParser.LONG_PATTERNS:
-            if re.search(pattern, text, re.IGNORECASE):
+        for pattern in EnhancedSignalParser._active(EnhancedSignalParser._LONG_RULES, present):
+            if pattern.search(text):
                 return 'LONG'
         
         return None
     
     @staticmethod
-    def _extract_entry_price(text: str) -> Optional[float]:
+    def _extract_entry_price(text: str, present: Optional[frozenset] = None) -> Optional[float]:
         """Extract entry price from text"""
-        for pattern in EnhancedSignalParser.ENTRY_PATTERNS:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in EnhancedSignalParser._active(EnhancedSignalParser._ENTRY_RULES, present):
+            match = pattern.search(text)
             if match:
                 try:
                     price = float(match.group(1).replace(',', ''))
@@ -1673,13 +2694,13 @@ class EnhancedSignalParser:
         return None
     
     @staticmethod
-    def _extract_take_profits(text: str) -> List[float]:
+    def _extract_take_profits(text: str, present: Optional[frozenset] = None) -> List[float]:
         """Extract take profit levels from text"""
         take_profits = []
         
         # Look for multiple TP patterns
-        for pattern in EnhancedSignalParser.TP_PATTERNS:
-            matches = re.findall(pattern, text, re.IGNORECASE)
+        for pattern in EnhancedSignalParser._active(EnhancedSignalParser._TP_RULES, present):
+            matches = pattern.findall(text)
             for match in matches:
                 if isinstance(match, tuple):
                     match = match[0]
@@ -1698,10 +2719,10 @@ class EnhancedSignalParser:
         return take_profits[:5]
     
     @staticmethod
-    def _extract_stop_loss(text: str) -> Optional[float]:
+    def _extract_stop_loss(text: str, present: Optional[frozenset] = None) -> Optional[float]:
         """Extract stop loss from text"""
-        for pattern in EnhancedSignalParser.SL_PATTERNS:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in EnhancedSignalParser._active(EnhancedSignalParser._SL_RULES, present):
+            match = pattern.search(text)
             if match:
                 try:
                     sl = float(match.group(1).replace(',', ''))
@@ -1713,10 +2734,10 @@ class EnhancedSignalParser:
         return None
     
     @staticmethod
-    def _extract_leverage(text: str) -> Optional[int]:
+    def _extract_leverage(text: str, present: Optional[frozenset] = None) -> Optional[int]:
         """Extract leverage from text"""
-        for pattern in EnhancedSignalParser.LEVERAGE_PATTERNS:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in EnhancedSignalParser._active(EnhancedSignalParser._LEVERAGE_RULES, present):
+            match = pattern.search(text)
             if match:
                 try:
                     leverage = int(match.group(1))
@@ -1728,10 +2749,10 @@ class EnhancedSignalParser:
         return None
     
     @staticmethod
-    def _extract_risk_percentage(text: str) -> Optional[float]:
+    def _extract_risk_percentage(text: str, present: Optional[frozenset] = None) -> Optional[float]:
         """Extract risk percentage from text"""
-        for pattern in EnhancedSignalParser.RISK_PATTERNS:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in EnhancedSignalParser._active(EnhancedSignalParser._RISK_RULES, present):
+            match = pattern.search(text)
             if match:
                 try:
                     risk = float(match.group(1).replace(',', ''))
@@ -1775,24 +2796,1550 @@ class EnhancedSignalParser:
         
         return min(confidence, 1.0)
 
+def _compile_parser_rules(patterns: List[str], gates: List[Optional[Tuple[str, ...]]]) -> Tuple[Tuple[Any, Optional[frozenset]], ...]:
+    if len(patterns) != len(gates):
+        raise ValueError("Every signal pattern needs a gate entry")
+    return tuple((re.compile(p, re.IGNORECASE), frozenset(g) if g else None) for p, g in zip(patterns, gates))
+
+def _build_keyword_scanner(keywords: Tuple[str, ...]):
+    # The casefold() fast path is only exact for keywords made of a-z, а-я and uncased symbols
+    for k in keywords:
+        if k != k.casefold() or any(c.isalpha() and not ('a' <= c <= 'z' or 'а' <= c <= 'я') for c in k):
+            raise ValueError(f"Unsupported gate keyword {k!r}")
+    # A position can only report one alternative, so no keyword may be a prefix of another
+    for a in keywords:
+        for b in keywords:
+            if a != b and b.startswith(a):
+                raise ValueError(f"Gate keyword {a!r} is a prefix of {b!r}")
+    alternatives = '|'.join(f'({re.escape(k)})' for k in keywords)
+    # Zero-width lookahead so overlapping keywords (e.g. 'stop' + 'price' in 'stoprice') are all seen
+    return re.compile(f'(?=(?:{alternatives}))', re.IGNORECASE)
+
+EnhancedSignalParser._SYMBOL_RULES = _compile_parser_rules(EnhancedSignalParser.SYMBOL_PATTERNS, EnhancedSignalParser.SYMBOL_GATES)
+EnhancedSignalParser._LONG_RULES = _compile_parser_rules(EnhancedSignalParser.LONG_PATTERNS, EnhancedSignalParser.LONG_GATES)
+EnhancedSignalParser._SHORT_RULES = _compile_parser_rules(EnhancedSignalParser.SHORT_PATTERNS, EnhancedSignalParser.SHORT_GATES)
+EnhancedSignalParser._ENTRY_RULES = _compile_parser_rules(EnhancedSignalParser.ENTRY_PATTERNS, EnhancedSignalParser.ENTRY_GATES)
+EnhancedSignalParser._TP_RULES = _compile_parser_rules(EnhancedSignalParser.TP_PATTERNS, EnhancedSignalParser.TP_GATES)
+EnhancedSignalParser._SL_RULES = _compile_parser_rules(EnhancedSignalParser.SL_PATTERNS, EnhancedSignalParser.SL_GATES)
+EnhancedSignalParser._LEVERAGE_RULES = _compile_parser_rules(EnhancedSignalParser.LEVERAGE_PATTERNS, EnhancedSignalParser.LEVERAGE_GATES)
+EnhancedSignalParser._RISK_RULES = _compile_parser_rules(EnhancedSignalParser.RISK_PATTERNS, EnhancedSignalParser.RISK_GATES)
+EnhancedSignalParser._EXPLICIT_SIDE_RULES = _compile_parser_rules(
+    [r'\bSHORT\b', r'\bLONG\b', r'\bШОРТ\b', r'\bЛОНГ\b', r'\bSELL\b', r'\bBUY\b'],
+    [('short',), ('long',), ('шорт',), ('лонг',), ('sell',), ('buy',)]
+)
+EnhancedSignalParser._EXPLICIT_SIDES = {
+    pattern: side for (pattern, _), side in zip(EnhancedSignalParser._EXPLICIT_SIDE_RULES,
+                                                ['SHORT', 'LONG', 'SHORT', 'LONG', 'SHORT', 'LONG'])
+}
+EnhancedSignalParser._SIDE_WORD = re.compile(r"LONG|SHORT", re.IGNORECASE)
+EnhancedSignalParser._KEYWORDS = tuple(sorted({
+    k for gates in (EnhancedSignalParser.SYMBOL_GATES, EnhancedSignalParser.LONG_GATES, EnhancedSignalParser.SHORT_GATES,
+                    EnhancedSignalParser.ENTRY_GATES, EnhancedSignalParser.TP_GATES, EnhancedSignalParser.SL_GATES,
+                    EnhancedSignalParser.LEVERAGE_GATES, EnhancedSignalParser.RISK_GATES,
+                    [('short',), ('long',), ('шорт',), ('лонг',), ('sell',), ('buy',)])
+    for g in gates if g for k in g
+}))
+EnhancedSignalParser._KEYWORD_SCAN = _build_keyword_scanner(EnhancedSignalParser._KEYWORDS)
+# Characters that re.IGNORECASE equates with a-z/а-я but whose casefold() does not (İ, ı)
+EnhancedSignalParser._CASEFOLD_UNSAFE = re.compile('[\u0130\u0131]')
+
+# ================== ASYNC EXCHANGE GATEWAY ==================
+
+class ExchangeGateway:
+    """Non-blocking access point for every BingX call of one account.
+
+    Wraps a ccxt.async_support client so exchange I/O never blocks the event loop.
+    Each gateway bounds its own in-flight requests and enforces a hard per-call
+    timeout, so a stalled account cannot hold up other accounts or Telethon pollers.
+    """
+
+    def __init__(self, api_key: str, api_secret: str, trading_type: str = 'swap', account_id: str = "",
+                 timeout: float = EXCHANGE_CALL_TIMEOUT, max_concurrency: int = EXCHANGE_MAX_CONCURRENCY):
+        self.account_id = account_id
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.trading_type = trading_type or 'swap'
+        self.timeout = timeout
+        self.client = ccxt_async.bingx({
+            'apiKey': api_key,
+            'secret': api_secret,
+            'options': {'defaultType': self.trading_type},
+            'enableRateLimit': True,
+            'timeout': int(timeout * 1000)
+        })
+        self._semaphore = asyncio.Semaphore(max(1, int(max_concurrency)))
+        self.in_flight = 0
+        self.last_used = time.monotonic()
+
+    def matches(self, api_key: str, api_secret: str, trading_type: str) -> bool:
+        """True if this gateway was built for the given credentials and market type"""
+        return (self.api_key == api_key and self.api_secret == api_secret
+                and self.trading_type == (trading_type or 'swap'))
+
+    @property
+    def markets(self) -> Optional[Dict[str, Any]]:
+        return self.client.markets
+
+    async def _call(self, method: str, *args, **kwargs):
+        self.last_used = time.monotonic()
+        self.in_flight += 1
+        try:
+            async with self._semaphore:
+                try:
+                    return await asyncio.wait_for(getattr(self.client, method)(*args, **kwargs), timeout=self.timeout)
+                except asyncio.TimeoutError:
+                    raise ccxt.RequestTimeout(
+                        f"BingX {method} timed out after {self.timeout:g}s (account {self.account_id[:8] or 'default'})"
+                    )
+        finally:
+            self.in_flight -= 1
+            self.last_used = time.monotonic()
+
+    async def load_markets(self, reload: bool = False) -> Dict[str, Any]:
+        return await self._call('load_markets', reload)
+
+    async def warm(self, markets: Optional[Dict[str, Any]] = None):
+        """Get the client trade-ready: markets installed (shared copy if given) and a connection open"""
+        if markets and not self.client.markets:
+            self.client.set_markets(markets)
+        if not self.client.markets:
+            await self.load_markets()
+        else:
+            await self.fetch_time()
+
+    async def fetch_time(self):
+        return await self._call('fetch_time')
+
+    async def fetch_balance(self, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return await self._call('fetch_balance', params or {})
+
+    async def fetch_ticker(self, symbol: str) -> Dict[str, Any]:
+        return await self._call('fetch_ticker', symbol)
+
+    async def fetch_tickers(self, symbols: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        return await self._call('fetch_tickers', symbols)
+
+    async def fetch_order_book(self, symbol: str, limit: Optional[int] = None) -> Dict[str, Any]:
+        return await self._call('fetch_order_book', symbol, limit)
+
+    async def set_leverage(self, leverage: int, symbol: str, params: Optional[Dict[str, Any]] = None):
+        return await self._call('set_leverage', leverage, symbol, params or {})
+
+    async def create_order(self, symbol: str, order_type: str, side: str, amount: float,
+                           price: Optional[float] = None, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        return await self._call('create_order', symbol, order_type, side, amount, price, params or {})
+
+    async def create_orders(self, orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return await self._call('create_orders', orders)
+
+    async def cancel_order(self, order_id, symbol: str):
+        return await self._call('cancel_order', order_id, symbol)
+
+    async def fetch_order(self, order_id, symbol: str) -> Dict[str, Any]:
+        return await self._call('fetch_order', order_id, symbol)
+
+    async def fetch_open_orders(self, symbol: Optional[str] = None) -> List[Dict[str, Any]]:
+        return await self._call('fetch_open_orders', symbol)
+
+    async def fetch_positions(self, symbols: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        return await self._call('fetch_positions', symbols)
+
+    async def close(self):
+        """Release the underlying HTTP session"""
+        try:
+            await self.client.close()
+        except Exception as e:
+            logger.debug(f"Exchange client close error for {self.account_id[:8]}: {e}")
+
+    async def close_when_idle(self, grace: float = EXCHANGE_EVICT_GRACE_SECONDS):
+        """Close once no call is in flight and none has been made for `grace` seconds.
+
+        A trade works through several sequential calls (entry, then SL/TP), so an empty
+        semaphore alone does not mean the gateway is done with; the wait is capped so a
+        gateway that somebody keeps using is still released eventually.
+        """
+        deadline = time.monotonic() + grace + 2 * self.timeout
+        while True:
+            now = time.monotonic()
+            if self.in_flight == 0 and now - self.last_used >= grace:
+                break
+            if now >= deadline:
+                logger.warning(f"⚠️ Closing replaced BingX client for {self.account_id[:8]} with "
+                               f"{self.in_flight} call(s) still in flight")
+                break
+            await asyncio.sleep(min(1.0, max(0.05, grace)))
+        await self.close()
+
+class ExchangeClientPool:
+    """One long-lived ExchangeGateway per (account, trading type).
+
+    Clients are rebuilt only when the account's API keys change; switching an account's
+    trading type keeps the other type's client (and its open positions' client) warm.
+    New clients are warmed off the trade path with a shared market table, and the
+    maintenance loop pings idle clients so their keep-alive connections stay open.
+    A replaced client is closed only after its in-flight calls finish, except at shutdown.
+    """
+
+    def __init__(self, markets_provider=None, on_evict=None,
+                 keepalive_seconds: float = EXCHANGE_KEEPALIVE_SECONDS,
+                 idle_close_seconds: float = EXCHANGE_IDLE_CLOSE_SECONDS):
+        self.markets_provider = markets_provider
+        self.on_evict = on_evict
+        self.keepalive_seconds = keepalive_seconds
+        self.idle_close_seconds = idle_close_seconds
+        self._clients: Dict[Tuple[str, str], ExchangeGateway] = {}
+        self._current: Dict[str, str] = {}  # account_id -> trading type of its latest acquire
+        self._warming: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._retiring: Dict[asyncio.Task, ExchangeGateway] = {}  # replaced clients waiting for their calls
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self, account_id: Optional[str], trading_type: Optional[str] = None) -> Optional[ExchangeGateway]:
+        """Pooled client of an account (its current trading type unless one is given)"""
+        if not account_id:
+            return None
+        trading_type = trading_type or self._current.get(account_id)
+        return self._clients.get((account_id, trading_type)) if trading_type else None
+
+    def _evict(self, gateway: ExchangeGateway):
+        """Stop handing out a replaced client and close it once its in-flight calls are done"""
+        if self.on_evict is not None:
+            self.on_evict(gateway)
+        try:
+            task = asyncio.get_running_loop().create_task(gateway.close_when_idle())
+        except RuntimeError:
+            return  # no running loop (startup): the session was never opened, nothing to release
+        self._retiring[task] = gateway
+        task.add_done_callback(lambda done: self._retiring.pop(done, None))
+
+    def register(self, account_id: str, gateway: ExchangeGateway) -> ExchangeGateway:
+        """Adopt a client built elsewhere as the account's current one"""
+        key = (account_id, gateway.trading_type)
+        previous = self._clients.get(key)
+        self._clients[key] = gateway
+        self._current[account_id] = gateway.trading_type
+        if previous is not None and previous is not gateway:
+            self._evict(previous)
+        return gateway
+
+    def acquire(self, account: AccountConfig) -> ExchangeGateway:
+        """The account's client for its trading type, built (and warmed in the background) on first use"""
+        trading_type = getattr(account, 'trading_type', 'swap') or 'swap'  # Default to swap for backwards compatibility
+        key = (account.account_id, trading_type)
+        self._current[account.account_id] = trading_type
+        existing = self._clients.get(key)
+        if existing and existing.matches(account.bingx_api_key, account.bingx_secret_key, trading_type):
+            return existing
+        gateway = ExchangeGateway(
+            account.bingx_api_key,
+            account.bingx_secret_key,
+            trading_type=trading_type,
+            account_id=account.account_id
+        )
+        self._clients[key] = gateway
+        if existing:
+            self._evict(existing)
+        self._schedule_warm(key, gateway)
+        logger.info(f"✅ Bound BingX client to account {account.account_name} (type: {trading_type})")
+        return gateway
+
+    def discard(self, account_id: str):
+        """Drop every client of an account (deleted account or revoked keys)"""
+        self._current.pop(account_id, None)
+        for key in [k for k in self._clients if k[0] == account_id]:
+            self._evict(self._clients.pop(key))
+
+    def _schedule_warm(self, key: Tuple[str, str], gateway: ExchangeGateway):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # no loop yet: prewarm() at startup covers it
+        self._warming[key] = loop.create_task(self.warm(gateway))
+
+    async def warm(self, gateway: ExchangeGateway) -> bool:
+        started = time.perf_counter()
+        try:
+            markets = self.markets_provider() if self.markets_provider is not None else None
+            await gateway.warm(markets)
+            logger.info(f"🔥 Warmed BingX client for account {gateway.account_id[:8]} ({gateway.trading_type}) "
+                        f"in {(time.perf_counter() - started) * 1000.0:.0f} ms")
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Warm-up failed for account {gateway.account_id[:8]} ({gateway.trading_type}): {e}")
+            return False
+        finally:
+            key = (gateway.account_id, gateway.trading_type)
+            task = self._warming.get(key)
+            if task is not None and task is asyncio.current_task():
+                del self._warming[key]
+
+    async def prewarm(self, accounts: List[AccountConfig]) -> int:
+        """Build and warm clients for the given accounts concurrently; returns how many are ready"""
+        gateways = [self.acquire(acc) for acc in accounts if acc.bingx_api_key and acc.bingx_secret_key]
+        pending = [self._warming.get((g.account_id, g.trading_type)) for g in gateways]
+        results = await asyncio.gather(
+            *(task if task is not None else self.warm(g) for g, task in zip(gateways, pending)),
+            return_exceptions=True)
+        return sum(1 for r in results if r is True)
+
+    async def _maintain(self):
+        now = time.monotonic()
+        pings = []
+        for key, gateway in list(self._clients.items()):
+            idle = now - gateway.last_used
+            if self._current.get(key[0]) != key[1] and idle >= self.idle_close_seconds:
+                del self._clients[key]
+                self._evict(gateway)
+            elif self.keepalive_seconds > 0 and idle >= self.keepalive_seconds and key not in self._warming:
+                pings.append(gateway.fetch_time())
+        if pings:
+            await asyncio.gather(*pings, return_exceptions=True)
+
+    async def run(self, accounts: Optional[List[AccountConfig]] = None):
+        if accounts:
+            ready = await self.prewarm(accounts)
+            logger.info(f"🔥 Pre-warmed {ready}/{len(accounts)} BingX clients")
+        interval = self.keepalive_seconds if self.keepalive_seconds > 0 else 300.0
+        while True:
+            await asyncio.sleep(max(5.0, interval / 2))
+            try:
+                await self._maintain()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Exchange client pool maintenance error: {e}")
+
+    def start(self, accounts: Optional[List[AccountConfig]] = None):
+        """Start maintenance, pre-warming the given accounts' clients first"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run(accounts))
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for task in list(self._warming.values()):
+            task.cancel()
+        self._warming.clear()
+        # Shutdown: replaced clients still waiting for their calls are closed right away too
+        retiring = list(self._retiring.values())
+        for task in list(self._retiring):
+            task.cancel()
+        self._retiring.clear()
+        clients = list(self._clients.values()) + retiring
+        self._clients.clear()
+        self._current.clear()
+        await asyncio.gather(*(gateway.close() for gateway in clients), return_exceptions=True)
+
+    def __iter__(self):
+        return iter(list(self._clients.values()))
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+# ================== MARKET METADATA ==================
+
+class MarketMetadataService:
+    """Precision and limits for every BingX market, answered from memory.
+
+    Markets are preloaded from a JSON snapshot at startup, refreshed from the exchange in the
+    background once the snapshot is older than MARKET_METADATA_TTL_SECONDS, and indexed per
+    trading type under every normalized alias (BTCUSDT, BTC-USDT, BTC/USDT and BTC/USDT:USDT
+    all resolve to the same entry).
+    """
+
+    TRADING_TYPES = ('swap', 'spot')
+    SNAPSHOT_VERSION = 1
+
+    def __init__(self, snapshot_path: str, ttl: float = MARKET_METADATA_TTL_SECONDS):
+        self.snapshot_path = snapshot_path
+        self.ttl = ttl
+        self._entries: Dict[str, List[Dict[str, Any]]] = {t: [] for t in self.TRADING_TYPES}
+        self._index: Dict[str, Dict[str, Dict[str, Any]]] = {t: {} for t in self.TRADING_TYPES}
+        self._refreshed_at = 0.0
+        self._attempted_at = 0.0
+        self._refresh_lock: Optional[asyncio.Lock] = None
+        self._gateway: Optional[ExchangeGateway] = None
+        self._raw_markets: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def key(symbol: Optional[str]) -> str:
+        """Normalize BTCUSDT / BTC-USDT / BTC/USDT:USDT to one comparable key"""
+        if not symbol:
+            return ""
+        return str(symbol).split(':')[0].replace('/', '').replace('-', '').upper()
+
+    @staticmethod
+    def precision_from_market(market: Dict[str, Any]) -> Dict[str, Any]:
+        """Derive step/tick sizes, limits and decimal precision from a ccxt market"""
+        # Derive precision and limits
+        raw_price_precision = market.get('precision', {}).get('price', None)
+        raw_amount_precision = market.get('precision', {}).get('amount', None)
+
+        # Normalize precision to integers when possible
+        price_precision = int(raw_price_precision) if isinstance(raw_price_precision, (int, float)) and raw_price_precision is not None else None
+        qty_precision = int(raw_amount_precision) if isinstance(raw_amount_precision, (int, float)) and raw_amount_precision is not None else None
+
+        # Compute tick size (robust, no nested try/except indentation pitfalls)
+        info = market.get('info', {}) or {}
+        tick_size = market.get('limits', {}).get('price', {}).get('min', None)
+        if not tick_size:
+            candidates = []
+            if isinstance(info, dict):
+                candidates = [info.get('priceIncrement'), info.get('priceStep')]
+            for cand in candidates:
+                if cand is None:
+                    continue
+                try:
+                    tick_size = float(cand)
+                    break
+                except Exception:
+                    continue
+            if not tick_size:
+                if isinstance(price_precision, int):
+                    tick_size = 10 ** (-price_precision) if price_precision and price_precision > 0 else 0.00001
+                else:
+                    price_prec_str = str(info.get('pricePrecision')) if isinstance(info, dict) else ''
+                    if price_prec_str.isdigit():
+                        p = int(price_prec_str)
+                        tick_size = 10 ** (-p) if p > 0 else 0.00001
+        if not tick_size or tick_size <= 0:
+            tick_size = 0.00001
+
+        # Compute step size (robust)
+        step_size = market.get('limits', {}).get('amount', {}).get('min', None)
+        if not step_size:
+            if isinstance(qty_precision, int):
+                step_size = 10 ** (-qty_precision) if qty_precision > 0 else 1.0
+            else:
+                pass
+        else:
+            candidates = []
+            if isinstance(info, dict):
+                candidates = [info.get('quantityIncrement'), info.get('stepSize')]
+            for cand in candidates:
+                if cand is None:
+                    continue
+                try:
+                    step_size = float(cand)
+                    break
+                except Exception:
+                    continue
+        if not step_size or step_size <= 0:
+            step_size = 1.0
+
+        min_qty = market.get('limits', {}).get('amount', {}).get('min', 1.0) or 1.0
+        min_price = market.get('limits', {}).get('price', {}).get('min', 0.00001) or 0.00001
+        max_price = market.get('limits', {}).get('price', {}).get('max', 1000000.0) or 1000000.0
+
+        # Derive decimal precision from tick size
+        try:
+            tick_decimals = max(0, -Decimal(str(tick_size)).as_tuple().exponent)
+        except Exception:
+            tick_decimals = 5
+
+        # Ensure price precision is at least as granular as tick size
+        price_precision = max(int(price_precision) if price_precision is not None else 0, tick_decimals)
+
+        precision_info = {
+            'step_size': step_size,
+            'min_qty': min_qty,
+            'tick_size': tick_size,
+            'min_price': min_price,
+            'max_price': max_price,
+            'qty_precision': max(int(qty_precision) if qty_precision is not None else 0, 0),
+            'price_precision': max(int(price_precision) if price_precision is not None else 5, 1)
+        }
+        return precision_info
+
+    def _install(self, entries_by_type: Dict[str, List[Dict[str, Any]]], refreshed_at: float):
+        for trading_type, entries in entries_by_type.items():
+            if trading_type not in self._index:
+                continue
+            index: Dict[str, Dict[str, Any]] = {}
+            for entry in entries:
+                aliases = (entry.get('symbol'), entry.get('id'), f"{entry.get('base') or ''}{entry.get('quote') or ''}")
+                for alias in aliases:
+                    alias_key = self.key(alias)
+                    if alias_key:
+                        index.setdefault(alias_key, entry['precision'])
+            # Swap in whole dicts so readers never see a half-built index
+            self._entries[trading_type] = entries
+            self._index[trading_type] = index
+        self._refreshed_at = refreshed_at
+
+    def get(self, symbol: str, trading_type: str = 'swap') -> Optional[Dict[str, Any]]:
+        """Cached precision for a symbol in any spelling, or None (never touches the network)"""
+        index = self._index.get(trading_type or 'swap') or {}
+        symbol_key = self.key(symbol)
+        info = index.get(symbol_key)
+        if info is None and symbol_key and not symbol_key.endswith('USDT'):
+            info = index.get(f"{symbol_key}USDT")
+        return info
+
+    def raw_markets(self) -> Optional[Dict[str, Any]]:
+        """The ccxt market table from the last refresh, shared with new clients so they skip load_markets"""
+        return self._raw_markets
+
+    def market_count(self, trading_type: str = 'swap') -> int:
+        return len(self._entries.get(trading_type) or [])
+
+    def is_stale(self) -> bool:
+        return time.time() - self._refreshed_at >= self.ttl
+
+    def load_snapshot(self) -> int:
+        """Preload markets from the snapshot file; returns the number of markets loaded"""
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != self.SNAPSHOT_VERSION:
+                return 0
+            self._install(data.get('types') or {}, float(data.get('refreshed_at') or 0))
+            return sum(len(entries) for entries in self._entries.values())
+        except FileNotFoundError:
+            return 0
+        except Exception as e:
+            logger.warning(f"⚠️ Could not load market snapshot {self.snapshot_path}: {e}")
+            return 0
+
+    def save_snapshot(self) -> bool:
+        """Write the current markets atomically (temp file + rename)"""
+        try:
+            tmp_path = f"{self.snapshot_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': self.SNAPSHOT_VERSION,
+                    'refreshed_at': self._refreshed_at,
+                    'types': self._entries
+                }, f)
+            os.replace(tmp_path, self.snapshot_path)
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ Could not save market snapshot {self.snapshot_path}: {e}")
+            return False
+
+    async def refresh(self, exchange: Optional[ExchangeGateway] = None) -> bool:
+        """Reload every market (one load_markets call covers swap and spot) and persist a snapshot"""
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        async with self._refresh_lock:
+            self._attempted_at = time.time()
+            try:
+                if exchange is None:
+                    if self._gateway is None:
+                        # Market data is public: a keyless client is enough
+                        self._gateway = ExchangeGateway('', '', account_id='markets')
+                    exchange = self._gateway
+                markets = await exchange.load_markets(reload=True)
+            except Exception as e:
+                logger.warning(f"⚠️ Market metadata refresh failed: {e}")
+                return False
+            if markets:
+                self._raw_markets = markets
+
+            entries_by_type: Dict[str, List[Dict[str, Any]]] = {t: [] for t in self.TRADING_TYPES}
+            for symbol, market in (markets or {}).items():
+                trading_type = market.get('type') or 'swap'
+                if trading_type not in entries_by_type:
+                    continue
+                entries_by_type[trading_type].append({
+                    'symbol': symbol,
+                    'id': market.get('id'),
+                    'base': market.get('base'),
+                    'quote': market.get('quote'),
+                    'precision': self.precision_from_market(market)
+                })
+            if not any(entries_by_type.values()):
+                logger.warning("⚠️ Market metadata refresh returned no markets, keeping the previous set")
+                return False
+
+            self._install(entries_by_type, time.time())
+            await asyncio.to_thread(self.save_snapshot)
+            logger.info(f"📏 Market metadata refreshed: " + ", ".join(f"{len(v)} {k}" for k, v in entries_by_type.items()))
+            return True
+
+    async def lookup(self, symbol: str, trading_type: str = 'swap',
+                     exchange: Optional[ExchangeGateway] = None) -> Optional[Dict[str, Any]]:
+        """get() with one refresh on a miss, at most once per MARKET_MISS_REFRESH_SECONDS"""
+        info = self.get(symbol, trading_type)
+        if info is None and time.time() - self._attempted_at >= MARKET_MISS_REFRESH_SECONDS:
+            await self.refresh(exchange)
+            info = self.get(symbol, trading_type)
+        return info
+
+    async def run(self):
+        """Background refresher: reloads markets whenever the snapshot is older than the TTL"""
+        while True:
+            try:
+                if self.is_stale():
+                    await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Market metadata refresher error: {e}")
+            await asyncio.sleep(max(30.0, min(self.ttl, 300.0)))
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._gateway is not None:
+            await self._gateway.close()
+            self._gateway = None
+
+# ================== PRICE SERVICE ==================
+
+class PriceService:
+    """Hot last/mark prices for symbols with open positions or recent signals.
+
+    Every symbol read through ticker() (plus whatever symbols_provider returns, i.e. open
+    positions) is watched until it has been idle for PRICE_WATCH_IDLE_SECONDS. Watched
+    symbols are streamed with ccxt.pro watch_ticker when available; the background loop
+    refreshes the rest with one fetch_tickers call per market type. A read younger than
+    max_age is served from memory, otherwise it falls back to a REST fetch_ticker, and
+    concurrent misses for the same symbol share that one request.
+    """
+
+    def __init__(self, symbols_provider=None, max_age: float = PRICE_MAX_AGE_SECONDS,
+                 idle_seconds: float = PRICE_WATCH_IDLE_SECONDS, poll_interval: float = PRICE_POLL_SECONDS,
+                 streaming: bool = PRICE_STREAMING):
+        self.symbols_provider = symbols_provider
+        self.max_age = max_age
+        self.idle_seconds = idle_seconds
+        self.poll_interval = poll_interval
+        self.streaming = streaming and ccxt_pro is not None
+        self._prices: Dict[Tuple[str, str], Tuple[Dict[str, Any], float]] = {}  # (type, key) -> (ticker, monotonic)
+        self._watched: Dict[Tuple[str, str], Tuple[str, float]] = {}  # (type, key) -> (symbol, last use)
+        self._inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._streams: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._stream_clients: Dict[str, Any] = {}
+        self._gateways: Dict[str, ExchangeGateway] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _slot(symbol: str, trading_type: str) -> Tuple[str, str]:
+        return (trading_type or 'swap', MarketMetadataService.key(symbol))
+
+    def get(self, symbol: str, trading_type: str = 'swap', max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Cached ticker if fresher than max_age (never touches the network)"""
+        cached = self._prices.get(self._slot(symbol, trading_type))
+        if cached is None:
+            return None
+        ticker, updated = cached
+        if time.monotonic() - updated > (self.max_age if max_age is None else max_age):
+            return None
+        return ticker
+
+    def _store(self, trading_type: str, symbol: str, ticker: Dict[str, Any]):
+        if ticker:
+            self._prices[self._slot(symbol, trading_type)] = (ticker, time.monotonic())
+
+    def watch(self, symbol: str, trading_type: str = 'swap'):
+        """Keep a symbol hot (streamed when possible) until it goes idle"""
+        slot = self._slot(symbol, trading_type)
+        if not slot[1]:
+            return
+        self._watched[slot] = (symbol, time.monotonic())
+        if self.streaming and self._task is not None and slot not in self._streams:
+            self._streams[slot] = asyncio.get_running_loop().create_task(self._stream(slot, symbol))
+
+    def _gateway(self, trading_type: str) -> ExchangeGateway:
+        gateway = self._gateways.get(trading_type)
+        if gateway is None:
+            # Prices are public: a keyless client is enough
+            gateway = self._gateways[trading_type] = ExchangeGateway('', '', trading_type, account_id='prices')
+        return gateway
+
+    async def ticker(self, symbol: str, exchange: Optional[ExchangeGateway] = None,
+                     trading_type: Optional[str] = None, max_age: Optional[float] = None) -> Dict[str, Any]:
+        """Drop-in for exchange.fetch_ticker: memory when fresh, otherwise one shared REST call"""
+        trading_type = trading_type or getattr(exchange, 'trading_type', None) or 'swap'
+        self.watch(symbol, trading_type)
+        cached = self.get(symbol, trading_type, max_age)
+        if cached is not None:
+            return cached
+        slot = self._slot(symbol, trading_type)
+        fetch = self._inflight.get(slot)
+        if fetch is None:
+            # A task of its own, so a cancelled caller (e.g. one fan-out leg) never cancels the others' fetch
+            fetch = asyncio.get_running_loop().create_task(
+                self._fetch_ticker(slot, symbol, exchange or self._gateway(trading_type)))
+            fetch.add_done_callback(lambda done: done.cancelled() or done.exception())  # failure seen by no caller is not logged
+            self._inflight[slot] = fetch
+        return await asyncio.shield(fetch)
+
+    async def _fetch_ticker(self, slot: Tuple[str, str], symbol: str, exchange: ExchangeGateway) -> Dict[str, Any]:
+        try:
+            ticker = await exchange.fetch_ticker(symbol)
+            self._store(slot[0], symbol, ticker)
+            return ticker
+        finally:
+            self._inflight.pop(slot, None)
+
+    async def _stream(self, slot: Tuple[str, str], symbol: str):
+        """watch_ticker loop for one symbol; ends when the symbol goes idle"""
+        trading_type = slot[0]
+        failures = 0
+        try:
+            while slot in self._watched:
+                try:
+                    client = self._stream_clients.get(trading_type)
+                    if client is None:
+                        client = self._stream_clients[trading_type] = ccxt_pro.bingx({
+                            'options': {'defaultType': trading_type},
+                            'enableRateLimit': True
+                        })
+                    ticker = await client.watch_ticker(symbol)
+                    self._store(trading_type, symbol, ticker)
+                    failures = 0
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    # The REST poller covers the symbol while the stream is down
+                    failures += 1
+                    logger.debug(f"Price stream for {symbol} ({trading_type}) failed: {e}")
+                    await asyncio.sleep(min(60.0, 2.0 ** failures))
+        finally:
+            self._streams.pop(slot, None)
+
+    async def _poll_stale(self):
+        """Refresh watched symbols that have no fresh price, one fetch_tickers per market type"""
+        by_type: Dict[str, List[str]] = {}
+        for (trading_type, _), (symbol, _) in list(self._watched.items()):
+            if self.get(symbol, trading_type, self.poll_interval) is None:
+                by_type.setdefault(trading_type, []).append(symbol)
+        for trading_type, symbols in by_type.items():
+            try:
+                tickers = await self._gateway(trading_type).fetch_tickers(symbols)
+            except Exception as e:
+                logger.debug(f"Price refresh for {len(symbols)} {trading_type} symbols failed: {e}")
+                continue
+            for symbol, ticker in (tickers or {}).items():
+                self._store(trading_type, symbol, ticker)
+
+    def _expire_idle(self):
+        now = time.monotonic()
+        if self.symbols_provider is not None:
+            try:
+                for symbol, trading_type in self.symbols_provider():
+                    slot = self._slot(symbol, trading_type)
+                    if slot not in self._watched:
+                        self.watch(symbol, trading_type)
+                    else:
+                        self._watched[slot] = (self._watched[slot][0], now)
+            except Exception as e:
+                logger.debug(f"Price symbols provider failed: {e}")
+        for slot, (_, last_use) in list(self._watched.items()):
+            if now - last_use > self.idle_seconds:
+                del self._watched[slot]
+                self._prices.pop(slot, None)
+                stream = self._streams.pop(slot, None)
+                if stream is not None:
+                    stream.cancel()
+
+    async def run(self):
+        while True:
+            try:
+                self._expire_idle()
+                await self._poll_stale()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Price service error: {e}")
+            await asyncio.sleep(max(1.0, self.poll_interval))
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+            if self.streaming:
+                for slot, (symbol, _) in list(self._watched.items()):
+                    if slot not in self._streams:
+                        self._streams[slot] = asyncio.get_running_loop().create_task(self._stream(slot, symbol))
+            logger.info(f"💹 Price service started ({'streaming' if self.streaming else 'REST polling'})")
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for stream in list(self._streams.values()):
+            stream.cancel()
+        self._streams.clear()
+        for client in list(self._stream_clients.values()):
+            try:
+                await client.close()
+            except Exception as e:
+                logger.debug(f"Price stream client close error: {e}")
+        self._stream_clients.clear()
+        for gateway in list(self._gateways.values()):
+            await gateway.close()
+        self._gateways.clear()
+
+# ================== POSITION BOOK ==================
+
+class PositionStore:
+    """Position persistence backend. The base class keeps nothing (POSITION_STORE=memory)"""
+
+    def load(self) -> List[ActivePosition]:
+        return []
+
+    def save(self, position: ActivePosition):
+        pass
+
+    def delete(self, account_id: Optional[str], symbol: str):
+        pass
+
+class SQLitePositionStore(PositionStore):
+    """Persists positions in the enhanced database so the book survives restarts"""
+
+    def __init__(self, db: EnhancedDatabase):
+        self.db = db
+
+    def load(self) -> List[ActivePosition]:
+        return self.db.get_active_positions()
+
+    def save(self, position: ActivePosition):
+        self.db.save_active_position(position)
+
+    def delete(self, account_id: Optional[str], symbol: str):
+        self.db.delete_active_position(account_id, symbol)
+
+class PositionBook:
+    """Open positions keyed by (account_id, symbol).
+
+    Two accounts holding the same symbol no longer overwrite each other, and a per-account
+    index lets the order monitor reconcile one account at a time. Every mutation is written
+    through to the store; callers that change a position in place call save().
+    """
+
+    def __init__(self, store: Optional[PositionStore] = None):
+        self.store = store or PositionStore()
+        self._positions: Dict[Tuple[str, str], ActivePosition] = {}
+        self._by_account: Dict[str, Dict[str, ActivePosition]] = {}
+
+    def load(self) -> int:
+        """Replace the in-memory book with the store's contents"""
+        self._positions.clear()
+        self._by_account.clear()
+        for position in self.store.load():
+            self._index(position)
+        return len(self._positions)
+
+    def _index(self, position: ActivePosition):
+        account_key = position.account_id or ""
+        self._positions[(account_key, position.symbol)] = position
+        self._by_account.setdefault(account_key, {})[position.symbol] = position
+
+    def get(self, account_id: Optional[str], symbol: str) -> Optional[ActivePosition]:
+        return self._positions.get((account_id or "", symbol))
+
+    def put(self, position: ActivePosition) -> ActivePosition:
+        """Track (or replace) the account's position in this symbol"""
+        self._index(position)
+        self.store.save(position)
+        return position
+
+    def save(self, position: ActivePosition):
+        """Persist in-place changes to a tracked position"""
+        if self.get(position.account_id, position.symbol) is position:
+            self.store.save(position)
+
+    def remove(self, account_id: Optional[str], symbol: str) -> Optional[ActivePosition]:
+        account_key = account_id or ""
+        position = self._positions.pop((account_key, symbol), None)
+        if position is not None:
+            account_positions = self._by_account.get(account_key)
+            if account_positions is not None:
+                account_positions.pop(symbol, None)
+                if not account_positions:
+                    del self._by_account[account_key]
+            self.store.delete(account_key, symbol)
+        return position
+
+    def discard(self, position: ActivePosition) -> bool:
+        """Remove the position only if it is still the tracked one (not a newer replacement)"""
+        if self.get(position.account_id, position.symbol) is not position:
+            return False
+        self.remove(position.account_id, position.symbol)
+        return True
+
+    def for_account(self, account_id: Optional[str]) -> List[ActivePosition]:
+        return list(self._by_account.get(account_id or "", {}).values())
+
+    def accounts(self) -> List[str]:
+        return list(self._by_account)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __iter__(self):
+        return iter(list(self._positions.values()))
+
+# ================== PIPELINE METRICS ==================
+
+class LatencyHistogram:
+    """Cumulative-bucket histogram per label set, rendered in Prometheus text format"""
+
+    DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...],
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List[float]] = {}  # labels -> bucket counts + [sum, count]
+
+    def observe(self, seconds: float, *label_values: str):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [0.0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                series[i] += 1
+        series[-2] += seconds
+        series[-1] += 1
+
+    @staticmethod
+    def _labels(names, values, extra: str = '') -> str:
+        pairs = [f'{n}="{str(v)}"' for n, v in zip(names, values)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for values, series in sorted(self._series.items()):
+            for bound, count in zip(self.buckets, series):
+                bucket_labels = self._labels(self.label_names, values, 'le="%g"' % bound)
+                lines.append(f"{self.name}_bucket{bucket_labels} {count:g}")
+            inf_labels = self._labels(self.label_names, values, 'le="+Inf"')
+            labels = self._labels(self.label_names, values)
+            lines.append(f"{self.name}_bucket{inf_labels} {series[-1]:g}")
+            lines.append(f"{self.name}_sum{labels} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{labels} {series[-1]:g}")
+        return lines
+
+class PipelineMetrics:
+    """Histograms and gauges for the signal-to-order pipeline plus a local /metrics endpoint"""
+
+    def __init__(self, host: str = METRICS_HOST, port: int = METRICS_PORT):
+        self.host = host
+        self.port = port
+        self.stage_seconds = LatencyHistogram(
+            'signal_stage_seconds', 'Time spent in each signal pipeline stage (since the previous stage)',
+            ('stage', 'source'))
+        self.elapsed_seconds = LatencyHistogram(
+            'signal_elapsed_seconds', 'Time from message arrival to the end of each pipeline stage',
+            ('stage', 'source'))
+        self.delivery_lag_seconds = LatencyHistogram(
+            'signal_delivery_lag_seconds', 'Telegram message timestamp to arrival at the bot (1s resolution)',
+            ('source',))
+        self.protection_seconds = LatencyHistogram(
+            'position_time_to_protected_seconds', 'Entry order ack to every SL/TP/trailing order accepted',
+            ('outcome',))
+        self._gauges: Dict[str, Tuple[str, Dict[Tuple[Tuple[str, str], ...], float]]] = {}
+        self._runner = None
+
+    def set_gauge(self, name: str, value: float, help_text: str = '', **labels):
+        _, series = self._gauges.setdefault(name, (help_text, {}))
+        series[tuple(sorted(labels.items()))] = float(value)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for histogram in (self.stage_seconds, self.elapsed_seconds, self.delivery_lag_seconds, self.protection_seconds):
+            lines.extend(histogram.render())
+        for name, (help_text, series) in sorted(self._gauges.items()):
+            lines.append(f"# HELP {name} {help_text or name}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in sorted(series.items()):
+                names = tuple(k for k, _ in labels)
+                lines.append(f"{name}{LatencyHistogram._labels(names, tuple(v for _, v in labels))} {value:g}")
+        return '\n'.join(lines) + '\n'
+
+    async def _handle_metrics(self, request):
+        return web.Response(text=self.render(), headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
+
+    async def start(self):
+        if self.port <= 0 or self._runner is not None:
+            return
+        try:
+            app = web.Application()
+            app.router.add_get('/metrics', self._handle_metrics)
+            runner = web.AppRunner(app, access_log=None)
+            await runner.setup()
+            await web.TCPSite(runner, self.host, self.port).start()
+            self._runner = runner
+            logger.info(f"📈 Metrics endpoint listening on http://{self.host}:{self.port}/metrics")
+        except Exception as e:
+            logger.error(f"❌ Failed to start metrics endpoint: {e}")
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+# Trace of the signal being handled by the current task (fan-out legs each get a fork)
+_current_trace: contextvars.ContextVar = contextvars.ContextVar('signal_trace', default=None)
+
+class SignalTrace:
+    """Per-signal spans: each mark() records the stage duration and the elapsed time since arrival"""
+
+    def __init__(self, metrics: PipelineMetrics, source: str, received_at: float, message=None):
+        self.metrics = metrics
+        self.source = source
+        self.received_at = received_at
+        self.last_mark = received_at
+        self.stages: List[Tuple[str, float]] = []
+        msg_date = getattr(message, 'date', None)
+        if isinstance(msg_date, datetime):
+            if msg_date.tzinfo is None:
+                msg_date = msg_date.replace(tzinfo=timezone.utc)
+            lag = (datetime.now(timezone.utc) - msg_date).total_seconds() - (time.perf_counter() - received_at)
+            metrics.delivery_lag_seconds.observe(max(0.0, lag), source)
+
+    def mark(self, stage: str):
+        now = time.perf_counter()
+        self.metrics.stage_seconds.observe(now - self.last_mark, stage, self.source)
+        self.metrics.elapsed_seconds.observe(now - self.received_at, stage, self.source)
+        self.stages.append((stage, now - self.last_mark))
+        self.last_mark = now
+
+    def fork(self) -> 'SignalTrace':
+        """Independent copy for one fan-out leg, continuing from the current mark"""
+        child = SignalTrace.__new__(SignalTrace)
+        child.metrics, child.source, child.received_at = self.metrics, self.source, self.received_at
+        child.last_mark, child.stages = self.last_mark, list(self.stages)
+        return child
+
+    def summary(self) -> str:
+        return ' → '.join(f"{stage} {seconds * 1000.0:.0f}ms" for stage, seconds in self.stages)
+
+def mark_stage(stage: str):
+    """Record a pipeline stage on the current task's trace (no-op outside a traced signal)"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.mark(stage)
+
+# ================== SIGNAL DEDUPLICATION ==================
+
+class SignalDeduplicator:
+    """Idempotent signal intake: each message is processed once, each signal executed once per account.
+
+    Two keys are tracked, both in a bounded LRU in front of SQLite so restarts keep them:
+      * (channel_id, message_id): a message re-seen after a reconnect or by a second account
+        client of the same channel is dropped before parsing
+      * (account_id, fingerprint): the same trade cross-posted to several channels (same symbol,
+        side, entry, TPs and SL) is executed once per account within the dedup window
+    """
+
+    def __init__(self, db: EnhancedDatabase, window_seconds: float = SIGNAL_DEDUP_WINDOW_SECONDS,
+                 capacity: int = SIGNAL_DEDUP_CACHE_SIZE,
+                 message_retention_hours: float = SIGNAL_DEDUP_MESSAGE_RETENTION_HOURS):
+        self.db = db
+        self.window_seconds = max(0.0, float(window_seconds))
+        self.capacity = max(16, int(capacity))
+        self.message_retention_seconds = max(self.window_seconds, float(message_retention_hours) * 3600)
+        self._messages: Dict[Tuple[str, int], float] = {}
+        self._signals: Dict[Tuple[str, str], float] = {}
+        self._next_prune = 0.0
+
+    @staticmethod
+    def _price(value: Any) -> str:
+        try:
+            return f"{float(value):.8g}"
+        except (TypeError, ValueError):
+            return ""
+
+    @classmethod
+    def fingerprint(cls, signal: TradingSignal) -> str:
+        """Stable hash of normalized symbol, side, entry, take profits and stop loss"""
+        side = str(signal.trade_type or '').upper()
+        side = {'BUY': 'LONG', 'SELL': 'SHORT'}.get(side, side)
+        parts = [
+            MarketMetadataService.key(signal.symbol),
+            side,
+            cls._price(signal.entry_price),
+            ','.join(cls._price(tp) for tp in sorted(float(tp) for tp in (signal.take_profit or []))),
+            cls._price(signal.stop_loss),
+        ]
+        return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()
+
+    def _remember(self, cache: Dict, key, now: float):
+        cache.pop(key, None)
+        cache[key] = now
+        if len(cache) > self.capacity:
+            # dicts keep insertion order: the first key is the least recently seen
+            del cache[next(iter(cache))]
+
+    def claim_message(self, channel_id: str, message_id: Optional[int]) -> bool:
+        """True for the first caller that claims this message"""
+        if message_id is None:
+            return True
+        key = (str(channel_id), int(message_id))
+        if key in self._messages:
+            return False
+        now = time.time()
+        claimed = self.db.claim_processed_message(key[0], key[1], now)
+        self._remember(self._messages, key, now)
+        self._maybe_prune(now)
+        return claimed
+
+    def claim_signal(self, account_id: str, fingerprint: str, channel_id: Optional[str] = None,
+                     message_id: Optional[int] = None) -> bool:
+        """True if this account has not executed the same signal within the window"""
+        now = time.time()
+        key = (account_id or '', fingerprint)
+        last = self._signals.get(key)
+        if last is not None and now - last < self.window_seconds:
+            return False
+        if not self.db.claim_signal_fingerprint(key[0], fingerprint, channel_id, message_id, now, self.window_seconds):
+            return False
+        self._remember(self._signals, key, now)
+        return True
+
+    def _maybe_prune(self, now: float):
+        if now < self._next_prune:
+            return
+        self._next_prune = now + 3600
+        self.db.prune_signal_dedup(now - self.message_retention_seconds, now - self.window_seconds)
+
+# ================== SIGNAL PIPELINE ==================
+
+@dataclass
+class PipelineItem:
+    """A channel message moving through the signal pipeline; later stages fill in the rest"""
+    message: Any
+    channel_id: str
+    user_id: int
+    account_id: Optional[str]
+    received_at: float  # time.perf_counter() at arrival, used for expiry and latency
+    source: str
+    trace: Optional[SignalTrace] = None
+    signal: Optional[TradingSignal] = None
+    origin: Optional[AccountConfig] = None  # account whose client ingested the message
+    config: Optional[BotConfig] = None
+    account: Optional[AccountConfig] = None  # execute stage: account placing the trade
+
+class PipelineStage:
+    """A bounded asyncio.Queue drained by a fixed number of worker tasks.
+
+    put() waits while the queue is full, which is what pushes back on the stage before it.
+    Items older than max_age seconds (by received_at) go to on_expired instead of the handler.
+    """
+
+    def __init__(self, name: str, handler, workers: int = 1, maxsize: int = PIPELINE_QUEUE_SIZE,
+                 max_age: float = 0.0, on_expired=None, on_depth=None, labels: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.max_age = max_age
+        self.on_expired = on_expired
+        self.on_depth = on_depth
+        self.labels = labels or {}
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, maxsize))
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        if not self._tasks:
+            loop = asyncio.get_running_loop()
+            self._tasks = [loop.create_task(self._work()) for _ in range(self.workers)]
+
+    async def put(self, item):
+        self.start()
+        await self.queue.put(item)
+        self._report_depth()
+
+    def offer(self, item) -> bool:
+        """Enqueue without waiting; False when the queue is full"""
+        self.start()
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            return False
+        self._report_depth()
+        return True
+
+    def _report_depth(self):
+        if self.on_depth is not None:
+            self.on_depth(self)
+
+    async def _work(self):
+        while True:
+            item = await self.queue.get()
+            self._report_depth()
+            try:
+                received_at = getattr(item, 'received_at', None)
+                if self.max_age > 0 and received_at is not None and time.perf_counter() - received_at > self.max_age:
+                    if self.on_expired is not None:
+                        self.on_expired(self.name, item)
+                else:
+                    await self.handler(item)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Pipeline {self.name} worker error: {e}")
+                logger.error(traceback.format_exc())
+            finally:
+                self.queue.task_done()
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def __len__(self) -> int:
+        return self.queue.qsize()
+
+class SignalPipeline:
+    """Staged processing of channel messages: parse -> route -> execute (one queue per account) -> notify.
+
+    Ingestion only enqueues, so a slow exchange call never stalls channel polling. Every stage
+    has its own bounded queue and workers: a full parse, route or execute queue makes the stage
+    before it wait, while notifications are dropped when their queue is full. Signals older than
+    max_age when they reach route or execute are dropped. Queue depths and drop counts are
+    exported as gauges on the metrics endpoint.
+    """
+
+    def __init__(self, metrics: PipelineMetrics, parse, route, execute, on_expired=None,
+                 parse_workers: int = PIPELINE_PARSE_WORKERS, route_workers: int = PIPELINE_ROUTE_WORKERS,
+                 execute_workers: int = PIPELINE_EXECUTE_WORKERS, notify_workers: int = PIPELINE_NOTIFY_WORKERS,
+                 queue_size: int = PIPELINE_QUEUE_SIZE, max_age: float = PIPELINE_SIGNAL_MAX_AGE_SECONDS):
+        self.metrics = metrics
+        self.on_expired = on_expired
+        self.execute_handler = execute
+        self.execute_workers = execute_workers
+        self.queue_size = queue_size
+        self.max_age = max_age
+        self.dropped: Dict[Tuple[str, str], int] = {}
+        self.parse = PipelineStage('parse', parse, parse_workers, queue_size, on_depth=self._report_depth)
+        self.route = PipelineStage('route', route, route_workers, queue_size, max_age, self._expired, self._report_depth)
+        self.notify = PipelineStage('notify', self._run_notification, notify_workers, queue_size,
+                                    on_depth=self._report_depth)
+        self.executors: Dict[str, PipelineStage] = {}
+
+    async def submit(self, item: PipelineItem):
+        """Ingest: queue a raw message for parsing (waits while the parse queue is full)"""
+        await self.parse.put(item)
+
+    async def forward(self, item: PipelineItem):
+        """Queue a parsed signal for routing"""
+        await self.route.put(item)
+
+    async def execute(self, key: str, item: PipelineItem):
+        """Queue a trade on the executor of one account (created on first use)"""
+        stage = self.executors.get(key)
+        if stage is None:
+            stage = self.executors[key] = PipelineStage(
+                'execute', self.execute_handler, self.execute_workers, self.queue_size,
+                self.max_age, self._expired, self._report_depth, labels={'account': key})
+        await stage.put(item)
+
+    def notify_later(self, job) -> bool:
+        """Queue a notification (a zero-argument coroutine function); dropped when the queue is full"""
+        if self.notify.offer(job):
+            return True
+        self._drop('notify', 'queue_full')
+        return False
+
+    @staticmethod
+    async def _run_notification(job):
+        await job()
+
+    def _expired(self, stage: str, item: PipelineItem):
+        self._drop(stage, 'expired')
+        if self.on_expired is not None:
+            self.on_expired(stage, item)
+
+    def _drop(self, stage: str, reason: str):
+        key = (stage, reason)
+        self.dropped[key] = self.dropped.get(key, 0) + 1
+        self.metrics.set_gauge('pipeline_dropped_items', self.dropped[key],
+                               'Items dropped by the signal pipeline since start', stage=stage, reason=reason)
+
+    def _report_depth(self, stage: PipelineStage):
+        self.metrics.set_gauge('pipeline_queue_depth', len(stage), 'Items waiting in a signal pipeline queue',
+                               stage=stage.name, **stage.labels)
+
+    def stages(self) -> List[PipelineStage]:
+        return [self.parse, self.route, *self.executors.values(), self.notify]
+
+    async def join(self):
+        """Wait until every queue is drained, including items queued by earlier stages meanwhile"""
+        while True:
+            for stage in self.stages():
+                await stage.queue.join()
+            if not any(len(stage) for stage in self.stages()):
+                return
+
+    async def close(self, drain_timeout: float = 5.0):
+        """Give queued trades and notices a moment to finish, then stop every stage's workers"""
+        try:
+            await asyncio.wait_for(self.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ Signal pipeline still busy after {drain_timeout:.0f}s, dropping {sum(len(stage) for stage in self.stages())} queued items")
+        await asyncio.gather(*(stage.close() for stage in self.stages()), return_exceptions=True)
+
+# ================== CHANNEL INGESTION HUB ==================
+
+class ChannelIngestionHub:
+    """Designates one account client per distinct monitored channel.
+
+    Every account client that resolved a channel joins as a candidate, but only the channel's
+    owner polls it and handles its NewMessage events, so MTProto reads and parsing grow with
+    distinct channels rather than accounts x channels; the router fans the parsed signal out to
+    every subscribed account. Owners are spread across clients, and when an owner becomes
+    unavailable (disconnected or stopped) the next candidate to check in takes the channel over
+    and resumes from the shared per-channel cursor.
+    """
+
+    CURSOR_KEY = '*'  # channel_cursors account_id of the shared per-channel cursors
+
+    def __init__(self, is_available=None):
+        self.is_available = is_available or (lambda account_id: True)
+        self.last_message_ids: Dict[str, int] = {}  # channel_id -> last message id ingested by any client
+        self._candidates: Dict[str, Dict[str, Any]] = {}  # channel_id -> {account_id: resolved entity}
+        self._owners: Dict[str, str] = {}  # channel_id -> account_id
+        self.catching_up: Set[str] = set()  # channels whose missed range exceeded one catch-up page
+        self._unhandled: Dict[str, Dict[int, bool]] = {}  # channel_id -> ingested message ids in order -> handled
+
+    def join(self, account_id: str, entities: Dict[str, Any]):
+        """Make an account a candidate for exactly the given (resolved) channels"""
+        for channel_id in [ch for ch in self._candidates if ch not in entities]:
+            self._drop(channel_id, account_id)
+        for channel_id, entity in entities.items():
+            self._candidates.setdefault(channel_id, {})[account_id] = entity
+
+    def leave(self, account_id: str):
+        for channel_id in list(self._candidates):
+            self._drop(channel_id, account_id)
+
+    def _drop(self, channel_id: str, account_id: str):
+        candidates = self._candidates.get(channel_id)
+        if not candidates or account_id not in candidates:
+            return
+        del candidates[account_id]
+        if self._owners.get(channel_id) == account_id:
+            del self._owners[channel_id]
+        if not candidates:
+            # Nobody reads the channel any more: the persisted cursor takes over on the next join
+            del self._candidates[channel_id]
+            self.last_message_ids.pop(channel_id, None)
+            self.catching_up.discard(channel_id)
+
+    def owner(self, channel_id: str) -> Optional[str]:
+        """Account whose client consumes the channel, electing (or failing over to) one if needed"""
+        candidates = self._candidates.get(channel_id)
+        if not candidates:
+            return None
+        current = self._owners.get(channel_id)
+        if current in candidates and self.is_available(current):
+            return current
+        available = [account_id for account_id in candidates if account_id != current and self.is_available(account_id)]
+        if not available:
+            return current if current in candidates else None
+        load: Dict[str, int] = {}
+        for owner in self._owners.values():
+            load[owner] = load.get(owner, 0) + 1
+        elected = min(available, key=lambda account_id: (load.get(account_id, 0), account_id))
+        self._owners[channel_id] = elected
+        if current:
+            logger.warning(f"🔀 Channel {channel_id} failed over from account {current[:8]} to {elected[:8]}")
+        return elected
+
+    def owned(self, account_id: str) -> Dict[str, Any]:
+        """Channels (with their entities) this account's client must consume"""
+        return {channel_id: candidates[account_id] for channel_id, candidates in list(self._candidates.items())
+                if account_id in candidates and self.owner(channel_id) == account_id}
+
+    def ingested(self, channel_id: str, message_id: int):
+        """Track a message handed to the parse stage until handled() is called for it"""
+        self._unhandled.setdefault(channel_id, {})[message_id] = False
+
+    def handled(self, channel_id: str, message_id: int) -> Optional[int]:
+        """Mark a message handled (or deliberately skipped) and return the id the persisted cursor may
+        move to: the last one of the handled run at the front of the channel, or None while an earlier
+        message still waits in the pipeline"""
+        pending = self._unhandled.setdefault(channel_id, {})
+        pending[message_id] = True
+        watermark = None
+        while pending:
+            first = next(iter(pending))
+            if not pending[first]:
+                break
+            del pending[first]
+            watermark = first
+        if not pending:
+            del self._unhandled[channel_id]
+        return watermark
+
+    def __len__(self) -> int:
+        return len(self._candidates)
+
+# ================== STARTUP ORCHESTRATION ==================
+
+@dataclass
+class AccountStartup:
+    """Outcome of bringing one account up; times are seconds since the orchestration started"""
+    account_id: str
+    account_name: str
+    user_id: int
+    ready: bool = False
+    exchange_ready: bool = False
+    connected_seconds: Optional[float] = None
+    listening_seconds: Optional[float] = None
+    error: str = ''
+
+class StartupOrchestrator:
+    """Starts monitoring for many accounts concurrently.
+
+    Each account connects its Telethon client, binds and warms its pooled exchange client and
+    waits until its channel handlers are registered. At most `concurrency` accounts are in
+    flight, and Telethon connects are spaced `stagger_seconds` apart so a mass start does not
+    trip FloodWait on logins and entity lookups.
+    """
+
+    def __init__(self, trading_bot, concurrency: int = STARTUP_CONCURRENCY,
+                 stagger_seconds: float = STARTUP_STAGGER_SECONDS,
+                 account_timeout: float = STARTUP_ACCOUNT_TIMEOUT_SECONDS):
+        self.trading_bot = trading_bot
+        self.concurrency = max(1, concurrency)
+        self.stagger_seconds = stagger_seconds
+        self.account_timeout = account_timeout
+        self.last_reports: List[AccountStartup] = []
+        self._pace_lock: Optional[asyncio.Lock] = None
+        self._next_connect = 0.0
+
+    async def _pace(self):
+        """Wait for this account's turn to open a Telethon connection"""
+        if self.stagger_seconds <= 0:
+            return
+        if self._pace_lock is None:
+            self._pace_lock = asyncio.Lock()
+        async with self._pace_lock:
+            delay = self._next_connect - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_connect = time.monotonic() + self.stagger_seconds
+
+    async def _start_account(self, account: AccountConfig, bot_instance, semaphore: asyncio.Semaphore,
+                             started: float) -> AccountStartup:
+        tb = self.trading_bot
+        report = AccountStartup(account.account_id, account.account_name, account.user_id)
+        async with semaphore:
+            slot_started = time.perf_counter()
+            exchange_task = None
+            try:
+                if account.bingx_api_key and account.bingx_secret_key:
+                    exchange_task = asyncio.create_task(tb.exchange_pool.prewarm([account]))
+                await self._pace()
+                listening = tb.listening_event(account.account_id)
+                ok = await asyncio.wait_for(tb.start_monitoring(account.user_id, bot_instance, account=account),
+                                            timeout=self.account_timeout)
+                report.connected_seconds = time.perf_counter() - started
+                if not ok:
+                    report.error = 'Telethon client not connected or not authorized'
+                else:
+                    tb.monitoring_status[account.user_id] = True
+                    remaining = self.account_timeout - (time.perf_counter() - slot_started)
+                    await asyncio.wait_for(listening.wait(), timeout=max(0.1, remaining))
+                    report.listening_seconds = time.perf_counter() - started
+                    report.ready = True
+                if exchange_task is not None:
+                    report.exchange_ready = (await exchange_task) == 1
+            except asyncio.TimeoutError:
+                report.error = f'not listening after {self.account_timeout:.0f}s'
+            except Exception as e:
+                report.error = str(e)
+                logger.error(f"❌ Error starting monitoring for account {account.account_id}: {e}")
+                logger.error(traceback.format_exc())
+            if exchange_task is not None and exchange_task.done() and not exchange_task.cancelled():
+                report.exchange_ready = exchange_task.exception() is None and exchange_task.result() == 1
+        return report
+
+    async def start(self, accounts: List[AccountConfig], bot_instance,
+                    owner_id: Optional[int] = None) -> List[AccountStartup]:
+        """Start every account (optionally claiming them for `owner_id`) and report readiness per account"""
+        tb = self.trading_bot
+        if not accounts:
+            return []
+        for account in accounts:
+            if owner_id and int(account.user_id or 0) != int(owner_id):
+                tb.enhanced_db.update_account_user_id(account.account_id, owner_id)
+                account.user_id = owner_id
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        logger.info(f"🚀 Starting {len(accounts)} accounts (concurrency {self.concurrency}, "
+                    f"stagger {self.stagger_seconds:g}s)")
+        reports = list(await asyncio.gather(
+            *(self._start_account(acc, bot_instance, semaphore, started) for acc in accounts)))
+        elapsed = time.perf_counter() - started
+
+        ready = [r for r in reports if r.ready]
+        for r in reports:
+            if r.ready:
+                logger.info(f"✅ Account {r.account_name} listening after {r.listening_seconds:.2f}s "
+                            f"(connected {r.connected_seconds:.2f}s, exchange {'warm' if r.exchange_ready else 'cold'})")
+                tb.metrics.set_gauge('startup_account_listening_seconds', r.listening_seconds,
+                                     'Seconds from startup until the account was listening', account=r.account_id)
+            else:
+                logger.error(f"❌ Account {r.account_name} not started: {r.error}")
+        all_listening = max((r.listening_seconds for r in ready), default=elapsed)
+        tb.metrics.set_gauge('startup_all_listening_seconds', all_listening,
+                             'Seconds from startup until the last started account was listening')
+        tb.metrics.set_gauge('startup_accounts_listening', len(ready), 'Accounts listening after the last startup')
+        logger.info(f"🏁 {len(ready)}/{len(reports)} accounts listening in {all_listening:.2f}s "
+                    f"(orchestration took {elapsed:.2f}s)")
+        self.last_reports = reports
+        return reports
+
 class TradingBot:
     def __init__(self):
         self.config = BotConfig()
-        self.exchange: Optional[ccxt.Exchange] = None
+        self.exchange: Optional[ExchangeGateway] = None
         self.user_monitoring_clients: Dict[int, TelegramClient] = {}
         self.user_data: Dict[int, BotConfig] = {}
         self.active_monitoring = {}  # Deprecated - use account_monitoring_status instead
         self.monitoring_tasks: Dict[str, Any] = {}  # account_id -> monitoring task
         self.webhook_loggers: Dict[int, MakeWebhookLogger] = {}
-        self.symbol_info_cache: Dict[str, Dict] = {}
-        self.active_positions: Dict[str, ActivePosition] = {}
         self.order_monitor_running = False
         self.bot_instances: Dict[int, Any] = {}  # Store bot instance per user for notifications
+        self.telethon_event_handlers: Dict[str, Tuple[Any, Any]] = {}  # account_id -> (handler, event builder)
+        self.listening: Dict[str, asyncio.Event] = {}  # account_id -> set while its channel handlers are registered
+        self.signal_latency_samples: deque = deque(maxlen=500)  # (account_id, source, receive_lag_ms, order_latency_ms)
+        self.parse_time_samples: deque = deque(maxlen=1000)  # parse_trading_signal cost in µs
+        self._fanout_semaphore: Optional[asyncio.Semaphore] = None
+        self._trade_locks: Dict[Tuple[str, str], asyncio.Lock] = {}  # (account_id, symbol) -> cooldown check + order
         
         # Enhanced multi-account support
         self.enhanced_db = EnhancedDatabase()
+        self.signal_dedup = SignalDeduplicator(self.enhanced_db)
+        self.metrics = PipelineMetrics()
+        self.startup = StartupOrchestrator(self)
+        self.ingestion = ChannelIngestionHub(self._ingestion_client_ready)
+        self.pipeline = SignalPipeline(self.metrics, parse=self._parse_ingested, route=self._route_signal,
+                                       execute=self._execute_signal, on_expired=self._signal_expired)
         self.current_account = None
-        self.account_exchanges: Dict[str, ccxt.Exchange] = {}
+        self.exchange_pool = ExchangeClientPool(on_evict=self._detach_exchange)
+        position_store = SQLitePositionStore(self.enhanced_db) if POSITION_STORE == 'sqlite' else PositionStore()
+        self.active_positions = PositionBook(position_store)
+        snapshot_path = MARKET_SNAPSHOT_PATH or os.path.join(
+            os.path.dirname(os.path.abspath(self.enhanced_db.db_path)), 'market_snapshot.json')
+        self.market_metadata = MarketMetadataService(snapshot_path)
+        self.exchange_pool.markets_provider = self.market_metadata.raw_markets
+        self.prices = PriceService(self._position_price_symbols)
+        preloaded_markets = self.market_metadata.load_snapshot()
+        if preloaded_markets:
+            logger.info(f"📏 Preloaded {preloaded_markets} markets from {snapshot_path}")
+        self.webhook_delivery = WebhookDeliveryQueue(WEBHOOK_SPOOL_PATH or os.path.join(
+            os.path.dirname(os.path.abspath(self.enhanced_db.db_path)), 'webhook_spool.jsonl'))
+        restored_positions = self.active_positions.load()
+        if restored_positions:
+            logger.info(f"📍 Restored {restored_positions} active positions from {POSITION_STORE} store")
         
         # User session management
         self.authenticated_users: Dict[int, bool] = {}
@@ -1864,42 +4411,46 @@ class TradingBot:
         return self.authenticated_users.get(user_id, False)
     
     def get_current_account(self, user_id: int) -> Optional[AccountConfig]:
-        """Get current account for user - always fresh from database"""
+        """Get current account for user from the account registry (kept in sync with the database)"""
         account_id = self.current_accounts.get(user_id)
         if not account_id:
             return None
-        
-        # Always reload from database to ensure we have latest settings
-        accounts = self.enhanced_db.get_all_accounts()
-        for account in accounts:
-            if account.account_id == account_id:
-                return account
-        return None
+        return self.enhanced_db.get_account(account_id)
     
     def set_current_account(self, user_id: int, account_id: str) -> bool:
         """Set current account for user and bind per-account exchange client"""
-        accounts = self.enhanced_db.get_all_accounts()
-        for account in accounts:
-            if account.account_id == account_id:
-                self.current_accounts[user_id] = account_id
-                # Update the user_id in the database for persistence
-                self.enhanced_db.update_account_user_id(account_id, user_id)
-                # Prepare a dedicated ccxt client for this account using its BingX keys
-                try:
-                    if account.bingx_api_key and account.bingx_secret_key:
-                        trading_type = getattr(account, 'trading_type', 'swap')  # Default to swap for backwards compatibility
-                        self.account_exchanges[account.account_id] = ccxt.bingx({
-                            'apiKey': account.bingx_api_key,
-                            'secret': account.bingx_secret_key,
-                            'options': {'defaultType': trading_type},
-                            'enableRateLimit': True,
-                            'timeout': 60000
-                        })
-                        logger.info(f"✅ Bound BingX client to account {account.account_name} (type: {trading_type})")
-                except Exception as e:
-                    logger.warning(f"⚠️ Failed to bind exchange for account {account.account_name}: {e}")
-                return True
-        return False
+        account = self.enhanced_db.get_account(account_id)
+        if not account:
+            return False
+        self.current_accounts[user_id] = account_id
+        # Update the user_id in the database for persistence (skip the write when unchanged)
+        if int(account.user_id or 0) != int(user_id):
+            self.enhanced_db.update_account_user_id(account_id, user_id)
+        # Prepare a dedicated async gateway for this account using its BingX keys
+        try:
+            if account.bingx_api_key and account.bingx_secret_key:
+                self.bind_account_exchange(account)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to bind exchange for account {account.account_name}: {e}")
+        return True
+
+    def _ingestion_client_ready(self, account_id: str) -> bool:
+        """Whether an account's Telethon client can consume channels for the ingestion hub"""
+        client = self.user_monitoring_clients.get(account_id)
+        return bool(self.account_monitoring_status.get(account_id)) and client is not None and client.is_connected()
+
+    def listening_event(self, account_id: str) -> asyncio.Event:
+        """Event set once the account's ingestion loop is listening on its channels"""
+        return self.listening.setdefault(account_id, asyncio.Event())
+
+    def bind_account_exchange(self, account: AccountConfig) -> ExchangeGateway:
+        """Return the account's pooled exchange gateway, rebuilding it only when its keys changed"""
+        return self.exchange_pool.acquire(account)
+
+    def _detach_exchange(self, gateway: ExchangeGateway):
+        """Forget a gateway the pool replaced; the pool closes it once its in-flight calls finish"""
+        if self.exchange is gateway:
+            self.exchange = None
 
     async def get_channel_display_name(self, channel_id: str, user_id: int) -> str:
         """Get channel display name with caching for better UX"""
@@ -1918,12 +4469,10 @@ class TradingBot:
             
             # If no client found for current account, try any account for this user
             if not telethon_client:
-                accounts = self.enhanced_db.get_all_accounts()
-                for acc in accounts:
-                    if int(acc.user_id or 0) == int(user_id):
-                        telethon_client = self.user_monitoring_clients.get(acc.account_id)
-                        if telethon_client:
-                            break
+                for acc in self.enhanced_db.get_user_accounts(user_id):
+                    telethon_client = self.user_monitoring_clients.get(acc.account_id)
+                    if telethon_client:
+                        break
             
             if telethon_client and channel_id:
                 try:
@@ -2053,7 +4602,16 @@ class TradingBot:
             return symbol
 
     def parse_trading_signal(self, message: str, channel_id: str) -> Optional[TradingSignal]:
-        """Enhanced signal parsing with Russian support"""
+        """Enhanced signal parsing with Russian support, timed in microseconds"""
+        started = time.perf_counter()
+        signal = self._parse_trading_signal(message, channel_id)
+        elapsed_us = (time.perf_counter() - started) * 1_000_000
+        self.parse_time_samples.append(elapsed_us)
+        mark_stage('parsed')
+        logger.info(f"⏱️ Signal parse took {elapsed_us:.0f} µs ({'signal' if signal else 'no signal'})")
+        return signal
+
+    def _parse_trading_signal(self, message: str, channel_id: str) -> Optional[TradingSignal]:
         try:
             logger.info(f"🔍 PARSING SIGNAL from channel {channel_id}")
             logger.info(f"📝 Message preview: {message[:300]}")
@@ -2130,52 +4688,66 @@ class TradingBot:
         try:
             current_account = self.get_current_account(user_id)
             if current_account:
-                # Map account BingX API keys into session config so all flows use correct credentials
-                if getattr(current_account, 'bingx_api_key', None):
-                    config.binance_api_key = current_account.bingx_api_key
-                if getattr(current_account, 'bingx_secret_key', None):
-                    config.binance_api_secret = current_account.bingx_secret_key
-                config.leverage = int(current_account.leverage)
-                # Stop loss percent: prefer first stop loss level if any
-                if current_account.stop_loss_levels:
-                    try:
-                        # If stored as positive percent, treat as absolute percent
-                        config.stop_loss_percent = float(current_account.stop_loss_levels[0].percentage)
-                    except Exception:
-                        pass
-                # Balance mode
-                if bool(current_account.use_percentage_balance):
-                    config.use_fixed_usdt_amount = False
-                    config.balance_percent = float(current_account.balance_percentage)
-                else:
-                    config.use_fixed_usdt_amount = True
-                    config.fixed_usdt_amount = float(current_account.fixed_usdt_amount)
-                # Custom TP levels from account
-                if current_account.take_profit_levels:
-                    config.custom_take_profits = [
-                        TakeProfitLevel(tp.percentage, tp.close_percentage)
-                        for tp in current_account.take_profit_levels
-                    ]
-                # Channels
-                config.monitored_channels = [str(cid) for cid in (current_account.monitored_channels or [])]
-                # Additional settings
-                config.use_signal_settings = bool(current_account.use_signal_settings)
-                config.create_sl_tp = bool(current_account.create_sl_tp)
-                config.make_webhook_enabled = bool(current_account.make_webhook_enabled)
-                config.trailing_enabled = bool(current_account.trailing_enabled)
-                config.trailing_activation_percent = float(current_account.trailing_activation_percent)
-                config.trailing_callback_percent = float(current_account.trailing_callback_percent)
+                self._apply_account_settings(config, current_account)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to overlay account config: {e}")
+        return config
+
+    def config_for_account(self, account: AccountConfig) -> BotConfig:
+        """Private config snapshot for one account, leaving the user's session config and current account untouched"""
+        config = copy.deepcopy(self.get_user_config(account.user_id))
+        try:
+            self._apply_account_settings(config, account)
         except Exception as e:
-            logger.warning(f"⚠️ Failed to overlay account config: {e}")
+            logger.warning(f"⚠️ Failed to overlay account config for {account.account_name}: {e}")
         return config
 
+    @staticmethod
+    def _apply_account_settings(config: BotConfig, account: AccountConfig):
+        """Copy an account's trading settings onto a BotConfig"""
+        # Map account BingX API keys into session config so all flows use correct credentials
+        if getattr(account, 'bingx_api_key', None):
+            config.binance_api_key = account.bingx_api_key
+        if getattr(account, 'bingx_secret_key', None):
+            config.binance_api_secret = account.bingx_secret_key
+        config.leverage = int(account.leverage)
+        # Stop loss percent: prefer first stop loss level if any
+        if account.stop_loss_levels:
+            try:
+                # If stored as positive percent, treat as absolute percent
+                config.stop_loss_percent = float(account.stop_loss_levels[0].percentage)
+            except Exception:
+                pass
+        # Balance mode
+        if bool(account.use_percentage_balance):
+            config.use_fixed_usdt_amount = False
+            config.balance_percent = float(account.balance_percentage)
+        else:
+            config.use_fixed_usdt_amount = True
+            config.fixed_usdt_amount = float(account.fixed_usdt_amount)
+        # Custom TP levels from account
+        if account.take_profit_levels:
+            config.custom_take_profits = [
+                TakeProfitLevel(tp.percentage, tp.close_percentage)
+                for tp in account.take_profit_levels
+            ]
+        # Channels
+        config.monitored_channels = [str(cid) for cid in (account.monitored_channels or [])]
+        # Additional settings
+        config.use_signal_settings = bool(account.use_signal_settings)
+        config.create_sl_tp = bool(account.create_sl_tp)
+        config.make_webhook_enabled = bool(account.make_webhook_enabled)
+        config.trailing_enabled = bool(account.trailing_enabled)
+        config.trailing_activation_percent = float(account.trailing_activation_percent)
+        config.trailing_callback_percent = float(account.trailing_callback_percent)
+
     def setup_make_webhook(self, user_id: int) -> bool:
         """Setup Make.com webhook logger for user"""
         try:
             config = self.get_user_config(user_id)
             webhook_url = config.make_webhook_url or DEFAULT_WEBHOOK_URL
             
-            webhook_logger = MakeWebhookLogger(webhook_url)
+            webhook_logger = MakeWebhookLogger(webhook_url, delivery=self.webhook_delivery)
             self.webhook_loggers[user_id] = webhook_logger
             
             logger.info(f"✅ Make.com webhook setup for user {user_id}: {webhook_url[:50]}...")
@@ -2185,161 +4757,24 @@ class TradingBot:
             logger.error(f"❌ Make.com webhook setup error: {e}")
             return False
 
-    def get_symbol_precision(self, symbol: str) -> Dict[str, Any]:
-        """Get and cache symbol precision information with SAFE DEFAULTS"""
+    async def get_symbol_precision(self, symbol: str, exchange: Optional[ExchangeGateway] = None) -> Dict[str, Any]:
+        """Symbol precision from the market metadata service (a dictionary hit on the trade path)"""
         try:
-            if symbol in self.symbol_info_cache:
-                return self.symbol_info_cache[symbol]
-            if not self.exchange:
-                return {'error': 'Exchange not initialized'}
-
-            bingx_symbol = self.to_bingx_symbol(symbol)
-            markets = self.exchange.load_markets()
-            
-            # Try multiple symbol formats to find the market
-            market = None
-            tried_symbols = [bingx_symbol]
-            
-            # Try the primary format first
-            if bingx_symbol in markets:
-                market = markets[bingx_symbol]
-                logger.info(f"✅ Found market for {bingx_symbol}")
-            else:
-                # Try alternative formats
-                # Extract base symbol (e.g., COAI from COAI-USDT)
-                base = symbol.replace('-USDT', '').replace('/USDT', '').replace('USDT', '').replace(':', '').replace('/', '')
-                
-                alternative_formats = [
-                    f"{base}/USDT",      # Slash format
-                    f"{base}-USDT",      # Hyphen format (already tried)
-                    f"{base}USDT",       # No separator
-                    f"{base}/USDT:USDT", # Perpetual format
-                    symbol               # Original symbol as-is
-                ]
-                
-                for alt_symbol in alternative_formats:
-                    if alt_symbol in tried_symbols:
-                        continue
-                    tried_symbols.append(alt_symbol)
-                    if alt_symbol in markets:
-                        market = markets[alt_symbol]
-                        bingx_symbol = alt_symbol  # Update to the working format
-                        logger.info(f"✅ Found market using alternative format: {alt_symbol}")
-                        break
-                
-                if not market:
-                    # Symbol not found in any format - log warning and use safe defaults
-                    logger.warning(f"⚠️ Symbol {symbol} not found in markets (tried: {', '.join(tried_symbols)})")
-                    logger.warning(f"⚠️ Using safe default precision values for {symbol}")
-                    # Return safe defaults instead of error - this allows trade to proceed
-                    default_precision = {
-                        'step_size': 1.0,
-                        'min_qty': 1.0,
-                        'tick_size': 0.00001,
-                        'min_price': 0.00001,
-                        'max_price': 1000000.0,
-                        'qty_precision': 0,
-                        'price_precision': 5
-                    }
-                    self.symbol_info_cache[symbol] = default_precision
-                    return default_precision
-            
-            # If we found the market, continue with precision extraction
-            # Derive precision and limits
-            raw_price_precision = market.get('precision', {}).get('price', None)
-            raw_amount_precision = market.get('precision', {}).get('amount', None)
-
-            # Normalize precision to integers when possible
-            price_precision = int(raw_price_precision) if isinstance(raw_price_precision, (int, float)) and raw_price_precision is not None else None
-            qty_precision = int(raw_amount_precision) if isinstance(raw_amount_precision, (int, float)) and raw_amount_precision is not None else None
-
-            # Compute tick size (robust, no nested try/except indentation pitfalls)
-            info = market.get('info', {}) or {}
-            tick_size = market.get('limits', {}).get('price', {}).get('min', None)
-            if not tick_size:
-                candidates = []
-                if isinstance(info, dict):
-                    candidates = [info.get('priceIncrement'), info.get('priceStep')]
-                for cand in candidates:
-                    if cand is None:
-                        continue
-                    try:
-                        tick_size = float(cand)
-                        break
-                    except Exception:
-                        continue
-                if not tick_size:
-                    if isinstance(price_precision, int):
-                        tick_size = 10 ** (-price_precision) if price_precision and price_precision > 0 else 0.00001
-                    else:
-                        price_prec_str = str(info.get('pricePrecision')) if isinstance(info, dict) else ''
-                        if price_prec_str.isdigit():
-                            p = int(price_prec_str)
-                            tick_size = 10 ** (-p) if p > 0 else 0.00001
-            if not tick_size or tick_size <= 0:
-                tick_size = 0.00001
-
-            # Compute step size (robust)
-            step_size = market.get('limits', {}).get('amount', {}).get('min', None)
-            if not step_size:
-                if isinstance(qty_precision, int):
-                    step_size = 10 ** (-qty_precision) if qty_precision > 0 else 1.0
-                else:
-                    pass
-            else:
-                candidates = []
-                if isinstance(info, dict):
-                    candidates = [info.get('quantityIncrement'), info.get('stepSize')]
-                for cand in candidates:
-                    if cand is None:
-                        continue
-                    try:
-                        step_size = float(cand)
-                        break
-                    except Exception:
-                        continue
-            if not step_size or step_size <= 0:
-                step_size = 1.0
-
-            min_qty = market.get('limits', {}).get('amount', {}).get('min', 1.0) or 1.0
-            min_price = market.get('limits', {}).get('price', {}).get('min', 0.00001) or 0.00001
-            max_price = market.get('limits', {}).get('price', {}).get('max', 1000000.0) or 1000000.0
-
-            # Derive decimal precision from tick size
-            try:
-                tick_decimals = max(0, -Decimal(str(tick_size)).as_tuple().exponent)
-            except Exception:
-                tick_decimals = 5
-
-            # Ensure price precision is at least as granular as tick size
-            price_precision = max(int(price_precision) if price_precision is not None else 0, tick_decimals)
-
-            precision_info = {
-                'step_size': step_size,
-                'min_qty': min_qty,
-                'tick_size': tick_size,
-                'min_price': min_price,
-                'max_price': max_price,
-                'qty_precision': max(int(qty_precision) if qty_precision is not None else 0, 0),
-                'price_precision': max(int(price_precision) if price_precision is not None else 5, 1)
-            }
-
-            self.symbol_info_cache[symbol] = precision_info
-            
-            logger.info(f"📏 Symbol precision for {symbol}: qty={precision_info['qty_precision']}, price={precision_info['price_precision']}, tick={precision_info['tick_size']}")
+            exchange = exchange or self.exchange
+            trading_type = getattr(exchange, 'trading_type', None) or 'swap'
+            precision_info = self.market_metadata.get(symbol, trading_type)
+            if precision_info is None:
+                # Unknown symbol, possibly a fresh listing: allow one throttled refresh
+                precision_info = await self.market_metadata.lookup(symbol, trading_type, exchange)
+            if precision_info is None:
+                # Safe defaults let the trade proceed; they are not cached so the next lookup retries
+                logger.warning(f"⚠️ Symbol {symbol} not found in {trading_type} markets, using safe default precision")
+                return dict(DEFAULT_SYMBOL_PRECISION)
             return precision_info
 
         except Exception as e:
             logger.error(f"❌ Error getting symbol precision: {e}")
-            return {
-                'step_size': 1.0,
-                'min_qty': 1.0,
-                'tick_size': 0.00001,
-                'min_price': 0.00001,
-                'max_price': 1000000.0,
-                'qty_precision': 0,
-                'price_precision': 5
-            }
+            return dict(DEFAULT_SYMBOL_PRECISION)
 
     def round_price(self, price: float, tick_size: float, price_precision: int) -> float:
         """Round price to match tick size and precision - NEVER ZERO"""
@@ -2417,20 +4852,23 @@ class TradingBot:
 
 # (moved trailing handlers below class to avoid breaking class methods)
 
-    async def cancel_related_orders(self, symbol: str, user_id: int, filled_order_type: str, bot_instance, filled_tp_id: Optional[int] = None):
+    async def cancel_related_orders(self, symbol: str, user_id: int, filled_order_type: str, bot_instance,
+                                    filled_tp_id: Optional[int] = None, account_id: Optional[str] = None):
         """Cancel SL/trailing when ALL TPs fill, or cancel all TPs when SL fills"""
         try:
-            position = self.active_positions.get(symbol)
+            position = self.active_positions.get(account_id, symbol)
             if not position:
                 logger.info(f"⚠️ No active position found for {symbol}")
                 return
 
+            exchange = self._exchange_for_position(position)
             cancelled_orders = []
 
             if filled_order_type == "TAKE_PROFIT":
                 # Add the filled TP to the tracking list
                 if filled_tp_id and filled_tp_id not in position.filled_take_profit_order_ids:
                     position.filled_take_profit_order_ids.append(filled_tp_id)
+                    self.active_positions.save(position)
                     logger.info(f"📝 Marked TP {filled_tp_id} as filled for {symbol}")
 
                 # Check if ALL take profits are filled
@@ -2457,8 +4895,8 @@ class TradingBot:
                     # Cancel Stop Loss
                     if position.stop_loss_order_id:
                         try:
-                            if self.exchange:
-                                self.exchange.cancel_order(position.stop_loss_order_id, self.to_bingx_symbol(symbol))
+                            if exchange:
+                                await exchange.cancel_order(position.stop_loss_order_id, self.to_bingx_symbol(symbol))
                             cancelled_orders.append(f"SL-{position.stop_loss_order_id}")
                             logger.info(f"✅ Cancelled Stop Loss order: {position.stop_loss_order_id}")
                         except Exception as e:
@@ -2467,8 +4905,8 @@ class TradingBot:
                     # Cancel Trailing Stop
                     if position.trailing_order_id:
                         try:
-                            if self.exchange:
-                                self.exchange.cancel_order(position.trailing_order_id, self.to_bingx_symbol(symbol))
+                            if exchange:
+                                await exchange.cancel_order(position.trailing_order_id, self.to_bingx_symbol(symbol))
                             cancelled_orders.append(f"TRAIL-{position.trailing_order_id}")
                             logger.info(f"✅ Cancelled Trailing order: {position.trailing_order_id}")
                         except Exception as e:
@@ -2479,8 +4917,8 @@ class TradingBot:
                 remaining_tps = [tp_id for tp_id in position.take_profit_order_ids if tp_id not in position.filled_take_profit_order_ids]
                 for tp_id in remaining_tps:
                     try:
-                        if self.exchange:
-                            self.exchange.cancel_order(tp_id, self.to_bingx_symbol(symbol))
+                        if exchange:
+                            await exchange.cancel_order(tp_id, self.to_bingx_symbol(symbol))
                         cancelled_orders.append(f"TP-{tp_id}")
                         logger.info(f"✅ Cancelled Take Profit order: {tp_id}")
                     except Exception as e:
@@ -2489,8 +4927,8 @@ class TradingBot:
                 # Cancel trailing order too
                 if position.trailing_order_id:
                     try:
-                        if self.exchange:
-                            self.exchange.cancel_order(position.trailing_order_id, self.to_bingx_symbol(symbol))
+                        if exchange:
+                            await exchange.cancel_order(position.trailing_order_id, self.to_bingx_symbol(symbol))
                         cancelled_orders.append(f"TRAIL-{position.trailing_order_id}")
                         logger.info(f"✅ Cancelled Trailing order: {position.trailing_order_id}")
                     except Exception as e:
@@ -2504,7 +4942,7 @@ class TradingBot:
                     try:
                         if hasattr(position, 'entry_price') and position.entry_price:
                             # Get current price for PnL calculation
-                            ticker = self.exchange.fetch_ticker(self.to_bingx_symbol(symbol))
+                            ticker = await self.prices.ticker(self.to_bingx_symbol(symbol), exchange)
                             current_price = ticker.get('last', position.entry_price)
                             
                             # Calculate PnL based on position side
@@ -2526,12 +4964,7 @@ class TradingBot:
                             # Get account stats for win rate
                             account_id = getattr(position, 'account_id', None)
                             if account_id:
-                                trade_history = self.enhanced_db.get_trade_history(account_id, limit=100)
-                                # Only count trades that were properly closed with actual win/lose data
-                                closed_trades = [t for t in trade_history if t.status == "CLOSED" and t.exit_time is not None]
-                                total_trades = len(closed_trades)
-                                winning_trades = len([t for t in closed_trades if t.pnl and float(t.pnl) > 0])
-                                win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
+                                win_rate = self.enhanced_db.get_account_stats(account_id)['win_rate']
                                 
                                 pnl_emoji = "📈" if pnl > 0 else "📉" if pnl < 0 else "➖"
                                 await bot_instance.send_message(
@@ -2550,8 +4983,7 @@ class TradingBot:
                     logger.warning(f"⚠️ Failed to close trade in history: {e}")
             # Remove position from active positions only when all orders are handled
             if filled_order_type == "STOP_LOSS" or (filled_order_type == "TAKE_PROFIT" and not remaining_tps):
-                if symbol in self.active_positions:
-                    del self.active_positions[symbol]
+                if self.active_positions.discard(position):
                     logger.info(f"🗑️ Removed {symbol} from active positions")
 
             if cancelled_orders:
@@ -2565,8 +4997,175 @@ class TradingBot:
         except Exception as e:
             logger.error(f"❌ Error canceling related orders: {e}")
 
+    @staticmethod
+    def _position_is_open(pos: Dict[str, Any]) -> bool:
+        try:
+            return float(pos.get('contracts') or 0) > 0 or abs(float(pos.get('contractSize') or 0)) > 0
+        except (TypeError, ValueError):
+            return False
+
+    def _exchange_for_position(self, position: ActivePosition) -> Optional[ExchangeGateway]:
+        """Gateway of the account that opened the position (never another account's client)"""
+        account_id = position.account_id
+        if not account_id:
+            # Legacy positions without an account: whichever client opened them
+            return position.exchange or self.exchange
+        gateway = position.exchange if position.exchange is not None and position.exchange.account_id == account_id else None
+        if gateway is None or self.exchange_pool.get(account_id, gateway.trading_type) is not gateway:
+            # Same trading type as the client that opened the position, rebuilt if the keys changed
+            gateway = self.exchange_pool.get(account_id, gateway.trading_type if gateway else None)
+            if gateway is None:
+                account = self.enhanced_db.get_account(account_id)
+                if account and account.bingx_api_key and account.bingx_secret_key:
+                    gateway = self.bind_account_exchange(account)
+        position.exchange = gateway
+        return gateway
+
+    async def _snapshot_open_positions(self, exchange: ExchangeGateway, symbols: List[str]) -> Optional[set]:
+        """Symbol keys with an open position, from a single fetch_positions call (None if unavailable)"""
+        try:
+            positions = await exchange.fetch_positions([self.to_bingx_symbol(symbol) for symbol in symbols])
+        except Exception as e:
+            logger.debug(f"Could not fetch positions snapshot for {len(symbols)} symbols: {e}")
+            return None
+        return {
+            MarketMetadataService.key(pos.get('symbol') or (pos.get('info') or {}).get('symbol'))
+            for pos in positions or []
+            if self._position_is_open(pos)
+        }
+
+    async def _snapshot_open_orders(self, exchange: ExchangeGateway, symbols: List[str]) -> Dict[str, set]:
+        """Open order ids per symbol key; symbols whose orders could not be fetched are left out"""
+        try:
+            orders = await exchange.fetch_open_orders()
+            open_ids = {MarketMetadataService.key(symbol): set() for symbol in symbols}
+            for order in orders or []:
+                key = MarketMetadataService.key(order.get('symbol') or (order.get('info') or {}).get('symbol'))
+                if key in open_ids and order.get('id') is not None:
+                    open_ids[key].add(str(order['id']))
+            return open_ids
+        except Exception as e:
+            logger.debug(f"Account-wide open orders unavailable, falling back to per-symbol: {e}")
+
+        open_ids = {}
+        for symbol in symbols:
+            try:
+                orders = await exchange.fetch_open_orders(self.to_bingx_symbol(symbol))
+                open_ids[MarketMetadataService.key(symbol)] = {str(order['id']) for order in orders or [] if order.get('id') is not None}
+            except Exception as e:
+                logger.error(f"❌ Error fetching open orders for {symbol}: {e}")
+        return open_ids
+
+    async def _order_was_filled(self, exchange: ExchangeGateway, order_id, symbol: str) -> bool:
+        """Verify a vanished order truly filled (not canceled/expired)"""
+        try:
+            order = await exchange.fetch_order(order_id, self.to_bingx_symbol(symbol))
+            status = (order or {}).get('status')
+            return status in ("closed", "filled") or float((order or {}).get('filled') or 0) > 0
+        except Exception:
+            return False
+
+    async def _handle_manual_close(self, symbol: str, position: ActivePosition, exchange: ExchangeGateway):
+        """Close out a position that disappeared from the exchange without its SL/TP firing"""
+        logger.info(f"📭 Position {symbol} closed manually on exchange")
+        try:
+            # Calculate PnL for manually closed trade
+            pnl = 0.0
+            try:
+                if hasattr(position, 'entry_price') and position.entry_price:
+                    ticker = await self.prices.ticker(self.to_bingx_symbol(symbol), exchange)
+                    current_price = ticker.get('last', position.entry_price)
+
+                    if position.side == 'LONG':
+                        pnl = (current_price - position.entry_price) * position.quantity
+                    else:  # SHORT
+                        pnl = (position.entry_price - current_price) * position.quantity
+            except Exception as e:
+                logger.warning(f"⚠️ Could not calculate PnL for manual close: {e}")
+
+            self.enhanced_db.update_trade_status(
+                getattr(position, 'trade_id', ''),
+                status="CLOSED",
+                exit_time=datetime.now().isoformat(),
+                pnl=pnl
+            )
+
+            # Send PnL notification for manual close
+            try:
+                user_id = getattr(position, 'user_id', None)
+                if user_id and user_id in self.bot_instances:
+                    bot_instance = self.bot_instances[user_id]
+
+                    account_id = getattr(position, 'account_id', None)
+                    if account_id:
+                        win_rate = self.enhanced_db.get_account_stats(account_id)['win_rate']
+
+                        pnl_emoji = "📈" if pnl > 0 else "📉" if pnl < 0 else "➖"
+                        await bot_instance.send_message(
+                            chat_id=user_id,
+                            text=f"{pnl_emoji} <b>TRADE CLOSED (Manual)</b>\n\n"
+                                 f"💰 {symbol} {position.side}\n"
+                                 f"💵 PnL: {pnl:.2f} USDT\n"
+                                 f"📊 Win Rate: {win_rate:.1f}%\n"
+                                 f"⏰ {datetime.now().strftime('%H:%M:%S')}",
+                            parse_mode='HTML'
+                        )
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to send manual close PnL notification: {e}")
+
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to close trade in history: {e}")
+
+        # Remove from active positions
+        if self.active_positions.discard(position):
+            logger.info(f"🗑️ Removed {symbol} from active positions (manual close)")
+
+    async def _reconcile_account_positions(self, exchange: ExchangeGateway, tracked: List[Tuple[str, ActivePosition]], bot_instance):
+        """Diff one account's positions/open-orders snapshot against local state"""
+        symbols = [symbol for symbol, _ in tracked]
+        open_symbols = await self._snapshot_open_positions(exchange, symbols)
+        open_orders = await self._snapshot_open_orders(exchange, symbols)
+
+        for symbol, position in tracked:
+            try:
+                if self.active_positions.get(position.account_id, symbol) is not position:
+                    continue
+                key = MarketMetadataService.key(symbol)
+
+                # Position gone from the exchange: closed manually
+                if open_symbols is not None and key not in open_symbols:
+                    await self._handle_manual_close(symbol, position, exchange)
+                    continue
+
+                open_order_ids = open_orders.get(key)
+                if open_order_ids is None:
+                    continue
+
+                if position.stop_loss_order_id and str(position.stop_loss_order_id) not in open_order_ids:
+                    if await self._order_was_filled(exchange, position.stop_loss_order_id, symbol):
+                        logger.info(f"🛑 Stop Loss filled for {symbol}")
+                        await self.cancel_related_orders(symbol, position.user_id, "STOP_LOSS", bot_instance,
+                                                         account_id=position.account_id)
+                        # Move to next symbol after handling SL to avoid TP mis-reporting
+                        continue
+
+                for tp_id in list(position.take_profit_order_ids):
+                    if str(tp_id) not in open_order_ids and tp_id not in position.filled_take_profit_order_ids:
+                        if await self._order_was_filled(exchange, tp_id, symbol):
+                            logger.info(f"🎯 Take Profit {tp_id} filled for {symbol}")
+                            await self.cancel_related_orders(symbol, position.user_id, "TAKE_PROFIT", bot_instance,
+                                                             filled_tp_id=tp_id, account_id=position.account_id)
+                            # Don't break here - continue checking other TPs in case multiple filled simultaneously
+
+            except Exception as e:
+                logger.error(f"❌ Error checking orders for {symbol}: {e}")
+
     async def monitor_orders(self, bot_instance):
-        """Monitor open orders and cancel opposites when filled"""
+        """Monitor open orders and cancel opposites when filled.
+
+        Each cycle takes one positions snapshot and one open-orders snapshot per account and
+        only calls fetch_order for SL/TP ids that vanished from the open-orders list.
+        """
         try:
             if self.order_monitor_running:
                 return
@@ -2576,119 +5175,23 @@ class TradingBot:
 
             while self.order_monitor_running:
                 try:
-                    for symbol, position in list(self.active_positions.items()):
-                        try:
-                            if not self.exchange:
+                    by_account: Dict[int, Tuple[ExchangeGateway, List[Tuple[str, ActivePosition]]]] = {}
+                    for account_id in self.active_positions.accounts():
+                        for position in self.active_positions.for_account(account_id):
+                            exchange = self._exchange_for_position(position)
+                            if not exchange:
                                 continue
-                            
-                            # Check if position still exists on exchange (detect manual closes)
-                            try:
-                                positions = self.exchange.fetch_positions([self.to_bingx_symbol(symbol)])
-                                position_exists = False
-                                for pos in positions:
-                                    if pos.get('contracts', 0) > 0 or abs(float(pos.get('contractSize', 0))) > 0:
-                                        position_exists = True
-                                        break
-                                
-                                # If position doesn't exist on exchange, mark as closed
-                                if not position_exists:
-                                    logger.info(f"📭 Position {symbol} closed manually on exchange")
-                                    try:
-                                        # Calculate PnL for manually closed trade
-                                        pnl = 0.0
-                                        try:
-                                            if hasattr(position, 'entry_price') and position.entry_price:
-                                                ticker = self.exchange.fetch_ticker(self.to_bingx_symbol(symbol))
-                                                current_price = ticker.get('last', position.entry_price)
-                                                
-                                                if position.side == 'LONG':
-                                                    pnl = (current_price - position.entry_price) * position.quantity
-                                                else:  # SHORT
-                                                    pnl = (position.entry_price - current_price) * position.quantity
-                                        except Exception as e:
-                                            logger.warning(f"⚠️ Could not calculate PnL for manual close: {e}")
-                                        
-                                        self.enhanced_db.update_trade_status(
-                                            getattr(position, 'trade_id', ''), 
-                                            status="CLOSED", 
-                                            exit_time=datetime.now().isoformat(),
-                                            pnl=pnl
-                                        )
-                                        
-                                        # Send PnL notification for manual close
-                                        try:
-                                            user_id = getattr(position, 'user_id', None)
-                                            if user_id and user_id in self.bot_instances:
-                                                bot_instance = self.bot_instances[user_id]
-                                                
-                                                account_id = getattr(position, 'account_id', None)
-                                                if account_id:
-                                                    trade_history = self.enhanced_db.get_trade_history(account_id, limit=100)
-                                                    # Only count trades that were properly closed with actual win/lose data
-                                                    closed_trades = [t for t in trade_history if t.status == "CLOSED" and t.exit_time is not None]
-                                                    total_trades = len(closed_trades)
-                                                    winning_trades = len([t for t in closed_trades if t.pnl and float(t.pnl) > 0])
-                                                    win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
-                                                    
-                                                    pnl_emoji = "📈" if pnl > 0 else "📉" if pnl < 0 else "➖"
-                                                    await bot_instance.send_message(
-                                                        chat_id=user_id,
-                                                        text=f"{pnl_emoji} <b>TRADE CLOSED (Manual)</b>\n\n"
-                                                             f"💰 {symbol} {position.side}\n"
-                                                             f"💵 PnL: {pnl:.2f} USDT\n"
-                                                             f"📊 Win Rate: {win_rate:.1f}%\n"
-                                                             f"⏰ {datetime.now().strftime('%H:%M:%S')}",
-                                                        parse_mode='HTML'
-                                                    )
-                                        except Exception as e:
-                                            logger.warning(f"⚠️ Failed to send manual close PnL notification: {e}")
-                                            
-                                    except Exception as e:
-                                        logger.warning(f"⚠️ Failed to close trade in history: {e}")
-                                    
-                                    # Remove from active positions
-                                    if symbol in self.active_positions:
-                                        del self.active_positions[symbol]
-                                        logger.info(f"🗑️ Removed {symbol} from active positions (manual close)")
-                                    continue
-                            except Exception as e:
-                                logger.debug(f"Could not check position status for {symbol}: {e}")
-                            
-                            open_orders = self.exchange.fetch_open_orders(self.to_bingx_symbol(symbol))
-                            open_order_ids = [int(order['id']) for order in open_orders]
-
-                            if position.stop_loss_order_id and position.stop_loss_order_id not in open_order_ids:
-                                # Verify SL truly filled (not canceled/expired)
-                                sl_filled = False
-                                try:
-                                    sl_order = self.exchange.fetch_order(position.stop_loss_order_id, self.to_bingx_symbol(symbol))
-                                    sl_status = (sl_order or {}).get('status')
-                                    sl_filled = sl_status in ("closed", "filled") or float((sl_order or {}).get('filled') or 0) > 0
-                                except Exception:
-                                    sl_filled = False
-                                if sl_filled:
-                                    logger.info(f"🛑 Stop Loss filled for {symbol}")
-                                    await self.cancel_related_orders(symbol, position.user_id, "STOP_LOSS", bot_instance)
-                                    # Move to next symbol after handling SL to avoid TP mis-reporting
-                                    continue
-
-                            for tp_id in position.take_profit_order_ids:
-                                if tp_id not in open_order_ids and tp_id not in position.filled_take_profit_order_ids:
-                                    # Verify TP truly filled (not canceled/expired)
-                                    tp_filled = False
-                                    try:
-                                        tp_order = self.exchange.fetch_order(tp_id, self.to_bingx_symbol(symbol))
-                                        tp_status = (tp_order or {}).get('status')
-                                        tp_filled = tp_status in ("closed", "filled") or float((tp_order or {}).get('filled') or 0) > 0
-                                    except Exception:
-                                        tp_filled = False
-                                    if tp_filled:
-                                        logger.info(f"🎯 Take Profit {tp_id} filled for {symbol}")
-                                        await self.cancel_related_orders(symbol, position.user_id, "TAKE_PROFIT", bot_instance, filled_tp_id=tp_id)
-                                        # Don't break here - continue checking other TPs in case multiple filled simultaneously
+                            by_account.setdefault(id(exchange), (exchange, []))[1].append((position.symbol, position))
 
-                        except Exception as e:
-                            logger.error(f"❌ Error checking orders for {symbol}: {e}")
+                    if by_account:
+                        results = await asyncio.gather(
+                            *(self._reconcile_account_positions(exchange, tracked, bot_instance)
+                              for exchange, tracked in by_account.values()),
+                            return_exceptions=True
+                        )
+                        for result in results:
+                            if isinstance(result, Exception):
+                                logger.error(f"❌ Order reconciliation failed: {result}")
 
                     await asyncio.sleep(5)
 
@@ -2709,19 +5212,22 @@ class TradingBot:
             current_account = self.get_current_account(config.user_id)
             account_key = current_account.account_id if current_account else None
 
-            if account_key and account_key in self.account_exchanges:
-                self.exchange = self.account_exchanges[account_key]
+            if current_account and current_account.bingx_api_key and current_account.bingx_secret_key:
+                self.exchange = self.bind_account_exchange(current_account)
+            elif self.exchange_pool.get(account_key):
+                self.exchange = self.exchange_pool.get(account_key)
 
             if not self.exchange:
                 success = await self.setup_binance_client(config)
                 if not success:
                     return {'success': False, 'error': 'Failed to connect to BingX API'}
                 if account_key:
-                    self.account_exchanges[account_key] = self.exchange
+                    self.exchange_pool.register(account_key, self.exchange)
+            exchange = self.exchange
 
             # Explicitly use 'swap' type for futures trading
             current_trading_type = getattr(current_account, 'trading_type', 'swap') if current_account else 'swap'
-            bal = self.exchange.fetch_balance({'type': current_trading_type})
+            bal = await exchange.fetch_balance({'type': current_trading_type})
             usdt = bal.get('USDT', {}) if isinstance(bal, dict) else {}
             usdt_info = {
                 'balance': float(usdt.get('total', 0) or usdt.get('free', 0) or 0),
@@ -2749,24 +5255,22 @@ class TradingBot:
         try:
             # If this user has a bound account/exchange, reuse it
             current_account = self.get_current_account(config.user_id)
-            if current_account and current_account.account_id in self.account_exchanges:
-                self.exchange = self.account_exchanges[current_account.account_id]
+            trading_type = getattr(current_account, 'trading_type', 'swap') if current_account else 'swap'
+            pooled = self.exchange_pool.get(current_account.account_id, trading_type) if current_account else None
+            if pooled:
+                self.exchange = pooled
             else:
-                trading_type = getattr(current_account, 'trading_type', 'swap') if current_account else 'swap'
-                self.exchange = ccxt.bingx({
-                    'apiKey': config.binance_api_key,
-                    'secret': config.binance_api_secret,
-                    'options': {
-                        'defaultType': trading_type
-                    },
-                    'enableRateLimit': True,
-                    'timeout': 60000
-                })
+                self.exchange = ExchangeGateway(
+                    config.binance_api_key,
+                    config.binance_api_secret,
+                    trading_type=trading_type,
+                    account_id=current_account.account_id if current_account else ""
+                )
                 if current_account:
-                    self.account_exchanges[current_account.account_id] = self.exchange
+                    self.exchange_pool.register(current_account.account_id, self.exchange)
 
             # Explicitly use 'swap' type for futures trading
-            bal = self.exchange.fetch_balance({'type': trading_type})
+            bal = await self.exchange.fetch_balance({'type': trading_type})
             usdt_total = bal.get('USDT', {}).get('total', 'N/A') if isinstance(bal, dict) else 'N/A'
             logger.info(f"✅ BingX connected. Balance: {usdt_total} USDT (type: {trading_type})")
             return True
@@ -2775,19 +5279,21 @@ class TradingBot:
             logger.error(f"❌ BingX setup error: {e}")
             return False
 
-    async def setup_telethon_client(self, config: BotConfig, authorize_if_needed: bool = False) -> bool:
+    async def setup_telethon_client(self, config: BotConfig, authorize_if_needed: bool = False,
+                                    account: Optional[AccountConfig] = None) -> bool:
         """Setup Telethon client
         
         Args:
             config: Bot configuration
             authorize_if_needed: If True and not authorized, will attempt to send auth code
+            account: Account to set up (defaults to the user's current account)
         
         Returns:
             True if client is setup and authorized, False otherwise
         """
         try:
             # Get current account to use account-specific credentials
-            current_account = self.get_current_account(config.user_id)
+            current_account = account or self.get_current_account(config.user_id)
             if not current_account:
                 logger.error("❌ No current account set for Telethon setup")
                 return False
@@ -2898,20 +5404,264 @@ class TradingBot:
             logger.error(f"❌ Error creating SL/TP orders: {e}")
             return {'stop_loss': None, 'take_profits': []}
 
-    async def execute_trade(self, signal: TradingSignal, config: BotConfig) -> Dict[str, Any]:
+    def _plan_protective_orders(self, signal: TradingSignal, config: BotConfig, side: str, quantity: float,
+                                current_price: float, mark: float, sl_price: Optional[float], tp_prices: List[float],
+                                precision_info: Dict[str, Any], trading_type: str) -> List[Dict[str, Any]]:
+        """SL, TP ladder and trailing stop orders for a filled entry, all priced from one mark snapshot"""
+        close_side = 'sell' if side == 'BUY' else 'buy'
+        position_side = 'LONG' if side == 'BUY' else 'SHORT'
+        orders: List[Dict[str, Any]] = []
+
+        if sl_price:
+            rounded_sl = self.round_price(sl_price, precision_info['tick_size'], precision_info['price_precision'])
+            orders.append({
+                'role': 'stop_loss', 'label': '🛑 Stop Loss', 'type': 'STOP_MARKET', 'side': close_side,
+                'amount': quantity, 'price': rounded_sl,
+                'params': {
+                    'stopPrice': rounded_sl,
+                    'triggerPrice': rounded_sl,
+                    'positionSide': position_side,
+                    'workingType': 'MARK_PRICE',
+                    'type': trading_type  # Explicitly specify swap (futures) or spot
+                }
+            })
+
+        # Use custom take profit levels with their specific close percentages
+        tp_targets = tp_prices[:len(config.custom_take_profits)]
+
+        # Discretize TP targets to tick steps relative to current mark to avoid collapsing to same price
+        adjusted_tp_targets = []
+        prev_ticks = 0
+        for tp_abs in tp_targets:
+            if side == 'BUY':
+                raw_ticks = (tp_abs - mark) / precision_info['tick_size']
+                need_ticks = int(raw_ticks) if raw_ticks == int(raw_ticks) else int(raw_ticks) + 1
+                need_ticks = max(1, need_ticks)
+                if need_ticks <= prev_ticks:
+                    need_ticks = prev_ticks + 1
+                adjusted_tp_targets.append(mark + need_ticks * precision_info['tick_size'])
+                prev_ticks = need_ticks
+            else:
+                raw_ticks = (mark - tp_abs) / precision_info['tick_size']
+                need_ticks = int(raw_ticks) if raw_ticks == int(raw_ticks) else int(raw_ticks) + 1
+                need_ticks = max(1, need_ticks)
+                if need_ticks <= prev_ticks:
+                    need_ticks = prev_ticks + 1
+                adjusted_tp_targets.append(mark - need_ticks * precision_info['tick_size'])
+                prev_ticks = need_ticks
+                    
+        tp_targets = adjusted_tp_targets
+                    
+        # Calculate quantities based on custom close percentages, then cap and floor so sum <= position
+        requested_quantities: List[float] = []
+        remaining_unrounded = quantity
+        for i, tp_level in enumerate(config.custom_take_profits[:len(tp_targets)]):
+            if i == len(tp_targets) - 1:
+                requested_quantities.append(remaining_unrounded)
+            else:
+                desired_close = max(0.0, remaining_unrounded * (tp_level.close_percentage / 100.0))
+                requested_quantities.append(desired_close)
+                remaining_unrounded -= desired_close
+
+        rounded_quantities: List[float] = []
+        cumulative_assigned = 0.0
+        total_levels = len(requested_quantities)
+        step_size = precision_info['step_size']
+                    
+        # IMPROVED: Ensure ALL configured TP levels are created
+        # First pass: try to distribute according to percentages
+        for i, requested in enumerate(requested_quantities):
+            remaining_levels = total_levels - i
+            remaining_capacity = max(quantity - cumulative_assigned, 0.0)
+            # Keep room for at least step_size for remaining levels
+            min_reserved_for_rest = step_size * max(remaining_levels - 1, 0)
+            alloc = min(requested, max(remaining_capacity - min_reserved_for_rest, 0.0))
+            each_qty = self.round_quantity(alloc, step_size, precision_info['qty_precision'])
+                        
+            # If quantity is too small but we still have levels to create, use minimum
+            if each_qty < step_size:
+                if i == total_levels - 1:
+                    # Last level gets all remaining
+                    each_qty = self.round_quantity(max(quantity - cumulative_assigned, 0.0), step_size, precision_info['qty_precision'])
+                else:
+                    # Use minimum step_size to ensure this level is created
+                    each_qty = step_size
+                        
+            if cumulative_assigned + each_qty > quantity:
+                each_qty = self.round_quantity(max(quantity - cumulative_assigned, 0.0), step_size, precision_info['qty_precision'])
+                        
+            # Only skip if quantity is truly 0 or negative
+            if each_qty <= 0:
+                continue
+                            
+            rounded_quantities.append(each_qty)
+            cumulative_assigned += each_qty
+            if cumulative_assigned >= quantity - (step_size * 1e-9):
+                break
+                    
+        # If we don't have enough TPs, redistribute more evenly
+        if len(rounded_quantities) < len(tp_targets):
+            logger.warning(f"⚠️ Only {len(rounded_quantities)} TPs created, but {len(tp_targets)} configured. Redistributing...")
+            # Redistribute quantity evenly across all TP levels
+            rounded_quantities = []
+            qty_per_level = quantity / len(tp_targets)
+            cumulative_assigned = 0.0
+            for i in range(len(tp_targets)):
+                if i == len(tp_targets) - 1:
+                    # Last TP gets remainder
+                    each_qty = self.round_quantity(quantity - cumulative_assigned, step_size, precision_info['qty_precision'])
+                else:
+                    each_qty = self.round_quantity(qty_per_level, step_size, precision_info['qty_precision'])
+                    # Ensure minimum quantity
+                    if each_qty < step_size:
+                        each_qty = step_size
+                            
+                if each_qty > 0:
+                    rounded_quantities.append(each_qty)
+                    cumulative_assigned += each_qty
+
+        # Align number of TP targets with actual rounded quantities
+        effective_tp_pairs = list(zip(tp_targets[:len(rounded_quantities)], rounded_quantities))
+
+        for tp, each_qty in effective_tp_pairs:
+            rounded_tp = self.round_price(tp, precision_info['tick_size'], precision_info['price_precision'])
+            # Ensure TP is on the correct side of current mark price
+            safety_ticks = precision_info['tick_size'] * 1
+            if side == 'BUY':
+                min_ok = self.round_price(mark + safety_ticks, precision_info['tick_size'], precision_info['price_precision'])
+                if rounded_tp <= min_ok:
+                    rounded_tp = min_ok
+            else:
+                max_ok = self.round_price(mark - safety_ticks, precision_info['tick_size'], precision_info['price_precision'])
+                if rounded_tp >= max_ok:
+                    rounded_tp = max_ok
+            orders.append({
+                'role': 'take_profit', 'label': '🎯 Take Profit', 'type': 'TAKE_PROFIT_MARKET', 'side': close_side,
+                'amount': each_qty, 'price': rounded_tp,
+                'params': {
+                    'stopPrice': rounded_tp,
+                    'triggerPrice': rounded_tp,
+                    'positionSide': position_side,
+                    'workingType': 'MARK_PRICE',
+                    'type': trading_type  # Explicitly specify swap (futures) or spot
+                }
+            })
+
+        # Optional trailing stop
+        if getattr(config, 'trailing_enabled', False):
+            try:
+                activation_rate = float(getattr(config, 'trailing_activation_percent', 2.0)) / 100.0
+                callback_percent = float(getattr(config, 'trailing_callback_percent', 0.5))
+                # Activation should be beyond current price in the favorable direction
+                if signal.trade_type == 'LONG':
+                    activation_price = current_price * (1 + activation_rate)
+                else:
+                    activation_price = current_price * (1 - activation_rate)
+                activation_price = self.round_price(activation_price, precision_info['tick_size'], precision_info['price_precision'])
+                orders.append({
+                    'role': 'trailing', 'label': '🧵 Trailing Stop', 'type': 'TRAILING_STOP_MARKET', 'side': close_side,
+                    'amount': quantity, 'price': activation_price,
+                    'params': {
+                        'activationPrice': activation_price,
+                        'priceRate': round(callback_percent, 3),
+                        'positionSide': position_side,
+                        'workingType': 'MARK_PRICE',
+                        'type': trading_type  # Explicitly specify swap (futures) or spot
+                    }
+                })
+            except Exception as e:
+                logger.warning(f"⚠️ Trailing stop setup failed: {e}")
+
+        return orders
+
+    async def _place_protective_orders(self, exchange: ExchangeGateway, market_symbol: str,
+                                       orders: List[Dict[str, Any]], entry_acked_at: float) -> List[Tuple[Dict[str, Any], Any]]:
+        """Submit every protective order at once (one batch request when enabled, else concurrently).
+
+        Batched orders carry client order ids: entries the batch response leaves missing or rejected
+        are placed again on their own, and after an error with an unknown outcome (e.g. a timeout
+        once BingX may have accepted the batch) open orders are checked first so nothing is doubled.
+        Returns (order spec, placed order or exception) pairs and records time-to-protected.
+        """
+        if not orders:
+            return []
+        results: List[Any] = [None] * len(orders)
+        if PROTECTIVE_ORDER_MODE == 'batch' and len(orders) > 1:
+            orders = [dict(o, params={**o['params'], 'clientOrderId': f"cb{uuid.uuid4().hex[:24]}"}) for o in orders]
+            try:
+                batch = await exchange.create_orders([
+                    {'symbol': market_symbol, 'type': o['type'], 'side': o['side'], 'amount': o['amount'],
+                     'price': None, 'params': o['params']}
+                    for o in orders
+                ])
+                batch = batch if isinstance(batch, list) else []
+                if len(batch) != len(orders):
+                    logger.warning(f"⚠️ Batch protective order response has {len(batch)}/{len(orders)} entries")
+                by_client_id = {placed.get('clientOrderId'): placed for placed in batch
+                                if isinstance(placed, dict) and placed.get('id') and placed.get('clientOrderId')}
+                for i, o in enumerate(orders):
+                    placed = by_client_id.get(o['params']['clientOrderId'])
+                    if placed is None and len(batch) == len(orders) and isinstance(batch[i], dict) and batch[i].get('id'):
+                        placed = batch[i]
+                    results[i] = placed
+            except Exception as e:
+                logger.warning(f"⚠️ Batch protective order submission failed, checking open orders before retrying: {e}")
+                results = await self._find_placed_orders(exchange, market_symbol, orders)
+            retry = [i for i, placed in enumerate(results) if placed is None]
+            if retry:
+                logger.info(f"🔁 {market_symbol}: placing {len(retry)}/{len(orders)} protective orders individually")
+        else:
+            retry = list(range(len(orders)))
+        if retry:
+            # Retries keep their client order ids, so a repeat of an order BingX already holds is refused, not doubled
+            placed_again = await asyncio.gather(
+                *(exchange.create_order(market_symbol, orders[i]['type'], orders[i]['side'], orders[i]['amount'], None,
+                                        orders[i]['params']) for i in retry),
+                return_exceptions=True
+            )
+            for i, placed in zip(retry, placed_again):
+                results[i] = placed
+        elapsed = time.perf_counter() - entry_acked_at
+        failed = sum(1 for r in results if isinstance(r, Exception))
+        outcome = 'protected' if not failed else ('unprotected' if failed == len(orders) else 'partial')
+        self.metrics.protection_seconds.observe(elapsed, outcome)
+        logger.info(f"🛡️ {market_symbol}: {len(orders) - failed}/{len(orders)} protective orders accepted "
+                    f"{elapsed * 1000.0:.0f} ms after entry ({outcome})")
+        return list(zip(orders, results))
+
+    async def _find_placed_orders(self, exchange: ExchangeGateway, market_symbol: str,
+                                  orders: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        """Open orders matching each spec's client order id (None where the exchange has none)"""
+        try:
+            open_orders = await exchange.fetch_open_orders(market_symbol)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not check open orders for {market_symbol}: {e}")
+            return [None] * len(orders)
+        by_client_id = {}
+        for order in open_orders or []:
+            client_id = order.get('clientOrderId') or (order.get('info') or {}).get('clientOrderID')
+            if client_id:
+                by_client_id[client_id] = order
+        return [by_client_id.get(o['params']['clientOrderId']) for o in orders]
+
+    async def execute_trade(self, signal: TradingSignal, config: BotConfig,
+                            account: Optional[AccountConfig] = None) -> Dict[str, Any]:
         """
         Enhanced trade execution with FIXED PRECISION
         
         NOTE: This method is independent of user's current menu location.
         Trades are executed automatically when signals are detected from monitored channels,
         regardless of where the user is navigating in the bot interface.
+
+        When `account` is given (signal fan-out) the trade runs entirely on that account's
+        gateway and config snapshot and never touches the shared self.exchange.
         """
         try:
             logger.info(f"🚀 EXECUTING TRADE: {signal.symbol} {signal.trade_type}")
 
             # Ensure we are using the exchange client tied to the current account (originating user)
             # Account is determined by user_id and channel mapping, not by menu state
-            current_account = self.get_current_account(config.user_id)
+            current_account = account or self.get_current_account(config.user_id)
             account_key = current_account.account_id if current_account else None
 
             # Check symbol cooldown if enabled on the account
@@ -2922,39 +5672,33 @@ class TradingBot:
                 except Exception:
                     cooldown_hours = 24
             if cooldown_hours and account_key and not self.enhanced_db.can_trade_symbol(account_key, signal.symbol, cooldown_hours=cooldown_hours):
-                logger.warning(f"⏳ Trade blocked: {signal.symbol} is in 24-hour cooldown for account {current_account.account_name if current_account else account_key}")
+                logger.warning(f"⏳ Trade blocked: {signal.symbol} is in {cooldown_hours}-hour cooldown for account {current_account.account_name if current_account else account_key}")
                 return {
                     'success': False, 
                     'error': f'Symbol {signal.symbol} is in cooldown for {cooldown_hours}h.'
                 }
 
-            if account_key and account_key in self.account_exchanges:
-                self.exchange = self.account_exchanges[account_key]
-            
-            if not self.exchange:
-                success = await self.setup_binance_client(config)
-                if not success:
-                    return {'success': False, 'error': 'Failed to connect to BingX API'}
-                # Cache the exchange per account for future orders
-                if account_key:
-                    self.account_exchanges[account_key] = self.exchange
+            # Use a local gateway reference: other accounts' trades may rebind self.exchange while we await
+            trading_type = getattr(current_account, 'trading_type', 'swap') if current_account else 'swap'
+            if current_account and current_account.bingx_api_key and current_account.bingx_secret_key:
+                exchange = self.bind_account_exchange(current_account)
+                if account is None:
+                    self.exchange = exchange
+            else:
+                if self.exchange_pool.get(account_key, trading_type):
+                    self.exchange = self.exchange_pool.get(account_key, trading_type)
+                if not self.exchange:
+                    success = await self.setup_binance_client(config)
+                    if not success:
+                        return {'success': False, 'error': 'Failed to connect to BingX API'}
+                    # Cache the exchange per account for future orders
+                    if account_key:
+                        self.exchange_pool.register(account_key, self.exchange)
+                exchange = self.exchange
 
             try:
                 logger.info(f"💰 Getting account balance...")
-                # If per-account API keys are configured, switch keys before fetching balance
-                if current_account and current_account.bingx_api_key and current_account.bingx_secret_key:
-                    # Build a per-account client (ccxt is lightweight for this usage)
-                    trading_type = getattr(current_account, 'trading_type', 'swap')
-                    self.account_exchanges[account_key] = ccxt.bingx({
-                        'apiKey': current_account.bingx_api_key,
-                        'secret': current_account.bingx_secret_key,
-                        'options': {'defaultType': trading_type},
-                        'enableRateLimit': True,
-                        'timeout': 60000
-                    })
-                    self.exchange = self.account_exchanges[account_key]
-
-                bal = self.exchange.fetch_balance({'type': trading_type})
+                bal = await exchange.fetch_balance({'type': trading_type})
                 usdt_balance = 0
                 if isinstance(bal, dict) and 'USDT' in bal:
                     asset = bal['USDT']
@@ -2980,7 +5724,7 @@ class TradingBot:
             # Ensure we always have current price with proper precision handling
             current_price = 0.0
             try:
-                ticker = self.exchange.fetch_ticker(bingx_symbol)
+                ticker = await self.prices.ticker(bingx_symbol, exchange)
                 logger.info(f"📊 Raw ticker response for {bingx_symbol}: last={ticker.get('last')}, price={ticker.get('info', {}).get('price')}")
                 
                 # Use Decimal for precision-sensitive prices to avoid float precision loss
@@ -3000,7 +5744,7 @@ class TradingBot:
                     # If hyphen format failed, the symbol might already be in a different format
                     alt_symbol = signal.symbol if '/' not in signal.symbol else signal.symbol.replace('/', '-').split(':')[0]
                     logger.info(f"🔄 Trying alternative symbol format: {alt_symbol}")
-                    ticker = self.exchange.fetch_ticker(alt_symbol)
+                    ticker = await self.prices.ticker(alt_symbol, exchange)
                     price_str = str(ticker.get('last') or ticker.get('info', {}).get('price') or '0')
                     current_price = float(Decimal(price_str)) if price_str and price_str != '0' else 0.0
                     logger.info(f"✅ Found price with alternative format: {current_price}")
@@ -3017,13 +5761,16 @@ class TradingBot:
                         current_price = 0.00000001
                         logger.warning(f"⚠️ Using minimal fallback price: {current_price} - trade will proceed with caution")
 
+            mark_stage('ticker')
+
             # Attempt to set leverage, but proceed if it fails
             try:
                 position_side = 'LONG' if side == 'BUY' else 'SHORT'
-                self.exchange.set_leverage(leverage, bingx_symbol, {'side': position_side})
+                await exchange.set_leverage(leverage, bingx_symbol, {'side': position_side})
                 logger.info(f"✅ Leverage set to {leverage}x")
             except Exception as e:
                 logger.warning(f"⚠️ Leverage setting warning: {e}")
+            mark_stage('leverage')
 
             # Determine entry price with fallback logic and precision handling
             if signal.entry_price:
@@ -3041,8 +5788,8 @@ class TradingBot:
             if not entry_price or entry_price <= 0:
                 logger.warning(f"⚠️ No valid entry price found, attempting alternative price fetch...")
                 try:
-                    # Try different ticker fields
-                    ticker = self.exchange.fetch_ticker(bingx_symbol)
+                    # Try different ticker fields (bypassing the cache: the cached one had no usable price)
+                    ticker = await self.prices.ticker(bingx_symbol, exchange, max_age=0)
                     alternative_prices = [
                         ticker.get('last'),
                         ticker.get('close'),
@@ -3067,7 +5814,7 @@ class TradingBot:
                     
                     # If still no price, try orderbook
                     if not entry_price or entry_price <= 0:
-                        orderbook = self.exchange.fetch_order_book(bingx_symbol, limit=1)
+                        orderbook = await exchange.fetch_order_book(bingx_symbol, limit=1)
                         if orderbook.get('bids') and orderbook['bids'][0][0] > 0:
                             entry_price = orderbook['bids'][0][0]
                             logger.info(f"✅ Found price from orderbook: {entry_price}")
@@ -3145,7 +5892,7 @@ class TradingBot:
             logger.info(f"   Entry Price: {entry_price}")
             logger.info(f"   Raw Quantity: {raw_quantity}")
 
-            precision_info = self.get_symbol_precision(signal.symbol)
+            precision_info = await self.get_symbol_precision(signal.symbol, exchange)
             if 'error' in precision_info:
                 return {'success': False, 'error': precision_info['error']}
 
@@ -3179,7 +5926,7 @@ class TradingBot:
             last_err = None
             while attempt < 2:
                 try:
-                    order = self.exchange.create_order(self.to_bingx_symbol(signal.symbol), 'market', side.lower(), quantity, None, order_params)
+                    order = await exchange.create_order(self.to_bingx_symbol(signal.symbol), 'market', side.lower(), quantity, None, order_params)
                     break
                 except Exception as e:
                     last_err = e
@@ -3189,10 +5936,13 @@ class TradingBot:
                 return {'success': False, 'error': f'Order creation failed: {last_err}'}
 
             logger.info(f"✅ Main order executed: {order.get('id')}")
+            entry_acked_at = time.perf_counter()
+            mark_stage('entry_order')
 
             sl_price = None
             tp_prices = []
             sl_tp_result = {'stop_loss': None, 'take_profits': []}
+            tracked_position: Optional[ActivePosition] = None
 
             if config.create_sl_tp:
                 if config.use_signal_settings:
@@ -3264,229 +6014,66 @@ class TradingBot:
                 logger.info(f"📊 SL/TP Prices before rounding: SL={sl_price}, TP={tp_prices}")
 
                 try:
-                    # Create SL and TP orders using conditional params tailored for BingX
-                    sl_tp_result = {'stop_loss': None, 'take_profits': []}
                     market_symbol = self.to_bingx_symbol(signal.symbol)
                     position_side = 'LONG' if side == 'BUY' else 'SHORT'
-
-                    if sl_price:
-                        rounded_sl = self.round_price(sl_price, precision_info['tick_size'], precision_info['price_precision'])
-                        order_type = 'STOP_MARKET'
-                        sl_order = self.exchange.create_order(
-                            market_symbol,
-                            order_type,
-                            'sell' if side == 'BUY' else 'buy',
-                            quantity,
-                            None,
-                            {
-                                'stopPrice': rounded_sl,
-                                'triggerPrice': rounded_sl,
-                                'positionSide': position_side,
-                                'workingType': 'MARK_PRICE',
-                                'type': current_trading_type  # Explicitly specify swap (futures) or spot
-                            }
-                        )
-                        logger.info(f"🛑 Stop Loss order placed: {sl_order}")
-                        sl_tp_result['stop_loss'] = sl_order.get('id')
-
-                    # Use custom take profit levels with their specific close percentages
-                    tp_targets = tp_prices[:len(config.custom_take_profits)]
-                    
-                    # Discretize TP targets to tick steps relative to current mark to avoid collapsing to same price
+                    # One price snapshot for every protective price (TP discretisation and side checks)
                     try:
-                        latest_for_tp = self.exchange.fetch_ticker(market_symbol)
-                        mark_for_tp = float(latest_for_tp.get('last') or latest_for_tp.get('info', {}).get('price') or current_price)
+                        latest = await self.prices.ticker(market_symbol, exchange)
+                        mark = float(latest.get('last') or latest.get('info', {}).get('price') or current_price)
                     except Exception:
-                        mark_for_tp = current_price
-                    
-                    adjusted_tp_targets = []
-                    prev_ticks = 0
-                    for tp_abs in tp_targets:
-                        if side == 'BUY':
-                            raw_ticks = (tp_abs - mark_for_tp) / precision_info['tick_size']
-                            need_ticks = int(raw_ticks) if raw_ticks == int(raw_ticks) else int(raw_ticks) + 1
-                            need_ticks = max(1, need_ticks)
-                            if need_ticks <= prev_ticks:
-                                need_ticks = prev_ticks + 1
-                            adjusted_tp_targets.append(mark_for_tp + need_ticks * precision_info['tick_size'])
-                            prev_ticks = need_ticks
-                        else:
-                            raw_ticks = (mark_for_tp - tp_abs) / precision_info['tick_size']
-                            need_ticks = int(raw_ticks) if raw_ticks == int(raw_ticks) else int(raw_ticks) + 1
-                            need_ticks = max(1, need_ticks)
-                            if need_ticks <= prev_ticks:
-                                need_ticks = prev_ticks + 1
-                            adjusted_tp_targets.append(mark_for_tp - need_ticks * precision_info['tick_size'])
-                            prev_ticks = need_ticks
-                    
-                    tp_targets = adjusted_tp_targets
-                    
-                    # Calculate quantities based on custom close percentages, then cap and floor so sum <= position
-                    requested_quantities: List[float] = []
-                    remaining_unrounded = quantity
-                    for i, tp_level in enumerate(config.custom_take_profits[:len(tp_targets)]):
-                        if i == len(tp_targets) - 1:
-                            requested_quantities.append(remaining_unrounded)
-                        else:
-                            desired_close = max(0.0, remaining_unrounded * (tp_level.close_percentage / 100.0))
-                            requested_quantities.append(desired_close)
-                            remaining_unrounded -= desired_close
-
-                    rounded_quantities: List[float] = []
-                    cumulative_assigned = 0.0
-                    total_levels = len(requested_quantities)
-                    step_size = precision_info['step_size']
-                    
-                    # IMPROVED: Ensure ALL configured TP levels are created
-                    # First pass: try to distribute according to percentages
-                    for i, requested in enumerate(requested_quantities):
-                        remaining_levels = total_levels - i
-                        remaining_capacity = max(quantity - cumulative_assigned, 0.0)
-                        # Keep room for at least step_size for remaining levels
-                        min_reserved_for_rest = step_size * max(remaining_levels - 1, 0)
-                        alloc = min(requested, max(remaining_capacity - min_reserved_for_rest, 0.0))
-                        each_qty = self.round_quantity(alloc, step_size, precision_info['qty_precision'])
-                        
-                        # If quantity is too small but we still have levels to create, use minimum
-                        if each_qty < step_size:
-                            if i == total_levels - 1:
-                                # Last level gets all remaining
-                                each_qty = self.round_quantity(max(quantity - cumulative_assigned, 0.0), step_size, precision_info['qty_precision'])
-                            else:
-                                # Use minimum step_size to ensure this level is created
-                                each_qty = step_size
-                        
-                        if cumulative_assigned + each_qty > quantity:
-                            each_qty = self.round_quantity(max(quantity - cumulative_assigned, 0.0), step_size, precision_info['qty_precision'])
-                        
-                        # Only skip if quantity is truly 0 or negative
-                        if each_qty <= 0:
+                        mark = current_price
+                    protective_orders = self._plan_protective_orders(
+                        signal, config, side, quantity, current_price, mark, sl_price, tp_prices,
+                        precision_info, current_trading_type
+                    )
+                    placed = await self._place_protective_orders(exchange, market_symbol, protective_orders, entry_acked_at)
+                    trailing_order_id = None
+                    for spec, placed_order in placed:
+                        if isinstance(placed_order, Exception):
+                            logger.warning(f"⚠️ {spec['label']} placement failed: {placed_order}")
                             continue
-                            
-                        rounded_quantities.append(each_qty)
-                        cumulative_assigned += each_qty
-                        if cumulative_assigned >= quantity - (step_size * 1e-9):
-                            break
-                    
-                    # If we don't have enough TPs, redistribute more evenly
-                    if len(rounded_quantities) < len(tp_targets):
-                        logger.warning(f"⚠️ Only {len(rounded_quantities)} TPs created, but {len(tp_targets)} configured. Redistributing...")
-                        # Redistribute quantity evenly across all TP levels
-                        rounded_quantities = []
-                        qty_per_level = quantity / len(tp_targets)
-                        cumulative_assigned = 0.0
-                        for i in range(len(tp_targets)):
-                            if i == len(tp_targets) - 1:
-                                # Last TP gets remainder
-                                each_qty = self.round_quantity(quantity - cumulative_assigned, step_size, precision_info['qty_precision'])
-                            else:
-                                each_qty = self.round_quantity(qty_per_level, step_size, precision_info['qty_precision'])
-                                # Ensure minimum quantity
-                                if each_qty < step_size:
-                                    each_qty = step_size
-                            
-                            if each_qty > 0:
-                                rounded_quantities.append(each_qty)
-                                cumulative_assigned += each_qty
-
-                    # Align number of TP targets with actual rounded quantities
-                    effective_tp_pairs = list(zip(tp_targets[:len(rounded_quantities)], rounded_quantities))
-                    logger.info(f"🎯 Creating {len(effective_tp_pairs)} take profit orders")
-
-                    for tp, each_qty in effective_tp_pairs:
-                        rounded_tp = self.round_price(tp, precision_info['tick_size'], precision_info['price_precision'])
-                        # Ensure TP is on the correct side of current mark price
-                        try:
-                            latest = self.exchange.fetch_ticker(market_symbol)
-                            mark = float(latest.get('last') or latest.get('info', {}).get('price') or current_price)
-                        except Exception:
-                            mark = current_price
-                        safety_ticks = precision_info['tick_size'] * 1
-                        if side == 'BUY':
-                            min_ok = self.round_price(mark + safety_ticks, precision_info['tick_size'], precision_info['price_precision'])
-                            if rounded_tp <= min_ok:
-                                rounded_tp = min_ok
-                        else:
-                            max_ok = self.round_price(mark - safety_ticks, precision_info['tick_size'], precision_info['price_precision'])
-                            if rounded_tp >= max_ok:
-                                rounded_tp = max_ok
-                        tp_order = self.exchange.create_order(
-                            market_symbol,
-                            'TAKE_PROFIT_MARKET',
-                            'sell' if side == 'BUY' else 'buy',
-                            each_qty,
-                            None,
-                            {
-                                'stopPrice': rounded_tp,
-                                'triggerPrice': rounded_tp,
-                                'positionSide': position_side,
-                                'workingType': 'MARK_PRICE',
-                                'type': current_trading_type  # Explicitly specify swap (futures) or spot
-                            }
+                        logger.info(f"{spec['label']} placed: {placed_order}")
+                        if spec['role'] == 'stop_loss':
+                            sl_tp_result['stop_loss'] = placed_order.get('id')
+                        elif spec['role'] == 'take_profit':
+                            sl_tp_result['take_profits'].append({'order_id': placed_order.get('id'), 'price': spec['price'], 'quantity': spec['amount']})
+                        elif spec['role'] == 'trailing':
+                            trailing_order_id = placed_order.get('id')
+                    if trailing_order_id is not None:
+                        # Track trailing order in active positions (trade_id will be attached below)
+                        tracked_position = ActivePosition(
+                            symbol=signal.symbol,
+                            user_id=config.user_id,
+                            side=position_side,
+                            quantity=quantity,
+                            entry_price=current_price,
+                            stop_loss_order_id=sl_tp_result.get('stop_loss'),
+                            take_profit_order_ids=[tp['order_id'] for tp in sl_tp_result.get('take_profits', [])],
+                            trailing_order_id=trailing_order_id,
+                            account_id=account_key,
+                            exchange=exchange
                         )
-                        logger.info(f"🎯 Take Profit order placed: {tp_order}")
-                        sl_tp_result['take_profits'].append({'order_id': tp_order.get('id'), 'price': rounded_tp, 'quantity': each_qty})
-
-                    # Optional trailing stop
-                    if getattr(config, 'trailing_enabled', False):
-                        try:
-                            activation_rate = float(getattr(config, 'trailing_activation_percent', 2.0)) / 100.0
-                            callback_percent = float(getattr(config, 'trailing_callback_percent', 0.5))
-                            # Activation should be beyond current price in the favorable direction
-                            if signal.trade_type == 'LONG':
-                                activation_price = current_price * (1 + activation_rate)
-                            else:
-                                activation_price = current_price * (1 - activation_rate)
-
-                            activation_price = self.round_price(activation_price, precision_info['tick_size'], precision_info['price_precision'])
-                            trailing_params = {
-                                'activationPrice': activation_price,
-                                'priceRate': round(callback_percent, 3),
-                                'positionSide': position_side,
-                                'workingType': 'MARK_PRICE'
-                            }
-                            trailing_params['type'] = current_trading_type  # Explicitly specify swap (futures) or spot
-                            trailing_order = self.exchange.create_order(
-                                market_symbol,
-                                'TRAILING_STOP_MARKET',
-                                'sell' if side == 'BUY' else 'buy',
-                                quantity,
-                                None,
-                                trailing_params
-                            )
-                            logger.info(f"🧵 Trailing Stop placed: {trailing_order}")
-                            # Track trailing order in active positions (trade_id will be attached below)
-                            self.active_positions[signal.symbol] = ActivePosition(
-                                symbol=signal.symbol,
-                                user_id=config.user_id,
-                                side=position_side,
-                                quantity=quantity,
-                                entry_price=current_price,
-                                stop_loss_order_id=sl_tp_result.get('stop_loss'),
-                                take_profit_order_ids=[tp['order_id'] for tp in sl_tp_result.get('take_profits', [])],
-                                trailing_order_id=trailing_order.get('id')
-                            )
-                        except Exception as e:
-                            logger.warning(f"⚠️ Trailing stop placement failed: {e}")
                 except Exception as e:
                     logger.warning(f"⚠️ SL/TP creation skipped/failed on BingX: {e}")
-                    sl_tp_result = {'stop_loss': None, 'take_profits': []}
+                mark_stage('protective_orders')
 
             # Ensure active position is tracked even when trailing disabled, and attach trade id
             try:
-                pos = self.active_positions.get(signal.symbol)
-                if not pos:
-                    self.active_positions[signal.symbol] = ActivePosition(
+                if tracked_position is None:
+                    tracked_position = ActivePosition(
                         symbol=signal.symbol,
                         user_id=config.user_id,
                         side='LONG' if side == 'BUY' else 'SHORT',
                         quantity=quantity,
                         entry_price=current_price,
                         stop_loss_order_id=sl_tp_result.get('stop_loss'),
-                        take_profit_order_ids=[tp['order_id'] for tp in sl_tp_result.get('take_profits', [])]
+                        take_profit_order_ids=[tp['order_id'] for tp in sl_tp_result.get('take_profits', [])],
+                        account_id=account_key,
+                        exchange=exchange
                     )
                 # Attach trade id for DB updates later
-                self.active_positions[signal.symbol].trade_id = str(order.get('id')) if order.get('id') is not None else None
+                tracked_position.trade_id = str(order.get('id')) if order.get('id') is not None else None
+                self.active_positions.put(tracked_position)
             except Exception as e:
                 logger.warning(f"⚠️ Failed to register active position: {e}")
 
@@ -3570,10 +6157,15 @@ class TradingBot:
 
             return {'success': False, 'error': str(e)}
 
-    async def start_monitoring(self, user_id: int, bot_instance) -> bool:
+    async def start_monitoring(self, user_id: int, bot_instance, account: Optional[AccountConfig] = None) -> bool:
+        """Start monitoring the user's current account, or the given one without touching the current account"""
         try:
-            config = self.get_user_config(user_id)
-            current_account = self.get_current_account(user_id)
+            if account is not None:
+                config = self.config_for_account(account)
+                current_account = account
+            else:
+                config = self.get_user_config(user_id)
+                current_account = self.get_current_account(user_id)
             
             if not current_account:
                 logger.error("❌ No current account set for monitoring")
@@ -3589,7 +6181,7 @@ class TradingBot:
 
             telethon_client = self.user_monitoring_clients.get(account_id)
             if not telethon_client:
-                success = await self.setup_telethon_client(config)
+                success = await self.setup_telethon_client(config, account=current_account)
                 if not success:
                     return False
                 telethon_client = self.user_monitoring_clients[account_id]
@@ -3599,10 +6191,8 @@ class TradingBot:
             if not self.order_monitor_running:
                 asyncio.create_task(self.monitor_orders(bot_instance))
 
-            # Note: We're now using manual polling instead of event handlers
-            # The old event handler approach is commented out below
-            # Remove existing handlers to avoid duplicates
-            # telethon_client.remove_event_handler(message_handler) if 'message_handler' in locals() else None
+            # Note: message ingestion (NewMessage handler on resolved entities + fallback polling)
+            # is registered per account inside _run_telethon_client; the legacy handler below is unused
             
             # Old event handler approach (not reliable with python-telegram-bot integration)
             # @telethon_client.on(events.NewMessage(incoming=True))
@@ -3731,52 +6321,257 @@ class TradingBot:
                 await telethon_client.connect()
                 logger.info(f"✅ Connected Telethon client for user {user_id}")
 
-            # Set active monitoring BEFORE starting the task
-            self.active_monitoring[user_id] = True
-            logger.info(f"🔛 Set active_monitoring[{user_id}] = True")
-            
-            # Set account monitoring status - this is critical for message processing
-            self.account_monitoring_status[account_id] = True
-            logger.info(f"🔛 Set account_monitoring_status[{account_id}] = True")
+            # Set active monitoring BEFORE starting the task
+            self.active_monitoring[user_id] = True
+            logger.info(f"🔛 Set active_monitoring[{user_id}] = True")
+            
+            # Set account monitoring status - this is critical for message processing
+            self.account_monitoring_status[account_id] = True
+            logger.info(f"🔛 Set account_monitoring_status[{account_id}] = True")
+
+            # Start background task to process Telethon events for THIS ACCOUNT if not already running
+            # Each account gets its own monitoring task for true background monitoring
+            if account_id not in self.monitoring_tasks or self.monitoring_tasks[account_id].done():
+                self.monitoring_tasks[account_id] = asyncio.create_task(self._run_telethon_client(account_id, user_id))
+                logger.info(f"✅ Started Telethon event loop task for account {account_id} (user {user_id})")
+            else:
+                logger.info(f"ℹ️ Telethon event loop task already running for account {account_id}")
+
+            logger.info(f"📡 Monitoring now ACTIVE for user {user_id}")
+            logger.info(f"📡 Monitored channels: {config.monitored_channels}")
+            logger.info(f"🔔 Client connected: {telethon_client.is_connected()}")
+            logger.info(f"🔔 Active monitoring status: {self.active_monitoring.get(user_id, False)}")
+            logger.info(f"🔔 Account monitoring status: {self.account_monitoring_status.get(account_id, False)}")
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Start monitoring error: {e}")
+            logger.error(f"❌ Start monitoring error details: {traceback.format_exc()}")
+            return False
+    
+    async def _resolve_channel_entities(self, telethon_client, channels: List[str]) -> Dict[str, Any]:
+        """Resolve monitored channel ids to Telethon entities (done once per channel set, not per tick)"""
+        entities: Dict[str, Any] = {}
+        for channel_id_str in channels:
+            try:
+                channel_id = int(channel_id_str)
+            except ValueError as e:
+                logger.error(f"❌ Invalid channel ID format: {channel_id_str}: {e}")
+                continue
+            # Use PeerChannel for proper channel/megagroup handling, fall back to the raw id
+            try:
+                entity = await telethon_client.get_entity(PeerChannel(abs(channel_id)))
+            except Exception as entity_error:
+                try:
+                    entity = await telethon_client.get_entity(channel_id)
+                except Exception as e2:
+                    logger.warning(f"⚠️ Could not get entity for channel {channel_id_str}: {entity_error}, fallback also failed: {e2}")
+                    continue
+            entities[channel_id_str] = entity
+        return entities
+
+    async def _init_channel_cursors(self, account_id: str, telethon_client, entities: Dict[str, Any],
+                                    last_message_ids: Dict[str, int]) -> List[Tuple[str, Any]]:
+        """Position each new channel's cursor and return the missed messages to catch up on.
+
+        A channel with a persisted cursor resumes from it: one batched get_messages(min_id) fetches
+        the oldest CHANNEL_CATCHUP_LIMIT missed messages, and those older than
+        CHANNEL_CATCHUP_MAX_AGE_SECONDS are skipped. The persisted cursor only moves past a missed
+        message once the parse stage has handled it; when the page is full the channel is marked
+        as catching up and the rest of the range is drained by _poll_channels. Channels seen for
+        the first time (or with catch-up disabled) start at their latest message so history is
+        not replayed. Returns (channel_id, message) pairs in chronological order.
+        """
+        # Shared cursors, falling back to the account's own ones written before channels were shared
+        stored = self.enhanced_db.get_channel_cursors(account_id)
+        for channel_id_str, message_id in self.enhanced_db.get_channel_cursors(ChannelIngestionHub.CURSOR_KEY).items():
+            stored[channel_id_str] = max(message_id, stored.get(channel_id_str, 0))
+        now = datetime.now(timezone.utc)
+        backlog: List[Tuple[str, Any]] = []
+        for channel_id_str, entity in entities.items():
+            if channel_id_str in last_message_ids:
+                continue
+            try:
+                resume_from = stored.get(channel_id_str)
+                if resume_from and CHANNEL_CATCHUP_LIMIT > 0:
+                    missed = await telethon_client.get_messages(entity, min_id=resume_from, limit=CHANNEL_CATCHUP_LIMIT,
+                                                                reverse=True)
+                    last_message_ids[channel_id_str] = missed[-1].id if missed else resume_from
+                    fresh, stale, skipped_through = [], 0, None
+                    for msg in missed:
+                        if self._catchup_stale(msg, now):
+                            stale += 1
+                        elif msg.message:
+                            fresh.append((channel_id_str, msg))
+                            continue
+                        if not fresh:
+                            skipped_through = msg.id
+                    backlog.extend(fresh)
+                    if skipped_through:
+                        # Nothing unhandled precedes these skipped messages, so the cursor may pass them now
+                        self._advance_cursor(channel_id_str, skipped_through)
+                    if missed:
+                        logger.info(f"⏪ Catch-up for channel {channel_id_str}: {len(missed)} missed since message {resume_from}, "
+                                    f"{len(fresh)} to process, {stale} too old")
+                    if len(missed) == CHANNEL_CATCHUP_LIMIT:
+                        self.ingestion.catching_up.add(channel_id_str)
+                        logger.warning(f"⚠️ Catch-up for channel {channel_id_str} hit CHANNEL_CATCHUP_LIMIT={CHANNEL_CATCHUP_LIMIT}: "
+                                       f"the rest of the missed range is drained after message {missed[-1].id}")
+                else:
+                    messages = await telethon_client.get_messages(entity, limit=1)
+                    last_message_ids[channel_id_str] = messages[0].id if messages else 0
+                    logger.info(f"📝 Initialized tracking for channel {channel_id_str}, starting from message ID: {last_message_ids[channel_id_str]}")
+                    if last_message_ids[channel_id_str] and last_message_ids[channel_id_str] != resume_from:
+                        self.enhanced_db.save_channel_cursor(ChannelIngestionHub.CURSOR_KEY, channel_id_str, last_message_ids[channel_id_str])
+            except Exception as e:
+                logger.warning(f"⚠️ Could not read latest message for channel {channel_id_str}: {e}")
+        backlog.sort(key=lambda item: (getattr(item[1], 'date', None) or now, item[1].id))
+        return backlog
+
+    @staticmethod
+    def _catchup_stale(msg, now: datetime) -> bool:
+        """True for a missed message too old (CHANNEL_CATCHUP_MAX_AGE_SECONDS) to act on"""
+        msg_date = getattr(msg, 'date', None)
+        if isinstance(msg_date, datetime) and msg_date.tzinfo is None:
+            msg_date = msg_date.replace(tzinfo=timezone.utc)
+        return isinstance(msg_date, datetime) and (now - msg_date).total_seconds() > CHANNEL_CATCHUP_MAX_AGE_SECONDS
+
+    async def _ingest_message(self, account_id: str, user_id: int, channel_id_str: str, msg,
+                              received_at: float, source: str):
+        """Queue a message for the parse stage (waits while that queue is full, slowing ingestion down)"""
+        self.ingestion.ingested(channel_id_str, msg.id)
+        await self.pipeline.submit(PipelineItem(message=msg, channel_id=channel_id_str, user_id=user_id,
+                                                account_id=account_id, received_at=received_at, source=source))
+
+    async def _parse_ingested(self, item: PipelineItem):
+        """Parse stage worker: handle one ingested message, then let the channel cursor move past it"""
+        try:
+            await self._handle_new_message(item.message, item.channel_id, item.user_id, item.account_id,
+                                           received_at=item.received_at, source=item.source)
+        finally:
+            self._advance_cursor(item.channel_id, item.message.id)
+
+    def _advance_cursor(self, channel_id_str: str, message_id: int):
+        """Persist the shared channel cursor, never past a message still waiting in the pipeline
+        (skipped messages and parallel parse workers otherwise move it over unparsed signals)"""
+        watermark = self.ingestion.handled(channel_id_str, message_id)
+        if watermark is not None:
+            self.enhanced_db.save_channel_cursor(ChannelIngestionHub.CURSOR_KEY, channel_id_str, watermark)
+
+    def _register_channel_events(self, account_id: str, user_id: int, telethon_client,
+                                 entities: Dict[str, Any], last_message_ids: Dict[str, int]):
+        """(Re)register a single NewMessage handler for the channels this account's client owns"""
+        self._unregister_channel_events(account_id, telethon_client)
+        if not entities:
+            return
+
+        peer_to_channel: Dict[int, str] = {}
+        for channel_id_str, entity in entities.items():
+            try:
+                peer_to_channel[telethon_utils.get_peer_id(entity)] = channel_id_str
+            except Exception:
+                peer_to_channel[int(channel_id_str)] = channel_id_str
+
+        async def on_new_message(event):
+            received_at = time.perf_counter()
+            try:
+                channel_id_str = peer_to_channel.get(event.chat_id)
+                if not channel_id_str or not self.account_monitoring_status.get(account_id, False):
+                    return
+                msg = event.message
+                if channel_id_str in self.ingestion.catching_up:
+                    return  # the poller reaches it once the missed range before it is drained
+                if msg.id <= last_message_ids.get(channel_id_str, 0):
+                    return  # already handled by the fallback poller
+                last_message_ids[channel_id_str] = msg.id
+                if not msg.message:
+                    logger.debug(f"⏭️ Skipping message ID {msg.id} (no text content)")
+                    self._advance_cursor(channel_id_str, msg.id)
+                    return
+                logger.info(f"⚡ [events] New message {msg.id} in channel {channel_id_str} for account {account_id[:8]}")
+                await self._ingest_message(account_id, user_id, channel_id_str, msg, received_at, 'events')
+            except Exception as e:
+                logger.error(f"❌ NewMessage handler error for account {account_id}: {e}")
+                logger.error(traceback.format_exc())
+
+        builder = events.NewMessage(chats=list(entities.values()))
+        telethon_client.add_event_handler(on_new_message, builder)
+        self.telethon_event_handlers[account_id] = (on_new_message, builder)
+        logger.info(f"📡 Registered NewMessage handler for account {account_id[:8]} on {len(entities)} channels")
+
+    def _unregister_channel_events(self, account_id: str, telethon_client=None):
+        registered = self.telethon_event_handlers.pop(account_id, None)
+        if not registered:
+            return
+        telethon_client = telethon_client or self.user_monitoring_clients.get(account_id)
+        if telethon_client:
+            try:
+                telethon_client.remove_event_handler(*registered)
+            except Exception as e:
+                logger.debug(f"Event handler removal failed for {account_id}: {e}")
 
-            # Start background task to process Telethon events for THIS ACCOUNT if not already running
-            # Each account gets its own monitoring task for true background monitoring
-            if account_id not in self.monitoring_tasks or self.monitoring_tasks[account_id].done():
-                self.monitoring_tasks[account_id] = asyncio.create_task(self._run_telethon_client(account_id, user_id))
-                logger.info(f"✅ Started Telethon event loop task for account {account_id} (user {user_id})")
-            else:
-                logger.info(f"ℹ️ Telethon event loop task already running for account {account_id}")
+    async def _poll_channels(self, account_id: str, user_id: int, telethon_client,
+                             entities: Dict[str, Any], last_message_ids: Dict[str, int]):
+        """One polling pass: a single get_messages(min_id) per channel using cached entities
 
-            logger.info(f"📡 Monitoring now ACTIVE for user {user_id}")
-            logger.info(f"📡 Monitored channels: {config.monitored_channels}")
-            logger.info(f"🔔 Client connected: {telethon_client.is_connected()}")
-            logger.info(f"🔔 Active monitoring status: {self.active_monitoring.get(user_id, False)}")
-            logger.info(f"🔔 Account monitoring status: {self.account_monitoring_status.get(account_id, False)}")
-            return True
+        Messages are fetched oldest-first so a burst larger than one page is picked up by the next
+        pass instead of skipped. Channels still catching up read full catch-up pages, skip messages
+        older than CHANNEL_CATCHUP_MAX_AGE_SECONDS, and leave catch-up on the first partial page.
+        """
+        now = datetime.now(timezone.utc)
+        for channel_id_str, entity in entities.items():
+            try:
+                catching_up = channel_id_str in self.ingestion.catching_up
+                page = CHANNEL_CATCHUP_LIMIT if catching_up else 10
+                last_id = last_message_ids.get(channel_id_str, 0)
+                new_messages = await telethon_client.get_messages(entity, min_id=last_id, limit=page, reverse=True)
+                if catching_up and len(new_messages) < page:
+                    self.ingestion.catching_up.discard(channel_id_str)
+                    logger.info(f"✅ Catch-up for channel {channel_id_str} finished")
+                if not new_messages:
+                    continue
+                logger.info(f"📥 Retrieved {len(new_messages)} new messages from channel {channel_id_str}")
+                # Process each new message (in chronological order)
+                for msg in new_messages:
+                    if msg.id <= last_message_ids.get(channel_id_str, 0):
+                        continue
+                    last_message_ids[channel_id_str] = msg.id
+                    if catching_up and self._catchup_stale(msg, now):
+                        logger.debug(f"⏭️ Skipping message ID {msg.id} (older than the catch-up window)")
+                        self._advance_cursor(channel_id_str, msg.id)
+                    elif msg.message:
+                        logger.info(f"📨 Processing new message ID {msg.id}: {msg.message[:100]}...")
+                        await self._ingest_message(account_id, user_id, channel_id_str, msg, time.perf_counter(),
+                                                   'catchup' if catching_up else 'polling')
+                    else:
+                        logger.debug(f"⏭️ Skipping message ID {msg.id} (no text content)")
+                        self._advance_cursor(channel_id_str, msg.id)
+            except Exception as e:
+                logger.error(f"❌ Error checking channel {channel_id_str}: {e}")
+                logger.error(traceback.format_exc())
 
-        except Exception as e:
-            logger.error(f"❌ Start monitoring error: {e}")
-            logger.error(f"❌ Start monitoring error details: {traceback.format_exc()}")
-            return False
-    
     async def _run_telethon_client(self, account_id: str, user_id: int):
-        """Actively poll Telethon for new messages for a specific account.
+        """Ingest new messages from the monitored channels of a specific account.
         
-        This function manually checks for new messages in monitored channels for ONE account.
+        The account joins the ingestion hub with the entities of its channels (resolved once per
+        channel set) and consumes only the channels the hub assigns to its client; messages of the
+        other channels reach it through the fan-out of whichever client owns them.
+        In 'events' mode messages are pushed by a Telethon NewMessage handler registered on the
+        owned entities; catch_up() recovers update gaps after (re)connects, and a slow polling
+        pass only acts as a safety net. In 'polling' mode the owned entities are polled every 5 seconds.
+        Channel cursors are persisted, so after a restart the missed range is caught up
+        (in pages of CHANNEL_CATCHUP_LIMIT, skipping messages older than CHANNEL_CATCHUP_MAX_AGE_SECONDS) instead of skipped;
+        a channel taken over from a failed client is polled from the shared cursor at once.
         Each account runs its own monitoring task, enabling true background monitoring.
         
         Args:
             account_id: The account ID to monitor
             user_id: The user ID that owns this account
         """
+        telethon_client = None
         try:
-            # Get account from database
-            accounts = self.enhanced_db.get_all_accounts()
-            account = None
-            for acc in accounts:
-                if acc.account_id == account_id:
-                    account = acc
-                    break
+            # Get account from the registry
+            account = self.enhanced_db.get_account(account_id)
             
             if not account:
                 logger.error(f"❌ Account {account_id} not found")
@@ -3787,331 +6582,416 @@ class TradingBot:
                 logger.error(f"❌ No Telethon client found for account {account_id}")
                 return
             
-            logger.info(f"🔄 [_run_telethon_client] Starting message polling for account {account.account_name} (ID: {account_id})")
-            logger.info(f"🔄 [_run_telethon_client] Account monitoring status: {self.account_monitoring_status.get(account_id, False)}")
+            use_events = TELETHON_INGESTION_MODE != 'polling'
+            poll_interval = TELETHON_FALLBACK_POLL_SECONDS if use_events else 5.0
+            logger.info(f"🔄 [_run_telethon_client] Starting {'event' if use_events else 'polling'} ingestion for account {account.account_name} (ID: {account_id})")
             
             # Ensure connection is established
             if not telethon_client.is_connected():
                 logger.info(f"🔌 [_run_telethon_client] Connecting Telethon client for account {account.account_name}...")
                 await telethon_client.connect()
             
-            logger.info(f"✅ [_run_telethon_client] Telethon client connected for account {account.account_name}, actively polling for new messages")
-            logger.info(f"✅ [_run_telethon_client] Entering polling loop...")
-            
-            # Track last message ID for each channel to detect new messages
-            last_message_ids = {}
+            # Last message ID per channel, shared with every client through the ingestion hub
+            last_message_ids = self.ingestion.last_message_ids
+            entities: Dict[str, Any] = {}
+            owned: Dict[str, Any] = {}
+            channel_set: Optional[frozenset] = None
+            owned_set: Optional[frozenset] = None
+            last_poll = time.monotonic()
+            needs_catch_up = use_events
             
-            # Keep polling while THIS ACCOUNT's monitoring is active
+            # Keep ingesting while THIS ACCOUNT's monitoring is active
             while self.account_monitoring_status.get(account_id, False):
                 try:
                     # Check if client is still connected
                     if not telethon_client.is_connected():
                         logger.warning(f"⚠️ Telethon client disconnected for account {account.account_name}, reconnecting...")
                         await telethon_client.connect()
+                        needs_catch_up = use_events
                     
-                    # Get fresh account data from database to check monitored channels
-                    accounts = self.enhanced_db.get_all_accounts()
-                    account = None
-                    for acc in accounts:
-                        if acc.account_id == account_id:
-                            account = acc
-                            break
+                    # Get current account data (registry is updated on every settings write)
+                    account = self.enhanced_db.get_account(account_id)
                     
                     if not account or not account.monitored_channels:
                         logger.debug(f"⏸️ No channels configured for account {account_id}, waiting...")
+                        if channel_set:
+                            self._unregister_channel_events(account_id, telethon_client)
+                            self.ingestion.leave(account_id)
+                            channel_set, entities, owned, owned_set = None, {}, {}, None
+                            self.listening_event(account_id).clear()
                         await asyncio.sleep(10)
                         continue
                     
-                    logger.debug(f"🔍 Polling {len(account.monitored_channels)} channels for account {account.account_name}: {account.monitored_channels}")
-                    
-                    # Monitor only THIS account's channels
-                    channels_to_check = [str(ch) for ch in account.monitored_channels]
+                    # Re-resolve entities and rejoin the hub only when the channel set changes
+                    current_set = frozenset(str(ch) for ch in account.monitored_channels)
+                    if current_set != channel_set:
+                        entities = await self._resolve_channel_entities(telethon_client, sorted(current_set))
+                        removed = [ch for ch in (channel_set or ()) if ch not in current_set]
+                        if removed:
+                            self.enhanced_db.delete_channel_cursors(account_id, removed)
+                            unsubscribed = [ch for ch in removed if not self.enhanced_db.get_channel_accounts(ch)]
+                            if unsubscribed:
+                                self.enhanced_db.delete_channel_cursors(ChannelIngestionHub.CURSOR_KEY, unsubscribed)
+                        self.ingestion.join(account_id, entities)
+                        channel_set = current_set
+                        self.listening_event(account_id).set()
+                        logger.info(f"📡 Monitoring {len(entities)}/{len(current_set)} channels for account {account.account_name}")
                     
-                    if not channels_to_check:
-                        logger.debug(f"⏸️ No active channels to check for account {account_id}")
-                        await asyncio.sleep(10)
-                        continue
+                    # Consume only the channels the hub assigns to this client (changes on joins and failover)
+                    owned = self.ingestion.owned(account_id)
+                    if frozenset(owned) != owned_set:
+                        acquired = {ch: entity for ch, entity in owned.items() if ch not in (owned_set or ())}
+                        taken_over = {ch: entity for ch, entity in acquired.items() if ch in last_message_ids}
+                        backlog = await self._init_channel_cursors(
+                            account_id, telethon_client,
+                            {ch: entity for ch, entity in acquired.items() if ch not in taken_over}, last_message_ids)
+                        if use_events:
+                            self._register_channel_events(account_id, user_id, telethon_client, owned, last_message_ids)
+                        owned_set = frozenset(owned)
+                        logger.info(f"📡 Account {account.account_name} consumes {len(owned)}/{len(entities)} channels "
+                                    f"({len(self.ingestion)} distinct channels across clients)")
+                        # Missed messages are handled after the live handler is up so new ones are not delayed behind them
+                        for channel_id_str, msg in backlog:
+                            logger.info(f"⏪ [catch-up] Message {msg.id} in channel {channel_id_str} for account {account_id[:8]}")
+                            await self._ingest_message(account_id, user_id, channel_id_str, msg, time.perf_counter(), 'catchup')
+                        if taken_over:
+                            # Failover: resume where the previous client stopped
+                            await self._poll_channels(account_id, user_id, telethon_client, taken_over, last_message_ids)
                     
-                    logger.debug(f"🔍 Monitoring {len(channels_to_check)} channels for account {account.account_name}")
+                    # Drain the rest of a missed range that did not fit in one catch-up page, a page per tick
+                    draining = {ch: entity for ch, entity in owned.items() if ch in self.ingestion.catching_up}
+                    if draining:
+                        await self._poll_channels(account_id, user_id, telethon_client, draining, last_message_ids)
                     
-                    # Check each monitored channel for new messages
-                    for channel_id_str in channels_to_check:
+                    if needs_catch_up:
                         try:
-                            # Convert string channel ID to entity
-                            channel_id = int(channel_id_str)
-                            
-                            logger.debug(f"🔎 Checking channel {channel_id_str} for new messages...")
-                            
-                            # Get entity first to avoid ChatIdInvalidError
-                            # Use PeerChannel for proper channel/megagroup handling
-                            try:
-                                from telethon.tl.types import PeerChannel
-                                # For channels/megagroups, use PeerChannel with positive ID
-                                peer = PeerChannel(abs(channel_id))
-                                entity = await telethon_client.get_entity(peer)
-                            except Exception as entity_error:
-                                # Fallback to direct int if PeerChannel fails
-                                try:
-                                    entity = await telethon_client.get_entity(channel_id)
-                                except Exception as e2:
-                                    logger.warning(f"⚠️ Could not get entity for channel {channel_id_str}: {entity_error}, fallback also failed: {e2}")
-                                    continue
-                            
-                            # Get the latest message from this channel
-                            messages = await telethon_client.get_messages(entity, limit=1)
-                            
-                            if not messages:
-                                logger.debug(f"📭 No messages found in channel {channel_id_str}")
-                                continue
-                            
-                            latest_msg = messages[0]
-                            msg_id = latest_msg.id
-                            
-                            logger.debug(f"📬 Latest message in channel {channel_id_str}: ID={msg_id}")
-                            
-                            # Initialize last_message_ids for this channel if needed
-                            if channel_id_str not in last_message_ids:
-                                # Initialize with current msg_id to skip existing messages
-                                # Only process NEW messages that arrive AFTER bot startup
-                                last_message_ids[channel_id_str] = msg_id
-                                logger.info(f"📝 Initialized tracking for channel {channel_id_str}, starting from message ID: {msg_id}")
-                                logger.info(f"📝 Latest message preview: {latest_msg.message[:100] if latest_msg.message else '(no text)'}")
-                                logger.info(f"⏭️ Skipping existing messages, will only process new messages from now on")
-                                continue  # Skip to next channel, don't process existing messages
-                            
-                            # Check if this is a new message
-                            if msg_id > last_message_ids[channel_id_str]:
-                                logger.info(f"🆕 New message detected in channel {channel_id_str}! ID: {msg_id} (previous: {last_message_ids[channel_id_str]})")
-                                
-                                # Get all new messages since last check
-                                new_messages = await telethon_client.get_messages(
-                                    channel_id,
-                                    min_id=last_message_ids[channel_id_str],
-                                    limit=10
-                                )
-                                
-                                logger.info(f"📥 Retrieved {len(new_messages)} new messages from channel {channel_id_str}")
-                                
-                                # Process each new message (in chronological order)
-                                for msg in reversed(new_messages):
-                                    if msg.id > last_message_ids[channel_id_str] and msg.message:
-                                        logger.info(f"📨 Processing new message ID {msg.id}: {msg.message[:100]}...")
-                                        await self._handle_new_message(msg, channel_id_str, user_id, account_id)
-                                    elif msg.id > last_message_ids[channel_id_str]:
-                                        logger.debug(f"⏭️ Skipping message ID {msg.id} (no text content)")
-                                
-                                # Update last seen message ID
-                                last_message_ids[channel_id_str] = msg_id
-                                logger.info(f"✅ Updated last message ID for channel {channel_id_str} to {msg_id}")
-                            else:
-                                logger.debug(f"✓ No new messages in channel {channel_id_str} (current: {msg_id}, last: {last_message_ids[channel_id_str]})")
-                                
-                        except ValueError as e:
-                            logger.error(f"❌ Invalid channel ID format: {channel_id_str}: {e}")
+                            await telethon_client.catch_up()
                         except Exception as e:
-                            logger.error(f"❌ Error checking channel {channel_id_str}: {e}")
-                            logger.error(traceback.format_exc())
+                            logger.warning(f"⚠️ catch_up failed for account {account.account_name}: {e}")
+                        needs_catch_up = False
+                    
+                    if time.monotonic() - last_poll >= poll_interval:
+                        await self._poll_channels(account_id, user_id, telethon_client, owned, last_message_ids)
+                        last_poll = time.monotonic()
                     
-                    # Poll every 5 seconds to catch new messages quickly
+                    # Short tick: cheap channel-set / connection checks, network polling is gated above
                     await asyncio.sleep(5)
                     
                 except Exception as e:
-                    logger.error(f"❌ Error in message polling loop for account {account_id}: {e}")
-                    logger.error(f"❌ Message polling loop error: {traceback.format_exc()}")
+                    logger.error(f"❌ Error in message ingestion loop for account {account_id}: {e}")
+                    logger.error(f"❌ Message ingestion loop error: {traceback.format_exc()}")
                     await asyncio.sleep(10)
             
-            logger.info(f"🛑 Message polling stopped for account {account.account_name} (ID: {account_id})")
+            logger.info(f"🛑 Message ingestion stopped for account {account.account_name} (ID: {account_id})")
             
         except Exception as e:
-            logger.error(f"❌ Fatal error in message polling for account {account_id}: {e}")
-            logger.error(f"❌ Message polling fatal error: {traceback.format_exc()}")
-    
-    async def _handle_new_message(self, message, channel_id: str, user_id: int, account_id: str = None):
-        """Handle a new message from a monitored channel
+            logger.error(f"❌ Fatal error in message ingestion for account {account_id}: {e}")
+            logger.error(f"❌ Message ingestion fatal error: {traceback.format_exc()}")
+        finally:
+            self._unregister_channel_events(account_id, telethon_client)
+            self.ingestion.leave(account_id)
+            self.listening_event(account_id).clear()
+    
+    def _record_signal_latency(self, message, account_id: str, source: str, received_at: float, success: bool):
+        """Log and keep signal-arrival-to-order latency (plus Telegram delivery lag when known)"""
+        order_latency_ms = (time.perf_counter() - received_at) * 1000.0
+        receive_lag_ms = None
+        msg_date = getattr(message, 'date', None)
+        if isinstance(msg_date, datetime):
+            if msg_date.tzinfo is None:
+                msg_date = msg_date.replace(tzinfo=timezone.utc)
+            # Telegram stamps whole seconds, so this lag has ~1s resolution
+            receive_lag_ms = max(0.0, (datetime.now(timezone.utc) - msg_date).total_seconds() * 1000.0 - order_latency_ms)
+        self.signal_latency_samples.append((account_id, source, receive_lag_ms, order_latency_ms))
+        lag_info = f", delivery lag ~{receive_lag_ms:.0f} ms" if receive_lag_ms is not None else ""
+        trace = _current_trace.get()
+        stage_info = f" [{trace.summary()}]" if trace is not None and trace.stages else ""
+        logger.info(f"⏱️ Signal latency [{source}] account {account_id[:8]}: arrival→order {order_latency_ms:.0f} ms "
+                    f"({'ok' if success else 'failed'}){lag_info}{stage_info}")
+
+    def _position_price_symbols(self) -> List[Tuple[str, str]]:
+        """(symbol, trading type) of every open position, kept hot by the price service"""
+        return [(self.to_bingx_symbol(p.symbol), getattr(p.exchange, 'trading_type', None) or 'swap')
+                for p in self.active_positions]
+
+    def _accounts_for_channel(self, channel_id: str) -> List[AccountConfig]:
+        """Accounts (with a user) that have this channel in their monitored channels"""
+        return [acc for acc in self.enhanced_db.get_channel_accounts(channel_id) if acc.user_id]
+
+    def _subscriber_users(self, channel_id: str, user_id: int) -> List[int]:
+        """Distinct users with a monitoring account on this channel, the ingesting user first"""
+        users = [user_id]
+        for acc in self._accounts_for_channel(channel_id):
+            if acc.user_id not in users and self.account_monitoring_status.get(acc.account_id, False):
+                users.append(acc.user_id)
+        return users
+
+    def _claim_message(self, channel_id: str, message) -> bool:
+        """True for the first account client that sees a message; every later client skips it"""
+        return self.signal_dedup.claim_message(channel_id, getattr(message, 'id', None))
+
+    async def _notify_trade_result(self, user_id: int, signal: TradingSignal, result: Dict[str, Any],
+                                   account_name: Optional[str] = None):
+        """Send one account's trade result to its user"""
+        bot_instance = self.bot_instances.get(user_id)
+        if not bot_instance:
+            return
+        try:
+            channel_display = await self.get_channel_display_name(signal.channel_id, user_id) if signal.channel_id else "Unknown"
+            if account_name:
+                channel_display += f"\n👤 Account: {account_name}"
+            if result.get('success'):
+                notification = f"""✅ <b>TRADE EXECUTED!</b>
+
+💰 Symbol: {result['symbol']}
+📈 Direction: {signal.trade_type}
+📡 From: {channel_display}
+🆔 Order ID: {result['order_id']}
+📦 Quantity: {result['quantity']}
+💲 Entry: {result['price']}
+⚡ Leverage: {result['leverage']}x
+💵 Order Value: ${result['order_value']:.2f}"""
+
+                if 'sl_price' in result and result['sl_price']:
+                    notification += f"\n🛑 Stop Loss: {result['sl_price']:.6f}"
+                    if result.get('stop_loss_id'):
+                        notification += f" (ID: {result['stop_loss_id']})"
+
+                if 'tp_prices' in result and result['tp_prices']:
+                    notification += f"\n🎯 Take Profits:"
+                    for i, tp in enumerate(result.get('take_profit_ids', [])):
+                        notification += f"\n  TP{i+1}: {tp['price']:.6f} (ID: {tp['order_id']})"
+
+                notification += "\n🔗 Sent to Make.com"
+                notification += "\n🔄 OCO: Auto-cancel enabled"
+                notification += f"\n⏰ Time: {datetime.now().strftime('%H:%M:%S')}"
+                notification += f"\n\n🎉 Position is LIVE!"
+
+            else:
+                notification = f"""❌ <b>TRADE EXECUTION FAILED</b>
+
+💰 Symbol: {signal.symbol}
+📈 Direction: {signal.trade_type}
+📡 From: {channel_display}
+🚨 Error: {result.get('error', 'Unknown error')}
+⏰ Time: {datetime.now().strftime('%H:%M:%S')}"""
+
+            await bot_instance.send_message(chat_id=user_id, text=notification, parse_mode='HTML')
+        except Exception as e:
+            logger.error(f"Error sending trade result notification: {e}")
+
+    async def _send_notice(self, user_id: int, text: str):
+        """Notify stage job: send one HTML message to a user"""
+        bot_instance = self.bot_instances.get(user_id)
+        if not bot_instance:
+            return
+        try:
+            await bot_instance.send_message(chat_id=user_id, text=text, parse_mode='HTML')
+        except Exception as e:
+            logger.error(f"❌ Error sending notification to user {user_id}: {e}")
+
+    async def _notify_message_received(self, user_id: int, channel_id: str, message_text: str):
+        channel_name = await self.get_channel_display_name(channel_id, user_id)
+        await self._send_notice(user_id, f"📨 <b>New Message Received</b>\n\n<b>From:</b> {channel_name}\n\n<pre>{message_text[:300]}</pre>\n\n🔍 Processing...")
+
+    async def _notify_signal_detected(self, user_id: int, signal: TradingSignal, settings_source: str):
+        # Get consistent channel name using the cache
+        channel_info = ""
+        try:
+            channel_display = await self.get_channel_display_name(signal.channel_id, user_id) if signal.channel_id else None
+            if channel_display:
+                channel_info = f"\n📡 Source: {channel_display}"
+        except Exception:
+            pass
+        await self._send_notice(user_id, f"🎯 <b>SIGNAL DETECTED!</b>\n\n💰 {signal.symbol} {signal.trade_type}\n⚙️ Using: {settings_source} settings{channel_info}\n🚀 Executing...")
+
+    def _signal_expired(self, stage: str, item: PipelineItem):
+        """A signal waited longer than PIPELINE_SIGNAL_MAX_AGE_SECONDS in a queue: log it and tell the user"""
+        age = time.perf_counter() - item.received_at
+        signal = item.signal
+        user_id = item.account.user_id if item.account else item.user_id
+        target = item.account.account_name if item.account else f"user {user_id}"
+        logger.warning(f"⌛ Dropped stale {signal.symbol} {signal.trade_type} signal for {target}: "
+                       f"{age:.0f}s old at the {stage} stage")
+        self.pipeline.notify_later(lambda: self._send_notice(
+            user_id, f"⌛ <b>Signal Expired</b>\n\n💰 {signal.symbol} {signal.trade_type}\n👤 {target}\n"
+                     f"⏱️ Waited {age:.0f}s (limit {self.pipeline.max_age:.0f}s)\n\nTrade skipped."))
+
+    async def _execute_signal(self, item: PipelineItem):
+        """Execute stage worker: one account's trade, bounded across accounts by the fan-out semaphore"""
+        if self._fanout_semaphore is None:
+            self._fanout_semaphore = asyncio.Semaphore(max(1, FANOUT_MAX_CONCURRENCY))
+        _current_trace.set(item.trace)
+        mark_stage('execute_queue')
+        signal, account = item.signal, item.account
+        account_id = account.account_id if account else (item.account_id or '')
+        # The symbol cooldown is only recorded once the order is placed: trades of one account on one
+        # symbol run one at a time so a second signal sees the first one's cooldown
+        lock = self._trade_locks.setdefault((account_id, signal.symbol), asyncio.Lock())
+        async with lock, self._fanout_semaphore:
+            mark_stage('fanout_slot')
+            try:
+                config = self.config_for_account(account) if account else item.config
+                result = await self.execute_trade(signal, config, account=account)
+            except Exception as e:
+                logger.error(f"❌ Trade failed for account {account.account_name if account else item.account_id}: {e}")
+                result = {'success': False, 'error': str(e)}
+        self._record_signal_latency(item.message, account_id, item.source, item.received_at, bool(result.get('success')))
+        if not result.get('success'):
+            logger.warning(f"   ❌ {account.account_name if account else 'user ' + str(item.user_id)}: "
+                           f"{result.get('error', 'Unknown error')}")
+        user_id = account.user_id if account else item.user_id
+        account_name = account.account_name if account else None
+        self.pipeline.notify_later(lambda: self._notify_trade_result(user_id, signal, result, account_name))
+
+    async def fan_out_signal(self, item: PipelineItem, accounts: List[AccountConfig]):
+        """Queue the signal on the executor of every subscribed account; each trades from its own queue"""
+        for account in accounts:
+            job = copy.copy(item)
+            job.account = account
+            job.trace = item.trace.fork() if item.trace is not None else None
+            await self.pipeline.execute(account.account_id, job)
+        logger.info(f"📣 Fan-out {item.signal.symbol} {item.signal.trade_type}: queued for {len(accounts)} accounts "
+                    f"in {(time.perf_counter() - item.received_at) * 1000.0:.0f} ms")
+
+    async def _handle_new_message(self, message, channel_id: str, user_id: int, account_id: str = None,
+                                  received_at: Optional[float] = None, source: str = 'polling'):
+        """Parse stage: resolve the origin account, parse a new channel message once and queue its signal for routing
         
         Args:
             message: The Telethon message object
             channel_id: The channel ID where the message was received
             user_id: The Telegram user ID
             account_id: The account ID to use for this message (if known from background monitoring)
+            received_at: time.perf_counter() when the message reached the bot (for latency tracking)
+            source: How the message was ingested ('events' or 'polling')
         """
+        if received_at is None:
+            received_at = time.perf_counter()
+        trace = SignalTrace(self.metrics, source, received_at, message)
+        _current_trace.set(trace)
+        mark_stage('parse_queue')
         try:
             logger.info(f"🔔 [_handle_new_message] Called for user {user_id}, channel {channel_id}, account {account_id}")
 
-            # Route to the correct trading account
+            # Route to the correct trading account without touching the user's current account
             # If account_id is provided (from background monitoring), use it directly
+            origin_account = None
             if account_id:
                 logger.info(f"🔗 [_handle_new_message] Using provided account ID: {account_id}")
-                self.set_current_account(user_id, account_id)
+                origin_account = self.enhanced_db.get_account(account_id)
             else:
                 # Fallback: search for matching account based on channel
                 try:
-                    accounts = self.enhanced_db.get_all_accounts()
-                    matching = None
-                    for acc in accounts:
-                        if int(acc.user_id or 0) != int(user_id):
-                            continue
-                        try:
-                            if channel_id and int(channel_id) in [int(str(c)) for c in (acc.monitored_channels or [])]:
-                                matching = acc
-                                break
-                        except Exception:
-                            continue
+                    matching = next((acc for acc in self.enhanced_db.get_channel_accounts(channel_id)
+                                     if int(acc.user_id or 0) == int(user_id or 0)), None)
                     if matching:
-                        current = self.get_current_account(user_id)
-                        if not current or current.account_id != matching.account_id:
-                            logger.info(f"🔗 [_handle_new_message] Switching current account to '{matching.account_name}' based on channel {channel_id}")
-                            self.set_current_account(user_id, matching.account_id)
+                        logger.info(f"🔗 [_handle_new_message] Routing to account '{matching.account_name}' based on channel {channel_id}")
+                        origin_account = matching
                     else:
                         logger.info(f"ℹ️ [_handle_new_message] No specific account matched for channel {channel_id}; using current account")
                 except Exception as e:
                     logger.warning(f"⚠️ [_handle_new_message] Account routing by channel failed: {e}")
-            
-            config = self.get_user_config(user_id)
+            if origin_account is None:
+                origin_account = self.get_current_account(user_id)
+
+            config = self.config_for_account(origin_account) if origin_account else self.get_user_config(user_id)
             logger.info(f"🔧 [_handle_new_message] Config loaded - monitored channels: {config.monitored_channels}")
-            
-            bot_instance = self.bot_instances.get(user_id)
-            logger.info(f"🤖 [_handle_new_message] Bot instance {'found' if bot_instance else 'NOT FOUND'}")
+            mark_stage('account_resolved')
             
             message_text = message.message
             
             if not message_text:
                 logger.warning(f"⚠️ [_handle_new_message] Message has no text content, skipping")
                 return
+
+            # Claimed once, before any notice is queued: a second account client of the channel (failover,
+            # handback) or a re-read after a reconnect/restart skips it, signal or not
+            if not self._claim_message(channel_id, message):
+                logger.info(f"🔁 [_handle_new_message] Message {getattr(message, 'id', None)} from {channel_id} already processed, skipping")
+                return
             
             logger.info(f"📨 [_handle_new_message] Processing message from channel {channel_id}")
             logger.info(f"📨 [_handle_new_message] Message text: {message_text[:200]}")
             
-            # Get channel name for display using cached helper method
-            channel_name = await self.get_channel_display_name(channel_id, user_id)
-            
-            # Send notification about received message
-            if bot_instance:
-                try:
-                    await bot_instance.send_message(
-                        chat_id=user_id,
-                        text=f"📨 <b>New Message Received</b>\n\n<b>From:</b> {channel_name}\n\n<pre>{message_text[:300]}</pre>\n\n🔍 Processing...",
-                        parse_mode='HTML'
-                    )
-                    logger.info(f"✅ [_handle_new_message] Sent notification to user {user_id}")
-                except Exception as e:
-                    logger.error(f"❌ [_handle_new_message] Error sending message notification: {e}")
-            else:
-                logger.warning(f"⚠️ [_handle_new_message] No bot instance to send notification")
+            # Notifications go through the notify stage so Telegram round-trips stay off the signal path;
+            # one client ingests a shared channel, so every subscribed user is told from here
+            subscribers = self._subscriber_users(channel_id, user_id)
+            for subscriber in subscribers:
+                self.pipeline.notify_later(lambda uid=subscriber: self._notify_message_received(uid, channel_id, message_text))
+            mark_stage('received_notice')
             
             # Parse the signal
             logger.info(f"🔍 [_handle_new_message] Starting signal parsing...")
             signal = self.parse_trading_signal(message_text, channel_id)
             logger.info(f"📊 [_handle_new_message] Signal parsing result: {'Signal detected' if signal else 'No signal detected'}")
             
-            if signal:
-                logger.info(f"🎯 SIGNAL DETECTED! {signal.symbol} {signal.trade_type}")
-                
-                # Check if the current account is actually monitoring
-                current_account = self.get_current_account(user_id)
-                if current_account and not self.account_monitoring_status.get(current_account.account_id, False):
-                    logger.warning(f"⏸️ Account {current_account.account_name} received signal but monitoring is not active - skipping trade")
-                    logger.warning(f"⏸️ Current monitoring status: {dict(self.account_monitoring_status)}")
-                    logger.info(f"ℹ️ Note: Trades execute in background regardless of user's current menu location")
-                    if bot_instance:
-                        try:
-                            await bot_instance.send_message(
-                                chat_id=user_id,
-                                text=f"⏸️ <b>Signal Received</b>\n\n💰 {signal.symbol} {signal.trade_type}\n\n⚠️ Account <b>{current_account.account_name}</b> is not monitoring.\nTrade skipped.\n\nUse '🚀 Start' to enable trading for this account.\n\n💡 Tip: Once started, trades execute automatically from anywhere in the bot!",
-                                parse_mode='HTML'
-                            )
-                        except Exception as e:
-                            logger.error(f"Error sending skip notification: {e}")
-                    return
-                
-                settings_source = "Signal" if config.use_signal_settings else "Bot"
-                if bot_instance:
-                    try:
-                        # Get consistent channel name using the cache
-                        channel_info = ""
-                        try:
-                            channel_display = await self.get_channel_display_name(signal.channel_id, user_id) if signal.channel_id else None
-                            if channel_display:
-                                channel_info = f"\n📡 Source: {channel_display}"
-                        except Exception:
-                            pass
-                        
-                        await bot_instance.send_message(
-                            chat_id=user_id,
-                            text=f"🎯 <b>SIGNAL DETECTED!</b>\n\n💰 {signal.symbol} {signal.trade_type}\n⚙️ Using: {settings_source} settings{channel_info}\n🚀 Executing...",
-                            parse_mode='HTML'
-                        )
-                    except Exception as e:
-                        logger.error(f"Error sending signal notification: {e}")
-                
-                # Execute the trade
-                result = await self.execute_trade(signal, config)
-                
-                logger.info(f"Trade execution result: {result}")
-                
-                # Send result notification
-                if bot_instance:
-                    try:
-                        if result.get('success'):
-                            # Get channel name for success notification
-                            channel_display = await self.get_channel_display_name(signal.channel_id, user_id) if signal.channel_id else "Unknown"
-                            notification = f"""✅ <b>TRADE EXECUTED!</b>
-
-💰 Symbol: {result['symbol']}
-📈 Direction: {signal.trade_type}
-📡 From: {channel_display}
-🆔 Order ID: {result['order_id']}
-📦 Quantity: {result['quantity']}
-💲 Entry: {result['price']}
-⚡ Leverage: {result['leverage']}x
-💵 Order Value: ${result['order_value']:.2f}"""
-
-                            if 'sl_price' in result and result['sl_price']:
-                                notification += f"\n🛑 Stop Loss: {result['sl_price']:.6f}"
-                                if result.get('stop_loss_id'):
-                                    notification += f" (ID: {result['stop_loss_id']})"
-
-                            if 'tp_prices' in result and result['tp_prices']:
-                                notification += f"\n🎯 Take Profits:"
-                                for i, tp in enumerate(result.get('take_profit_ids', [])):
-                                    notification += f"\n  TP{i+1}: {tp['price']:.6f} (ID: {tp['order_id']})"
-
-                            notification += "\n🔗 Sent to Make.com"
-                            notification += "\n🔄 OCO: Auto-cancel enabled"
-                            notification += f"\n⏰ Time: {datetime.now().strftime('%H:%M:%S')}"
-                            notification += f"\n\n🎉 Position is LIVE!"
-
-                        else:
-                            # Get channel name for failed trade notification
-                            channel_display = await self.get_channel_display_name(signal.channel_id, user_id) if signal.channel_id else "Unknown"
-                            notification = f"""❌ <b>TRADE EXECUTION FAILED</b>
-
-💰 Symbol: {signal.symbol}
-📈 Direction: {signal.trade_type}
-📡 From: {channel_display}
-🚨 Error: {result.get('error', 'Unknown error')}
-⏰ Time: {datetime.now().strftime('%H:%M:%S')}"""
-
-                        await bot_instance.send_message(chat_id=user_id, text=notification, parse_mode='HTML')
-                    except Exception as e:
-                        logger.error(f"Error sending trade result notification: {e}")
-                
-            else:
+            if not signal:
                 logger.info(f"📨 No valid signal detected in message")
-                if bot_instance:
-                    try:
-                        await bot_instance.send_message(
-                            chat_id=user_id,
-                            text="📨 Message received but no valid signal detected",
-                            parse_mode='HTML'
-                        )
-                    except Exception as e:
-                        logger.error(f"Error sending no-signal notification: {e}")
+                for subscriber in subscribers:
+                    self.pipeline.notify_later(lambda uid=subscriber: self._send_notice(uid, "📨 Message received but no valid signal detected"))
+                return
+
+            logger.info(f"🎯 SIGNAL DETECTED! {signal.symbol} {signal.trade_type}")
+            await self.pipeline.forward(PipelineItem(
+                message=message, channel_id=channel_id, user_id=user_id, account_id=account_id,
+                received_at=received_at, source=source, trace=trace, signal=signal,
+                origin=origin_account, config=config))
                 
         except Exception as e:
             logger.error(f"Error handling new message: {e}")
             logger.error(traceback.format_exc())
 
+    async def _route_signal(self, item: PipelineItem):
+        """Route stage worker: pick every account a parsed signal goes to and queue their trades"""
+        _current_trace.set(item.trace)
+        mark_stage('route_queue')
+        signal, channel_id, user_id, message = item.signal, item.channel_id, item.user_id, item.message
+        
+        # The ingesting account may have been stopped while the message was queued: skip only that
+        # account, the channel's other monitoring subscribers still get the signal
+        current_account = item.origin
+        origin_monitoring = current_account is None or self.account_monitoring_status.get(current_account.account_id, False)
+        if not origin_monitoring:
+            logger.warning(f"⏸️ Account {current_account.account_name} received signal but monitoring is not active - skipping its trade")
+            logger.warning(f"⏸️ Current monitoring status: {dict(self.account_monitoring_status)}")
+            logger.info(f"ℹ️ Note: Trades execute in background regardless of user's current menu location")
+            self.pipeline.notify_later(lambda: self._send_notice(
+                user_id, f"⏸️ <b>Signal Received</b>\n\n💰 {signal.symbol} {signal.trade_type}\n\n⚠️ Account <b>{current_account.account_name}</b> is not monitoring.\nTrade skipped.\n\nUse '🚀 Start' to enable trading for this account.\n\n💡 Tip: Once started, trades execute automatically from anywhere in the bot!"))
+        
+        # Fan out to every monitoring account subscribed to this channel, each on its own client
+        accounts = [current_account] if current_account and origin_monitoring else []
+        for acc in self._accounts_for_channel(channel_id):
+            if acc.account_id != (current_account.account_id if current_account else None) \
+                    and self.account_monitoring_status.get(acc.account_id, False):
+                accounts.append(acc)
+
+        # The same signal cross-posted to several channels executes once per account
+        fingerprint = self.signal_dedup.fingerprint(signal)
+        message_id = getattr(message, 'id', None)
+        duplicates = [acc for acc in accounts
+                      if not self.signal_dedup.claim_signal(acc.account_id, fingerprint, channel_id, message_id)]
+        if duplicates:
+            logger.info(f"🔁 Duplicate {signal.symbol} {signal.trade_type} signal skipped for: "
+                        f"{', '.join(acc.account_name for acc in duplicates)}")
+            accounts = [acc for acc in accounts if acc not in duplicates]
+            if not accounts:
+                return
+        # Only users with an account still getting the trade (after dedup) are told it is executing
+        settings_source = "Signal" if item.config.use_signal_settings else "Bot"
+        if accounts:
+            for recipient in dict.fromkeys(acc.user_id for acc in accounts):
+                self.pipeline.notify_later(lambda uid=recipient: self._notify_signal_detected(uid, signal, settings_source))
+            await self.fan_out_signal(item, accounts)
+        elif not origin_monitoring:
+            logger.info(f"⏸️ No monitoring account left for {signal.symbol} {signal.trade_type} from {channel_id}")
+        elif not self.signal_dedup.claim_signal(item.account_id or '', fingerprint, channel_id, message_id):
+            logger.info(f"🔁 Duplicate {signal.symbol} {signal.trade_type} signal skipped")
+        else:
+            # No account to route to: legacy single-config execution on the user's executor
+            self.pipeline.notify_later(lambda: self._notify_signal_detected(user_id, signal, settings_source))
+            await self.pipeline.execute(f"user:{user_id}", item)
+
 # Initialize bot
 trading_bot = TradingBot()
 
@@ -4239,42 +7119,18 @@ DEFAULT_SETTINGS = {
     'trailing_stop_enabled': False
 }
 
-# Trade tracker for duplicate prevention
+# Trade tracker for duplicate prevention (per account/symbol/channel, 24h) backed by the shared cooldown index
 class TradeTracker:
-    def __init__(self, db_path: str):
-        self.db_path = db_path
-        self.init_table()
-
-    def init_table(self):
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("""CREATE TABLE IF NOT EXISTS trade_tracking (
-                id INTEGER PRIMARY KEY, account_id TEXT, symbol TEXT, 
-                channel_id TEXT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(account_id, symbol, channel_id, date(timestamp)))""")
-            conn.commit()
-            conn.close()
-        except: pass
+    def __init__(self, cooldowns: CooldownIndex):
+        self.cooldowns = cooldowns
 
     def can_open_trade(self, account_id: str, symbol: str, channel_id: str) -> bool:
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM trade_tracking WHERE account_id=? AND symbol=? AND channel_id=? AND timestamp > datetime('now','-24 hours')", (account_id, symbol, channel_id))
-            return cursor.fetchone()[0] == 0
-        except: return True
+        return self.cooldowns.remaining(account_id, symbol, 24, channel_id) <= 0
 
     def record_trade(self, account_id: str, symbol: str, channel_id: str):
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("INSERT OR IGNORE INTO trade_tracking (account_id,symbol,channel_id) VALUES (?,?,?)", (account_id,symbol,channel_id))
-            conn.commit()
-            conn.close()
-        except: pass
+        self.cooldowns.record(account_id, symbol, None, channel_id)
 
-trade_tracker = TradeTracker("enhancedtradingbot.db")
+trade_tracker = TradeTracker(trading_bot.enhanced_db.cooldowns)
 
 # Keyboard builders
 def build_main_menu():
@@ -4481,12 +7337,15 @@ async def handle_main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
         msg = "📊 <b>Overall Statistics</b>\n\n"
         msg += f"📋 Total Accounts: <b>{len(accs)}</b>\n"
         
-        active_count = sum(1 for acc in accs if trading_bot.monitoring_status.get(user_id, False))
+        active_count = sum(1 for acc in accs if trading_bot.account_monitoring_status.get(acc.account_id, False))
         msg += f"🟢 Active Monitoring: <b>{active_count}</b>\n\n"
         
         # Per-account stats (compact format)
         msg += "💼 <b>Account Details:</b>\n\n"
         
+        # Every account's figures in one grouped query instead of two queries per account
+        overview = trading_bot.enhanced_db.get_accounts_overview()
+        empty_stats = {'total_trades': 0, 'active_trades': 0, 'total_pnl': 0.0, 'win_rate': 0.0}
         accounts_shown = 0
         for acc in accs:
             # Check message length to avoid exceeding Telegram's limit
@@ -4494,19 +7353,8 @@ async def handle_main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 msg += f"<i>... and {len(accs) - accounts_shown} more accounts</i>\n"
                 break
             
-            # Get active trades and history for this account
-            active_trades = trading_bot.enhanced_db.get_active_trades(acc.account_id)
-            trade_history = trading_bot.enhanced_db.get_trade_history(acc.account_id, limit=100)
-            
-            # Calculate PnL and win rate
-            total_pnl = sum(float(t.pnl) if t.pnl else 0 for t in trade_history)
-            
-            # Calculate win rate from closed trades only
-            closed_trades = [t for t in trade_history if t.status == "CLOSED"]
-            winning_trades = [t for t in closed_trades if float(t.pnl or 0) > 0]
-            win_rate = (len(winning_trades) / len(closed_trades) * 100) if closed_trades else 0
-            
-            monitor_status = "🟢" if trading_bot.monitoring_status.get(user_id, False) else "🔴"
+            stats = overview.get(acc.account_id, empty_stats)
+            monitor_status = "🟢" if trading_bot.account_monitoring_status.get(acc.account_id, False) else "🔴"
             
             # Compact format
             acc_name = acc.account_name
@@ -4514,8 +7362,8 @@ async def handle_main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 acc_name = acc_name[:17] + "..."
             
             msg += f"<b>{acc_name}</b> {monitor_status}\n"
-            msg += f"  {acc.leverage}x | Active: {len(active_trades)} | Total: {len(trade_history)}\n"
-            msg += f"  WR: {win_rate:.1f}% | PnL: {total_pnl:.2f} USDT\n\n"
+            msg += f"  {acc.leverage}x | Active: {stats['active_trades']} | Total: {stats['total_trades']}\n"
+            msg += f"  WR: {stats['win_rate']:.1f}% | PnL: {stats['total_pnl']:.2f} USDT\n\n"
             accounts_shown += 1
         
         # Ensure we don't exceed Telegram's limit
@@ -4526,30 +7374,18 @@ async def handle_main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     elif text == "🚀 Start All":
         # Start monitoring all accounts
-        accs = trading_bot.enhanced_db.get_all_accounts()
-        started_count = 0
-        failed_accounts = []
-        
-        for acc in accs:
-            if not acc.monitored_channels:
-                continue  # Skip accounts without channels
-            
-            try:
-                # Set current account temporarily
-                trading_bot.set_current_account(user_id, acc.account_id)
-                success = await trading_bot.start_monitoring(user_id, context.bot)
-                if success:
-                    trading_bot.monitoring_status[user_id] = True
-                    trading_bot.account_monitoring_status[acc.account_id] = True
-                    started_count += 1
-                else:
-                    failed_accounts.append(acc.account_name)
-            except Exception as e:
-                logger.error(f"Error starting {acc.account_name}: {e}")
-                failed_accounts.append(acc.account_name)
+        # Skip accounts without channels; the rest start concurrently under the startup orchestrator
+        accs = [acc for acc in trading_bot.enhanced_db.get_all_accounts() if acc.monitored_channels]
+        reports = await trading_bot.startup.start(accs, context.bot, owner_id=user_id)
+        started = [r for r in reports if r.ready]
+        failed_accounts = [r.account_name for r in reports if not r.ready]
+        if accs:
+            trading_bot.set_current_account(user_id, accs[-1].account_id)
         
         msg = f"🚀 <b>Start All Accounts</b>\n\n"
-        msg += f"✅ Successfully started: {started_count}\n"
+        msg += f"✅ Successfully started: {len(started)}\n"
+        if started:
+            msg += f"⏱️ All listening after {max(r.listening_seconds for r in started):.1f}s\n"
         if failed_accounts:
             msg += f"❌ Failed: {len(failed_accounts)}\n"
             msg += f"Failed accounts: {', '.join(failed_accounts[:5])}"
@@ -4716,10 +7552,10 @@ async def handle_main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
             # Get balance from exchange
             balance = 0.0
             try:
-                if acc.account_id in trading_bot.account_exchanges:
-                    exchange = trading_bot.account_exchanges[acc.account_id]
-                    acc_trading_type = getattr(acc, 'trading_type', 'swap')
-                    bal = exchange.fetch_balance({'type': acc_trading_type})
+                acc_trading_type = getattr(acc, 'trading_type', 'swap')
+                exchange = trading_bot.exchange_pool.get(acc.account_id, acc_trading_type)
+                if exchange:
+                    bal = await exchange.fetch_balance({'type': acc_trading_type})
                     balance = bal.get('USDT', {}).get('total', 0.0) if isinstance(bal, dict) else 0.0
             except Exception as e:
                 logger.warning(f"⚠️ Failed to fetch balance for account {acc.account_name}: {e}")
@@ -6540,6 +9376,7 @@ async def handle_account_settings_text(update: Update, context: ContextTypes.DEF
             ok = trading_bot.enhanced_db.soft_delete_account(acc.account_id)
             context.user_data.pop('awaiting_delete', None)
             if ok:
+                trading_bot.exchange_pool.discard(acc.account_id)
                 await update.message.reply_text("✅ Account disabled (soft-deleted).", parse_mode='HTML')
             else:
                 await update.message.reply_text("❌ Failed to delete account", parse_mode='HTML')
@@ -7687,9 +10524,6 @@ async def handle_settings_callbacks(update: Update, context: ContextTypes.DEFAUL
     
     elif data == "set_trading_type_swap":
         trading_bot.enhanced_db.update_account_settings(current_account.account_id, trading_type='swap')
-        # Clear cached exchange to force recreation with new type
-        if current_account.account_id in trading_bot.account_exchanges:
-            del trading_bot.account_exchanges[current_account.account_id]
         await query.edit_message_text(
             f"✅ <b>Trading Type Updated</b>\n\n"
             f"Now using: <b>🔮 Futures/Swap</b>\n\n"
@@ -7699,9 +10533,6 @@ async def handle_settings_callbacks(update: Update, context: ContextTypes.DEFAUL
     
     elif data == "set_trading_type_spot":
         trading_bot.enhanced_db.update_account_settings(current_account.account_id, trading_type='spot')
-        # Clear cached exchange to force recreation with new type
-        if current_account.account_id in trading_bot.account_exchanges:
-            del trading_bot.account_exchanges[current_account.account_id]
         await query.edit_message_text(
             f"✅ <b>Trading Type Updated</b>\n\n"
             f"Now using: <b>💱 Spot</b>\n\n"
@@ -7739,6 +10570,7 @@ async def handle_settings_callbacks(update: Update, context: ContextTypes.DEFAUL
             # Perform actual deletion
             success = trading_bot.enhanced_db.soft_delete_account(account_id)
             if success:
+                trading_bot.exchange_pool.discard(account_id)
                 await query.edit_message_text(
                     f"✅ <b>Account Deleted</b>\n\n"
                     f"Account '{current_account.account_name}' has been deleted.",
@@ -8145,58 +10977,40 @@ async def auto_start_monitoring(application):
         
         logger.info(f"✅ Retrieved {len(accounts)} accounts from database")
         
+        eligible = []
         for account in accounts:
+            # Skip accounts without a user_id (not yet associated with a user)
+            if not account.user_id or account.user_id == 0:
+                logger.info(f"⏭️ Skipping account {account.account_name} ({account.account_id[:8]}...) - no user associated yet")
+                continue
+            if not account.monitored_channels:
+                continue
+            logger.info(f"🚀 Auto-starting monitoring for user {account.user_id} with {len(account.monitored_channels)} channels")
+            logger.info(f"   Account: {account.account_name}")
+            logger.info(f"   Channels: {account.monitored_channels}")
+            eligible.append(account)
+        
+        # The user's last account becomes their current one, as when accounts were started one by one
+        bot_app = application.bot
+        for account in eligible:
+            trading_bot.current_accounts[account.user_id] = account.account_id
+            trading_bot.bot_instances[account.user_id] = bot_app
+        for user_id, account_id in {acc.user_id: acc.account_id for acc in eligible}.items():
+            trading_bot.enhanced_db.set_app_setting(f'current_account_{user_id}', account_id)
+        
+        reports = await trading_bot.startup.start(eligible, bot_app)
+        
+        async def notify(account: AccountConfig, report: AccountStartup):
             try:
-                # Skip accounts without a user_id (not yet associated with a user)
-                if not account.user_id or account.user_id == 0:
-                    logger.info(f"⏭️ Skipping account {account.account_name} ({account.account_id[:8]}...) - no user associated yet")
-                    continue
-                
-                if account.monitored_channels and len(account.monitored_channels) > 0:
-                    logger.info(f"🚀 Auto-starting monitoring for user {account.user_id} with {len(account.monitored_channels)} channels")
-                    logger.info(f"   Account: {account.account_name}")
-                    logger.info(f"   Channels: {account.monitored_channels}")
-                    
-                # Set the current account for this user and bind exchange client
-                trading_bot.set_current_account(account.user_id, account.account_id)
-                trading_bot.enhanced_db.set_app_setting(f'current_account_{account.user_id}', account.account_id)
-                
-                # Use the application's bot instance
-                bot_app = application.bot
-                trading_bot.bot_instances[account.user_id] = bot_app
-                
-                # Start monitoring with timeout to prevent hanging
-                try:
-                    success = await asyncio.wait_for(
-                        trading_bot.start_monitoring(account.user_id, bot_app),
-                        timeout=30.0  # 30 second timeout
-                    )
-                    
-                    if success:
-                        trading_bot.monitoring_status[account.user_id] = True
-                        trading_bot.account_monitoring_status[account.account_id] = True
-                        logger.info(f"✅ Auto-started monitoring for account {account.account_id}")
-                        
-                        # Send notification to user
-                        try:
-                            await bot_app.send_message(
-                                chat_id=account.user_id,
-                                text=f"🤖 <b>Bot Started</b>\n\n✅ Auto-started monitoring for account <b>{account.account_name}</b>\n📡 Monitoring {len(account.monitored_channels)} channel(s)\n\n🔍 Ready to detect signals!",
-                                parse_mode='HTML'
-                            )
-                        except Exception as e:
-                            logger.warning(f"⚠️ Could not send start notification to user {account.user_id}: {e}")
-                    else:
-                        logger.error(f"❌ Failed to auto-start monitoring for user {account.user_id}")
-                except asyncio.TimeoutError:
-                    logger.error(f"⏱️ Timeout starting monitoring for account {account.account_id} - continuing anyway")
-                except Exception as monitor_err:
-                    logger.error(f"❌ Error starting monitoring for account {account.account_id}: {monitor_err}")
-                    logger.error(traceback.format_exc())
-                    
+                await bot_app.send_message(
+                    chat_id=account.user_id,
+                    text=f"🤖 <b>Bot Started</b>\n\n✅ Auto-started monitoring for account <b>{account.account_name}</b>\n📡 Monitoring {len(account.monitored_channels)} channel(s)\n⏱️ Listening after {report.listening_seconds:.1f}s\n\n🔍 Ready to detect signals!",
+                    parse_mode='HTML'
+                )
             except Exception as e:
-                logger.error(f"❌ Error auto-starting monitoring for account {account.account_id}: {e}")
-                logger.error(traceback.format_exc())
+                logger.warning(f"⚠️ Could not send start notification to user {account.user_id}: {e}")
+        
+        await asyncio.gather(*(notify(acc, report) for acc, report in zip(eligible, reports) if report.ready))
         
         logger.info("✅ Auto-start monitoring completed")
         
@@ -8262,6 +11076,12 @@ def main():
         async def post_init(app):
             """Called after the bot starts"""
             try:
+                trading_bot.market_metadata.start()
+                trading_bot.webhook_delivery.start()
+                trading_bot.prices.start()
+                trading_bot.exchange_pool.start(
+                    [acc for acc in trading_bot.enhanced_db.get_all_accounts() if acc.is_active])
+                await trading_bot.metrics.start()
                 logger.info("🚀 Bot initialized, starting auto-monitoring...")
                 await auto_start_monitoring(app)
                 logger.info("✅ Auto-monitoring initialization completed")
@@ -8270,6 +11090,40 @@ def main():
                 logger.error(traceback.format_exc())
         
         application.post_init = post_init
+
+        async def post_shutdown(app):
+            """Stop background services, checkpoint the WAL and release database connections"""
+            # Drain queued trades first, while the exchange clients and webhook queue they use are still open
+            try:
+                await trading_bot.pipeline.close()
+            except Exception as e:
+                logger.error(f"❌ Error stopping signal pipeline: {e}")
+            try:
+                await trading_bot.market_metadata.close()
+            except Exception as e:
+                logger.error(f"❌ Error stopping market metadata refresher: {e}")
+            try:
+                await trading_bot.webhook_delivery.close()
+            except Exception as e:
+                logger.error(f"❌ Error stopping webhook delivery: {e}")
+            try:
+                await trading_bot.exchange_pool.close()
+            except Exception as e:
+                logger.error(f"❌ Error closing exchange clients: {e}")
+            try:
+                await trading_bot.prices.close()
+            except Exception as e:
+                logger.error(f"❌ Error stopping price service: {e}")
+            try:
+                await trading_bot.metrics.close()
+            except Exception as e:
+                logger.error(f"❌ Error stopping metrics endpoint: {e}")
+            try:
+                trading_bot.enhanced_db.connections.close()
+            except Exception as e:
+                logger.error(f"❌ Error closing database: {e}")
+
+        application.post_shutdown = post_shutdown
         
         # Run polling with proper settings to keep bot alive
         print("🚀 Starting bot polling loop...")
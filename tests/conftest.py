@@ -0,0 +1,25 @@
+"""Import bot.py against a throwaway database, spool and log file"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKDIR = tempfile.mkdtemp(prefix='bot_tests_')
+
+os.environ['ENHANCED_DB_PATH'] = os.path.join(WORKDIR, 'enhanced_trading_bot.db')
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(scope='session')
+def bot():
+    # bot.py opens trading_bot.log relative to the working directory at import time
+    cwd = os.getcwd()
+    os.chdir(WORKDIR)
+    try:
+        import bot as module
+    finally:
+        os.chdir(cwd)
+    return module
@@ -0,0 +1,23 @@
+"""Incrementally maintained account_stats stay equal to a replay of the trade history"""
+
+
+def close(bot, db, trade_id, pnl, exit_time):
+    assert db.save_trade_history(bot.TradeHistory(
+        trade_id=trade_id, account_id='acc', symbol='BTC/USDT', side='LONG', entry_price=100.0, quantity=1.0,
+        leverage=10, status='CLOSED', pnl=pnl, exit_time=exit_time, channel_id='-100'))
+
+
+def test_pnl_correction_recomputes_peak_and_drawdown(bot, tmp_path, monkeypatch):
+    monkeypatch.setenv('ENHANCED_DB_PATH', str(tmp_path / 'stats.db'))
+    db = bot.EnhancedDatabase()
+    try:
+        close(bot, db, 't1', 10.0, '2026-01-01T00:00:00')
+        close(bot, db, 't2', -5.0, '2026-01-02T00:00:00')
+        assert db.get_account_stats('acc')['max_drawdown'] == 5.0
+
+        assert db.update_trade_status('t2', pnl=5.0)
+        for channel_id in (None, '-100'):
+            stats = db.get_account_stats('acc', channel_id)
+            assert (stats['net_pnl'], stats['max_drawdown'], stats['wins']) == (15.0, 0.0, 2)
+    finally:
+        db.connections.close()
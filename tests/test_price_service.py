@@ -0,0 +1,30 @@
+"""Shared REST ticker fetches of the price service"""
+
+import asyncio
+
+
+class Exchange:
+    trading_type = 'swap'
+
+    def __init__(self):
+        self.calls = 0
+
+    async def fetch_ticker(self, symbol):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return {'symbol': symbol, 'last': 100.0}
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_fetch(bot):
+    prices = bot.PriceService(streaming=False)
+    exchange = Exchange()
+
+    async def scenario():
+        first = asyncio.create_task(prices.ticker('BTC-USDT', exchange))
+        second = asyncio.create_task(prices.ticker('BTC-USDT', exchange))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario())['last'] == 100.0
+    assert exchange.calls == 1
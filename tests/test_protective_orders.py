@@ -0,0 +1,59 @@
+"""Batched SL/TP placement never doubles an order the exchange already accepted"""
+
+import asyncio
+import time
+
+import ccxt
+import pytest
+
+
+class Exchange:
+    def __init__(self, batch_error=None, batch_keep=None):
+        self.batch_error = batch_error
+        self.batch_keep = batch_keep  # indices of the batch the exchange accepts and reports
+        self.open_orders = []
+        self.single = []
+
+    async def create_orders(self, orders):
+        accepted = [dict(id=f"b{i}", clientOrderId=o['params']['clientOrderId'])
+                    for i, o in enumerate(orders) if self.batch_keep is None or i in self.batch_keep]
+        self.open_orders.extend(accepted)
+        if self.batch_error:
+            raise self.batch_error
+        return accepted
+
+    async def fetch_open_orders(self, symbol=None):
+        return list(self.open_orders)
+
+    async def create_order(self, symbol, order_type, side, amount, price=None, params=None):
+        self.single.append(params['clientOrderId'])
+        return {'id': f"s{len(self.single)}", 'clientOrderId': params['clientOrderId']}
+
+
+def specs():
+    return [{'label': label, 'type': 'STOP_MARKET', 'side': 'sell', 'amount': 1, 'params': {'stopPrice': price}}
+            for label, price in (('SL', 90), ('TP1', 110), ('TP2', 120))]
+
+
+@pytest.fixture
+def batch_mode(bot, monkeypatch):
+    monkeypatch.setattr(bot, 'PROTECTIVE_ORDER_MODE', 'batch')
+    return bot.trading_bot
+
+
+def place(tb, exchange):
+    return asyncio.run(tb._place_protective_orders(exchange, 'BTC-USDT', specs(), time.perf_counter()))
+
+
+def test_timeout_after_the_batch_was_accepted_places_nothing_again(batch_mode):
+    exchange = Exchange(batch_error=ccxt.RequestTimeout('timed out'))
+    placed = place(batch_mode, exchange)
+    assert exchange.single == []
+    assert [order['id'] for _, order in placed] == ['b0', 'b1', 'b2']
+
+
+def test_short_batch_response_places_only_the_missing_entries(batch_mode):
+    exchange = Exchange(batch_keep={0, 2})
+    placed = place(batch_mode, exchange)
+    assert exchange.single == [placed[1][0]['params']['clientOrderId']]
+    assert [order['id'] for _, order in placed] == ['b0', 's1', 'b2']
@@ -0,0 +1,23 @@
+"""Hot-path queries must be answered from an index, never a full table scan"""
+
+
+def test_hot_queries_do_not_scan(bot, tmp_path, monkeypatch):
+    monkeypatch.setenv('ENHANCED_DB_PATH', str(tmp_path / 'plans.db'))
+    db = bot.EnhancedDatabase()
+    try:
+        assert db.HOT_QUERIES
+        assert db.verify_query_plans() == []
+    finally:
+        db.connections.close()
+
+
+def test_schema_is_at_latest_migration(bot, tmp_path, monkeypatch):
+    monkeypatch.setenv('ENHANCED_DB_PATH', str(tmp_path / 'version.db'))
+    db = bot.EnhancedDatabase()
+    try:
+        with db.connections.read() as cursor:
+            cursor.execute('PRAGMA user_version')
+            version = cursor.fetchone()[0]
+        assert version == max(v for v, _ in db.SCHEMA_MIGRATIONS)
+    finally:
+        db.connections.close()
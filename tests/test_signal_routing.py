@@ -0,0 +1,153 @@
+"""Routing of a parsed channel signal to the subscribed accounts through the signal pipeline"""
+
+import asyncio
+import time
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+SIGNAL_TEXT = "#BTC LONG\nEntry 100\nTP 110\nSL 90"
+
+
+class Message:
+    def __init__(self, message_id, text=SIGNAL_TEXT):
+        self.id = message_id
+        self.message = text
+        self.date = None
+
+
+@pytest.fixture
+def routing(bot, monkeypatch):
+    """Three accounts of two users on one fresh channel, with trades and Telegram sends recorded"""
+    tb = bot.trading_bot
+    channel_id = str(-1000000000000 - uuid.uuid4().int % 10 ** 9)
+    accounts = []
+    for name, user_id in (('owner', 501), ('peer', 502), ('peer2', 502)):
+        account = bot.AccountConfig(account_id=f"{name}-{uuid.uuid4().hex[:8]}", account_name=name,
+                                    bingx_api_key='', bingx_secret_key='', telegram_api_id='', telegram_api_hash='',
+                                    phone='', user_id=user_id, monitored_channels=[int(channel_id)])
+        assert tb.enhanced_db.create_account(account)
+        monkeypatch.setitem(tb.account_monitoring_status, account.account_id, True)
+        accounts.append(tb.enhanced_db.get_account(account.account_id))
+
+    trades = []
+
+    async def execute_trade(signal, config, account=None):
+        trades.append(account.account_name if account else None)
+        return {'success': True, 'symbol': signal.symbol, 'order_id': 1, 'quantity': 1, 'price': 100,
+                'leverage': config.leverage, 'order_value': 10.0}
+
+    sender = MagicMock()
+    sender.send_message = AsyncMock()
+    monkeypatch.setattr(tb, 'execute_trade', execute_trade)
+    monkeypatch.setattr(tb, 'get_channel_display_name', AsyncMock(return_value='Signals'))
+    monkeypatch.setattr(tb, 'bot_instances', {501: sender, 502: sender})
+    monkeypatch.setattr(tb, 'pipeline', bot.SignalPipeline(
+        tb.metrics, parse=tb._parse_ingested, route=tb._route_signal, execute=tb._execute_signal,
+        on_expired=tb._signal_expired))
+    yield tb, channel_id, accounts, trades, sender
+    for account in accounts:
+        tb.enhanced_db.soft_delete_account(account.account_id)
+
+
+def deliver(tb, channel_id, origin, message):
+    async def scenario():
+        await tb._ingest_message(origin.account_id, origin.user_id, channel_id, message, time.perf_counter(), 'events')
+        await tb.pipeline.close()  # drains every stage before stopping it
+    asyncio.run(scenario())
+
+
+def test_signal_fans_out_to_every_monitoring_subscriber(routing):
+    tb, channel_id, (owner, peer, peer2), trades, _ = routing
+    deliver(tb, channel_id, owner, Message(1))
+    assert sorted(trades) == ['owner', 'peer', 'peer2']
+
+
+def test_stopped_owner_only_skips_its_own_trade(routing):
+    tb, channel_id, (owner, peer, peer2), trades, _ = routing
+    tb.account_monitoring_status[owner.account_id] = False  # stopped while the message was queued
+    deliver(tb, channel_id, owner, Message(2))
+    assert sorted(trades) == ['peer', 'peer2']
+
+
+def notices(sender, heading):
+    return sorted(call.kwargs['chat_id'] for call in sender.send_message.call_args_list if heading in call.kwargs['text'])
+
+
+def test_every_subscribed_user_is_notified_once(routing):
+    tb, channel_id, (owner, peer, peer2), trades, sender = routing
+    deliver(tb, channel_id, owner, Message(3))
+    assert notices(sender, 'New Message Received') == [501, 502]
+    assert notices(sender, 'SIGNAL DETECTED') == [501, 502]
+
+
+def test_message_without_signal_notifies_every_subscribed_user(routing):
+    tb, channel_id, (owner, peer, peer2), trades, sender = routing
+    deliver(tb, channel_id, owner, Message(4, text="good morning"))
+    assert trades == []
+    assert notices(sender, 'no valid signal detected') == [501, 502]
+
+
+def test_message_seen_by_two_clients_is_handled_once(routing):
+    tb, channel_id, (owner, peer, peer2), trades, sender = routing
+    message = Message(6, text="good morning")
+
+    async def scenario():
+        # Failover/handback: the previous owner and the new one both read the same message
+        await tb._ingest_message(owner.account_id, owner.user_id, channel_id, message, time.perf_counter(), 'events')
+        await tb._ingest_message(peer.account_id, peer.user_id, channel_id, message, time.perf_counter(), 'polling')
+        await tb.pipeline.close()
+    asyncio.run(scenario())
+    assert notices(sender, 'New Message Received') == [501, 502]
+    assert notices(sender, 'no valid signal detected') == [501, 502]
+
+
+def test_cross_posted_duplicate_is_not_announced_again(routing):
+    tb, channel_id, (owner, peer, peer2), trades, sender = routing
+
+    async def scenario():
+        for message_id in (7, 8):  # the same signal posted twice
+            await tb._ingest_message(owner.account_id, owner.user_id, channel_id, Message(message_id),
+                                     time.perf_counter(), 'events')
+        await tb.pipeline.close()
+    asyncio.run(scenario())
+    assert sorted(trades) == ['owner', 'peer', 'peer2']
+    assert notices(sender, 'SIGNAL DETECTED') == [501, 502]
+
+
+def test_same_symbol_trades_of_an_account_never_overlap(routing, bot, monkeypatch):
+    tb, channel_id, (owner, peer, peer2), trades, _ = routing
+    running, overlaps = set(), []
+
+    async def execute_trade(signal, config, account=None):
+        key = (account.account_id, signal.symbol)
+        overlaps.append(key in running)
+        running.add(key)
+        await asyncio.sleep(0.01)  # order placement; the cooldown is recorded after it
+        running.discard(key)
+        return {'success': False, 'error': 'cooldown'}
+
+    monkeypatch.setattr(tb, 'execute_trade', execute_trade)
+    monkeypatch.setattr(tb, 'pipeline', bot.SignalPipeline(
+        tb.metrics, parse=tb._parse_ingested, route=tb._route_signal, execute=tb._execute_signal,
+        on_expired=tb._signal_expired, execute_workers=2))
+    job = bot.PipelineItem(message=Message(5), channel_id=channel_id, user_id=owner.user_id,
+                           account_id=owner.account_id, received_at=time.perf_counter(), source='events',
+                           signal=tb.parse_trading_signal(SIGNAL_TEXT, channel_id), account=owner)
+
+    async def scenario():
+        for _ in range(3):
+            await tb.pipeline.execute(owner.account_id, job)
+        await tb.pipeline.close()
+    asyncio.run(scenario())
+    assert overlaps == [False, False, False]
+
+
+def test_cursor_never_passes_a_message_still_in_the_pipeline(bot):
+    hub = bot.ChannelIngestionHub()
+    hub.ingested('-100', 10)                  # signal queued for parsing
+    assert hub.handled('-100', 11) is None    # media-only message skipped right after it
+    hub.ingested('-100', 12)
+    assert hub.handled('-100', 12) is None    # a second parse worker finished first
+    assert hub.handled('-100', 10) == 12
@@ -0,0 +1,128 @@
+"""WebhookDeliveryQueue against a local aiohttp stub of the Make.com endpoint"""
+
+import asyncio
+import json
+import os
+import time
+
+from aiohttp import web
+
+
+class StubWebhook:
+    """Records every POST body and answers with the queued statuses (200 once they run out)"""
+
+    def __init__(self, statuses=()):
+        self.statuses = list(statuses)
+        self.requests = []
+        self.runner = None
+        self.port = 0
+
+    async def _handle(self, request):
+        self.requests.append((time.monotonic(), await request.json()))
+        status = self.statuses.pop(0) if self.statuses else 200
+        return web.Response(status=status, text='Accepted' if status < 300 else 'Server error')
+
+    async def start(self, port=0):
+        app = web.Application()
+        app.router.add_post('/hook', self._handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, '127.0.0.1', port).start()
+        self.port = self.runner.addresses[0][1]
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.port}/hook'
+
+
+async def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'condition not met in time'
+        await asyncio.sleep(0.01)
+
+
+def read_spool(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def test_batches_queued_payloads_into_one_post(bot, tmp_path):
+    async def scenario():
+        stub = StubWebhook()
+        await stub.start()
+        queue = bot.WebhookDeliveryQueue(str(tmp_path / 'spool.jsonl'), batch_size=3, replay_interval=3600)
+        try:
+            for i in range(3):
+                assert queue.enqueue(stub.url, {'trade': i})
+            await wait_until(lambda: queue.delivered == 3)
+        finally:
+            await queue.close(drain_timeout=0)
+            await stub.stop()
+        return stub.requests
+
+    requests = asyncio.run(scenario())
+    assert [body for _, body in requests] == [[{'trade': 0}, {'trade': 1}, {'trade': 2}]]
+
+
+def test_retries_5xx_with_exponential_backoff(bot, tmp_path):
+    async def scenario():
+        stub = StubWebhook(statuses=[500, 502, 503])
+        await stub.start()
+        queue = bot.WebhookDeliveryQueue(str(tmp_path / 'spool.jsonl'), max_retries=5, retry_base=0.05,
+                                         replay_interval=3600)
+        try:
+            queue.enqueue(stub.url, {'trade': 'retry'})
+            await wait_until(lambda: queue.delivered == 1)
+        finally:
+            await queue.close(drain_timeout=0)
+            await stub.stop()
+        return stub.requests, queue
+
+    requests, queue = asyncio.run(scenario())
+    assert [body for _, body in requests] == [{'trade': 'retry'}] * 4
+    assert queue.retried == 3
+    assert queue.spooled == 0
+    gaps = [later - earlier for (earlier, _), (later, _) in zip(requests, requests[1:])]
+    for attempt, gap in enumerate(gaps):
+        assert gap >= 0.05 * (2 ** attempt) * 0.9
+
+
+def test_spools_while_endpoint_is_down_and_replays_later(bot, tmp_path):
+    spool_path = str(tmp_path / 'spool.jsonl')
+
+    async def scenario():
+        stub = StubWebhook()
+        await stub.start()
+        url, port = stub.url, stub.port
+        await stub.stop()  # endpoint down: connection refused
+
+        queue = bot.WebhookDeliveryQueue(spool_path, max_retries=1, retry_base=0.01, replay_interval=3600)
+        try:
+            queue.enqueue(url, {'trade': 'offline'})
+            await wait_until(lambda: queue.spooled == 1)
+        finally:
+            await queue.close(drain_timeout=0)
+        spooled = read_spool(spool_path)
+
+        # Endpoint back up: a fresh queue replays the spool on start
+        stub = StubWebhook()
+        await stub.start(port)
+        queue = bot.WebhookDeliveryQueue(spool_path, replay_interval=3600)
+        try:
+            queue.start()
+            await wait_until(lambda: queue.delivered == 1)
+        finally:
+            await queue.close(drain_timeout=0)
+            await stub.stop()
+        return spooled, stub.requests
+
+    spooled, requests = asyncio.run(scenario())
+    assert [(entry['url'].endswith('/hook'), entry['payload']) for entry in spooled] == [(True, {'trade': 'offline'})]
+    assert [body for _, body in requests] == [{'trade': 'offline'}]
+    assert read_spool(spool_path) == []